@@ -1,9 +1,11 @@
 import simpy
 import random
 import json
-import os
+import numpy as np
 from helpers.ndjson_logger import build_standard_event
 from datetime import datetime, timezone
+from helpers.observer_store import ObserverStore
+from helpers.observation_export import save_observations
 
 # --- Temperature thresholds (°C) ---
 TEMP_MIN_OPERATING = 68
@@ -24,8 +26,11 @@ TEMP_RISE_WHEN_COLD = 1.5
 TEMP_RANGE_VARIATION = (-2, 2)
 FLOW_RATE = 41.7  # L per step
 
+# --- Fast-forward mode ---
+INCREMENT_BLOCK = 4096  # temperature increments pre-drawn at a time
+
 class Pasteuriser:
-    def __init__(self, env, input_store, output_store, temp_optimal, waste_store, flow_rate=None, clock=None, logger=None):
+    def __init__(self, env, input_store, output_store, temp_optimal, waste_store, flow_rate=None, clock=None, logger=None, observer_config=None, verbose=True, fast_forward=False, rng=None):
         self.env = env
         self.input_store = input_store
         self.output_store = output_store
@@ -42,12 +47,23 @@ class Pasteuriser:
         self.pasteurized_total = 0.0
         self.burnt_total = 0.0
         
-        self.observer = []
+        self.observer = ObserverStore.from_config(observer_config, name='pasteuriser')
         self.logger = logger
+        self.verbose = verbose
+
+        self.random = rng or random
+        # Fast-forward mode draws temperature increments in NumPy blocks
+        self.fast_forward = fast_forward
+        self.generator = None
+        if fast_forward:
+            self.generator = rng.generator if rng else np.random.default_rng(random.getrandbits(64))
+        self._increments = np.empty(0)
+        self._next_increment = 0
 
         # Print header once
-        print(f"{'Time':<7} {'StartTank':>7} {'BalanceTank':>12} {'Pasteurized':>12} {'Burnt':>7} {'Temp':>7} Status")
-        print("-" * 70)
+        if self.verbose:
+            print(f"{'Time':<7} {'StartTank':>7} {'BalanceTank':>12} {'Pasteurized':>12} {'Burnt':>7} {'Temp':>7} Status")
+            print("-" * 70)
 
     def format_time(self):
         total_seconds = self.env.now * STEP_DURATION_SEC
@@ -55,7 +71,7 @@ class Pasteuriser:
         seconds = int(total_seconds % 60)
         return f"{minutes}:{seconds:02d}"
 
-    def log_status(self, status):
+    def log_status(self, status, segment_steps=None):
         utc_time = self.clock.now() if self.clock else datetime.now(timezone.utc).isoformat()
         
         # Convert internal 15-second steps to whole minutes (integer)
@@ -70,6 +86,15 @@ class Pasteuriser:
             'status': status,
             'machine': 'pasteuriser'
         }
+        extra = {
+            'start_tank_L': event['start_tank_L'],
+            'balance_tank_L': event['balance_tank_L'],
+            'burnt_total_L': event['burnt_total_L'],
+            'status': status,
+        }
+        if segment_steps is not None:
+            event['segment_steps'] = segment_steps
+            extra['segment_steps'] = segment_steps
         self.observer.append(event)
         if self.logger:
             self.logger.log_event(
@@ -79,24 +104,24 @@ class Pasteuriser:
                     utc_time=event['utc_time'],
                     milk_L=event['pasteurized_total_L'],
                     temperature_C=event['temperature_C'],
-                    extra={
-                        'start_tank_L': event['start_tank_L'],
-                        'balance_tank_L': event['balance_tank_L'],
-                        'burnt_total_L': event['burnt_total_L'],
-                        'status': status,
-                    },
+                    extra=extra,
                 )
             )
         
-        print(f"{self.format_time():<7} "
-              f"{self.start_tank:>7.2f}        "
-              f"{self.balance_tank:>7.2f}        "
-              f"{self.pasteurized_total:>7.2f}        "
-              f"{self.burnt_total:>7.2f}        "
-              f"{self.temperature:>5.2f}      "
-              f"{status}")
+        if self.verbose:
+            print(f"{self.format_time():<7} "
+                  f"{self.start_tank:>7.2f}        "
+                  f"{self.balance_tank:>7.2f}        "
+                  f"{self.pasteurized_total:>7.2f}        "
+                  f"{self.burnt_total:>7.2f}        "
+                  f"{self.temperature:>5.2f}      "
+                  f"{status}")
 
     def process(self):
+        if self.fast_forward:
+            yield from self.fast_forward_process()
+            return
+
         # --- Startup phase ---
         for _ in range(STARTUP_DURATION):
             self.log_status("Startup / Heating")
@@ -161,24 +186,136 @@ class Pasteuriser:
                     self.balance_tank -= milk_this_step
 
             # Random temp fluctuation
-            self.temperature += random.uniform(*TEMP_RANGE_VARIATION)
+            self.temperature += self.random.uniform(*TEMP_RANGE_VARIATION)
 
             # Log and wait
             self.log_status(status)
             yield self.env.timeout(1)
 
-    def save_observations_to_json(self, filename='Backend/data/pasteuriser.json'):
-        folder = os.path.dirname(filename)
-        if folder:
-            os.makedirs(folder, exist_ok=True)
+    def regime(self, temperature):
+        if temperature >= TEMP_BURN_THRESHOLD:
+            return "burn"
+        if temperature < TEMP_OPTIMAL_MIN:
+            return "cold"
+        if temperature <= TEMP_OPTIMAL_MAX:
+            return "pasteurize"
+        return "hot"
+
+    @staticmethod
+    def in_regime(regime, temperatures):
+        """Vectorized regime() test for an array of temperatures."""
+        if regime == "cold":
+            return temperatures < TEMP_OPTIMAL_MIN
+        if regime == "pasteurize":
+            return (temperatures >= TEMP_OPTIMAL_MIN) & (temperatures <= TEMP_OPTIMAL_MAX)
+        return (temperatures > TEMP_OPTIMAL_MAX) & (temperatures < TEMP_BURN_THRESHOLD)
+
+    def peek_increments(self, count):
+        """Next `count` pre-drawn temperature increments, drawing more blocks as needed."""
+        available = len(self._increments) - self._next_increment
+        if available < count:
+            blocks = -(-(count - available) // INCREMENT_BLOCK)
+            fresh = self.generator.uniform(*TEMP_RANGE_VARIATION, size=blocks * INCREMENT_BLOCK)
+            self._increments = np.concatenate((self._increments[self._next_increment:], fresh))
+            self._next_increment = 0
+        return self._increments[self._next_increment:self._next_increment + count]
+
+    def segment_temperatures(self, regime):
+        """Temperature after each step for as long as the current regime lasts.
+
+        Sums run sequentially (np.add.accumulate), so every value matches the
+        step-by-step loop; "cold" steps add the reheating rise before the
+        random increment, as the loop does.
+        """
+        window = 64
+        while True:
+            increments = self.peek_increments(window)
+            if regime == "cold":
+                steps = np.empty(2 * window)
+                steps[0::2] = TEMP_RISE_WHEN_COLD
+                steps[1::2] = increments
+                temperatures = np.add.accumulate(np.concatenate(([self.temperature], steps)))[2::2]
+            else:
+                temperatures = np.add.accumulate(np.concatenate(([self.temperature], increments)))[1:]
+            if regime == "burn":
+                return temperatures[:1]
+            # Step k+1 stays in the regime while the temperature after step k does
+            switches = np.flatnonzero(~self.in_regime(regime, temperatures[:-1]))
+            if switches.size:
+                return temperatures[:switches[0] + 1]
+            window *= 2
+
+    def fast_forward_process(self):
+        """Advance whole regime segments at once: one timeout, one milk packet and one summary event each."""
+        # --- Startup phase ---
+        yield self.env.timeout(STARTUP_DURATION)
+        self.log_status("Startup / Heating", segment_steps=STARTUP_DURATION)
+
+        while self.start_tank > 0 or self.balance_tank > 0:
+            if self.cooling_overheat:
+                # Deterministic cooldown back to the optimal temperature
+                steps = 0
+                while self.cooling_overheat:
+                    self.temperature -= TEMP_DROP_PER_STEP
+                    steps += 1
+                    if self.temperature <= self.temp_optimal:
+                        self.cooling_overheat = False
+                yield self.env.timeout(steps)
+                self.log_status("Cooled - Resuming", segment_steps=steps)
+                continue
+
+            regime = self.regime(self.temperature)
+            temperatures = self.segment_temperatures(regime)
+            milk_source = "Start Tank" if self.start_tank > 0 else "Balance Tank"
+
+            # Move the milk step by step; a segment also ends when the source tank runs dry
+            milk_total = 0.0
+            steps = 0
+            for _ in range(len(temperatures)):
+                if self.start_tank > 0:
+                    source = "Start Tank"
+                elif self.balance_tank > 0:
+                    source = "Balance Tank"
+                else:
+                    break
+                if source != milk_source:
+                    break
+                milk_this_step = min(self.flow_rate, self.start_tank if source == "Start Tank" else self.balance_tank)
+
+                if regime == "burn":
+                    self.burnt_total += milk_this_step
+                    self.cooling_overheat = True
+                elif regime == "pasteurize":
+                    self.pasteurized_total += milk_this_step
+                else:
+                    self.balance_tank += milk_this_step
+                if source == "Start Tank":
+                    self.start_tank -= milk_this_step
+                else:
+                    self.balance_tank -= milk_this_step
+                milk_total += milk_this_step
+                steps += 1
 
-        with open(filename, 'w') as f:
-            json.dump(self.observer, f, indent=4)
+            self.temperature = float(temperatures[steps - 1])
+            self._next_increment += steps
+
+            yield self.env.timeout(steps)
+            if regime == "burn":
+                status = f"Burnt milk! {milk_total:.2f}L"
+            elif regime == "cold":
+                status = f"Too cold - recirculating {milk_total:.2f}L and reheating"
+            elif regime == "pasteurize":
+                self.output_store.put(milk_total)
+                status = f"Pasteurized from {milk_source}"
+            else:
+                status = f"Too hot - recirculating {milk_total:.2f}L"
+            self.log_status(status, segment_steps=steps)
 
-        print(f"Observations saved to {filename}")
+    def save_observations_to_json(self, filename='Backend/data/pasteuriser.json', compact=False, compression=None):
+        return save_observations(self.observer, filename, compact=compact, compression=compression, verbose=self.verbose)
 
     @staticmethod
-    def run(env, input_store, output_store, temp_optimal, waste_store, flow_rate=None, clock=None, logger=None):
-        machine = Pasteuriser(env, input_store, output_store, temp_optimal, waste_store, flow_rate, clock, logger)
+    def run(env, input_store, output_store, temp_optimal, waste_store, flow_rate=None, clock=None, logger=None, observer_config=None, verbose=True, fast_forward=False, rng=None):
+        machine = Pasteuriser(env, input_store, output_store, temp_optimal, waste_store, flow_rate, clock, logger, observer_config=observer_config, verbose=verbose, fast_forward=fast_forward, rng=rng)
         env.process(machine.process())
         return machine
@@ -1,16 +1,18 @@
 import simpy
 import random
+import numpy as np
 import json
-import os
 from helpers.ndjson_logger import build_standard_event
 from datetime import datetime, timezone
+from helpers.observer_store import ObserverStore
+from helpers.observation_export import save_observations
 
 env = simpy.Environment()
 input = simpy.Store(env)
 output = simpy.Store(env)
 
 class CheeseVat:
-    def __init__(self, input_store, output_store, optimal_ph, milk_flow_rate, anomaly_probability, clock=None, logger=None):
+    def __init__(self, input_store, output_store, optimal_ph, milk_flow_rate, anomaly_probability, clock=None, logger=None, observer_config=None, verbose=True, phase_kernels=False, rng=None):
         self.input = input_store
         self.output = output_store
         self.clock = clock() if clock else None
@@ -35,8 +37,16 @@ class CheeseVat:
         }
         self.MAX_STEPS_PER_PHASE = 1000
         
-        self.observer = []
+        self.observer = ObserverStore.from_config(observer_config, name='cheese_vat')
         self.logger = logger
+        self.verbose = verbose
+        self.random = rng or random
+
+        # Phase-kernel mode: each phase (filling, heating ramps, rennet,
+        # coagulation, cutting, stirring, whey release) is computed in one pass,
+        # time advances once per phase and the phase's rows are logged together
+        self.phase_kernels = phase_kernels
+        self._phase_rows = []
         
     def format_sim_time(self, sim_time):
         """Convert simulation time to HH:MM:SS format."""
@@ -47,11 +57,15 @@ class CheeseVat:
         return f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
 
     def log(self, env, phase, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies):
+        self.record(*self.build_events(env.now, phase, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies))
+
+    def build_events(self, now, phase, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies):
+        """Observer record and standard logger event for one step at sim time `now`."""
         utc_time = self.clock.now() if self.clock else datetime.now(timezone.utc).isoformat()
         
         # CheeseVat also uses 15-second steps; normalize to whole minutes (integer)
         event = {
-            'sim_time_min': int(env.now // (60 // self.STEP_DURATION_SEC)),
+            'sim_time_min': int(now // (60 // self.STEP_DURATION_SEC)),
             'utc_time': utc_time,
             'phase': phase,
             'milk_L': round(milk_amount, 2),
@@ -62,21 +76,199 @@ class CheeseVat:
             'anomalies': ', '.join(anomalies) if anomalies else 'None',
             'machine': 'cheese_vat'
         }
-        self.observer.append(event)
+        standard = None
         if self.logger:
-            self.logger.log_event(
-                build_standard_event(
-                    machine='cheese_vat',
-                    sim_time_min=event['sim_time_min'],
-                    utc_time=event['utc_time'],
-                    milk_L=event['milk_L'],
-                    whey_L=event['whey_L'],
-                    curd_L=event['curd_L'],
-                    temperature_C=event['temperature_C'],
-                    pH=event['pH'],
-                    extra={'phase': phase, 'anomalies': event['anomalies']},
-                )
+            standard = build_standard_event(
+                machine='cheese_vat',
+                sim_time_min=event['sim_time_min'],
+                utc_time=event['utc_time'],
+                milk_L=event['milk_L'],
+                whey_L=event['whey_L'],
+                curd_L=event['curd_L'],
+                temperature_C=event['temperature_C'],
+                pH=event['pH'],
+                extra={'phase': phase, 'anomalies': event['anomalies']},
             )
+        return event, standard
+
+    def record(self, event, standard):
+        self.observer.append(event)
+        if standard:
+            self.logger.log_event(standard)
+
+    def print_row(self, now, phase, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies=None):
+        line = f"{self.format_sim_time(now):<15} {phase:<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f}"
+        if anomalies is not None:
+            line += f" {', '.join(anomalies):<100}"
+        print(line)
+
+    # --- Phase kernels ---
+
+    def play_phase(self, env, rows, steps=None, offset=0):
+        """Advance time over a precomputed phase in one timeout, then log its rows in bulk.
+
+        Each row is (phase, milk, whey, curd, temperature, pH, anomalies) and
+        row i is the step at env.now + offset + i. `steps` is the phase length
+        in 15-second steps (one per row by default).
+        """
+        start = env.now + offset
+        steps = len(rows) if steps is None else steps
+        self._phase_rows = [(start + i, row) for i, row in enumerate(rows)]
+        if steps:
+            yield env.timeout(steps)
+        self.flush_phase()
+
+    def flush_phase(self, until=None):
+        rows = self._phase_rows
+        if until is not None:
+            rows = [(now, row) for now, row in rows if now < until]
+        self._phase_rows = []
+        events = []
+        for now, row in rows:
+            if self.verbose:
+                self.print_row(now, *row)
+            event, standard = self.build_events(now, *row[:6], row[6] or [])
+            self.observer.append(event)
+            if standard:
+                events.append(standard)
+        if events:
+            self.logger.log_events(events)
+
+    def finalize(self, env):
+        """Log the part of an unfinished phase that lies before the end of the run."""
+        self.flush_phase(until=env.now)
+
+    def filling_levels(self, total_milk):
+        """Milk level after each filling step, accumulated as the step-wise loop does."""
+        per_step = self.MILK_PER_STEP
+        if total_milk <= 0:
+            return []
+        # Every step but the last adds MILK_PER_STEP; cumsum adds left to right like the loop
+        levels = np.cumsum(np.full(int(total_milk // per_step) + 2, per_step))
+        short = np.flatnonzero(total_milk - levels < per_step)
+        levels = levels[:short[0] + 1].tolist()
+        # The last step tops the vat up to total_milk
+        while levels[-1] < total_milk:
+            levels.append(levels[-1] + (total_milk - levels[-1]))
+        return levels
+
+    @staticmethod
+    def temperature_change(temperature, target, step):
+        if temperature < target:
+            return min(step, target - temperature)
+        return max(-step, target - temperature)
+
+    def ramp_temperatures(self, temperature, pending, target, step):
+        """Temperatures a heating loop logs and the change it leaves pending.
+
+        The loop runs while the temperature before the pending change is more
+        than 0.1 from target, moving by `step` until the last move is capped.
+        A ramp that never settles (a start above target, which the step-wise
+        loop heats further away) returns None, so the caller falls back to
+        the step-wise loop.
+        """
+        if abs(temperature - target) <= 0.1:
+            return [], pending
+        first = temperature + pending
+        values = [first]
+        if step > 0:
+            ramp = np.cumsum(np.r_[first, np.full(int(max(target - first, 0) // step) + 1, step)])
+            # Full steps while they fit below target; the loop stops once within 0.1
+            full = (ramp < target) & (target - ramp >= step)
+            end = np.flatnonzero((np.abs(ramp - target) <= 0.1) | ~full)
+            values = ramp[:end[0] + 1 if end.size else None].tolist()
+        while abs(values[-1] - target) > 0.1:
+            if len(values) > self.MAX_STEPS_PER_PHASE:
+                return None
+            values.append(values[-1] + self.temperature_change(values[-1], target, step))
+        return values, self.temperature_change(values[-1], target, step)
+
+    def coagulation_states(self, milk, curd, whey, milk_per_step, curd_factor):
+        """(milk, curd, whey) logged at each coagulation step and the amounts after the last one."""
+        def convert(state):
+            milk_left, curd_now, whey_now = state
+            converted = min(milk_per_step, milk_left) if milk_left > 0 else 0
+            return milk_left - converted, curd_now + converted * curd_factor, whey_now + converted * (1 - curd_factor)
+
+        states = [(milk, curd, whey)]
+        if milk <= 0.1:
+            return [], states[0]
+        if milk_per_step > 0:
+            steps = min(self.MAX_STEPS_PER_PHASE, int(milk // milk_per_step) + 1)
+            milks = np.cumsum(np.r_[milk, np.full(steps, -milk_per_step)])
+            curds = np.cumsum(np.r_[curd, np.full(steps, milk_per_step * curd_factor)])
+            wheys = np.cumsum(np.r_[whey, np.full(steps, milk_per_step * (1 - curd_factor))])
+            # Whole conversions last while at least milk_per_step is left; stop at the first near-empty step
+            end = np.flatnonzero((milks < milk_per_step) | (milks <= 0.1))
+            end = end[0] + 1 if end.size else None
+            states = list(zip(milks[:end].tolist(), curds[:end].tolist(), wheys[:end].tolist()))
+        while states[-1][0] > 0.1 and len(states) <= self.MAX_STEPS_PER_PHASE:
+            states.append(convert(states[-1]))
+        steps = min(len(states), self.MAX_STEPS_PER_PHASE)
+        if steps == len(states):
+            states.append(convert(states[-1]))
+        return states[:steps], states[steps]
+
+    # The release phases cap each step by the amounts left, so their kernels
+    # replay the step-wise arithmetic in plain Python; what they save is the
+    # timeout and log call per step
+
+    def cutting_states(self, curd, whey, whey_release_rate):
+        """(curd, whey) logged at each cutting step and the amounts after the last one."""
+        target = curd * 0.2
+        initial_curd = curd
+        released = 0
+        pending = 0
+        states = []
+        while released < target and len(states) < self.MAX_STEPS_PER_PHASE:
+            curd -= pending
+            whey += pending
+            pending = min(initial_curd * whey_release_rate, curd * 0.01, target - released)
+            released += pending
+            states.append((curd, whey))
+        return states, (curd - pending, whey + pending)
+
+    def stirring_states(self, curd, whey, whey_factor, curd_loss_factor):
+        """(curd, whey) logged at each stirring step and the amounts after the last one."""
+        target_whey = curd * whey_factor
+        target_loss = curd * curd_loss_factor
+        initial_curd = curd
+        released = 0
+        lost = 0
+        curd_pending = whey_pending = 0
+        states = []
+        while (released < target_whey or lost < target_loss) and len(states) < self.MAX_STEPS_PER_PHASE:
+            curd -= curd_pending
+            whey += whey_pending
+            curd_pending = whey_pending = 0
+            if curd > 0:
+                whey_released = min(initial_curd * self.BASE_WHEY_RELEASE_RATE, curd * 0.02, target_whey - released)
+                if whey_released > 0:
+                    curd_pending = whey_pending = whey_released
+                    released += whey_released
+                if curd_loss_factor > 0:
+                    curd_lost = min(initial_curd * curd_loss_factor / 100, curd * 0.01, target_loss - lost)
+                    if curd_lost > 0:
+                        curd_pending += curd_lost
+                        lost += curd_lost
+            states.append((curd, whey))
+        return states, (curd - curd_pending, whey + whey_pending)
+
+    def draining_states(self, curd, whey, whey_drain_rate, curd_loss_factor):
+        """(curd, whey) logged at each whey release step and the amounts after the last one."""
+        curd_pending = whey_pending = 0
+        states = []
+        while whey > 0.1 and len(states) < self.MAX_STEPS_PER_PHASE:
+            whey -= whey_pending
+            curd -= curd_pending
+            curd_pending = 0
+            whey_pending = min(whey * whey_drain_rate, whey)
+            if curd > 0 and curd_loss_factor > 0:
+                drain_progress = 1 - (whey / (whey + whey_pending))
+                progress_factor = 4 * drain_progress * (1 - drain_progress)
+                curd_pending = curd * curd_loss_factor * progress_factor * whey_drain_rate
+            states.append((curd, whey))
+        return states, (curd - curd_pending, whey - whey_pending)
 
     def cheese_vat_process(self, env, anomaly_probability):
         """Cheese vat simulation for cheddar production."""
@@ -110,7 +302,7 @@ class CheeseVat:
             
             # Helper function to check for anomalies with weighted selection
             def check_anomaly(stage):
-                if random.random() < (anomaly_probability / 100):
+                if self.random.random() < (anomaly_probability / 100):
                     # Get all possible anomaly types for this stage
                     possible_anomalies = []
                     weights = []
@@ -132,37 +324,49 @@ class CheeseVat:
                         weights = [self.ANOMALY_WEIGHTS["whey_release"], self.ANOMALY_WEIGHTS["whey_release"]]
                     
                     if possible_anomalies:
-                        return random.choices(possible_anomalies, weights=weights, k=1)[0]
+                        return self.random.choices(possible_anomalies, weights=weights, k=1)[0]
                 return None
             
             # Print header with wide column widths
-            print(f"{'Time':<15} {'Phase':<50} {'Milk (L)':<20} {'Whey (L)':<20} {'Curd (L)':<20} {'Temp (°C)':<15} {'pH':<10} {'Anomalies':<100}")
-            print("-" * 250)
+            if self.verbose:
+                print(f"{'Time':<15} {'Phase':<50} {'Milk (L)':<20} {'Whey (L)':<20} {'Curd (L)':<20} {'Temp (°C)':<15} {'pH':<10} {'Anomalies':<100}")
+                print("-" * 250)
             
             # --- Step 1: Fill the vat ---
             # Start with empty vat
-            print(f"{self.format_sim_time(env.now):<15} {'Filling Vat':<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f}")
+            if self.verbose:
+                self.print_row(env.now, 'Filling Vat', milk_amount, whey_amount, curd_amount, temperature, pH)
             self.log(env, 'Filling Vat', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
             
             # Calculate first milk addition
             pending_changes["milk"] = self.MILK_PER_STEP
             
             # Simulate filling - continue until vat is full
-            while milk_amount < self.TOTAL_MILK:
-                # Apply pending changes from previous step
-                milk_amount += pending_changes["milk"]
+            if self.phase_kernels:
+                levels = self.filling_levels(self.TOTAL_MILK)
+                # The step that fills the vat is not logged
+                rows = [('Filling Vat', level, whey_amount, curd_amount, temperature, pH, None) for level in levels[:-1]]
+                yield from self.play_phase(env, rows, steps=len(levels), offset=1)
+                if levels:
+                    milk_amount = levels[-1]
                 pending_changes["milk"] = 0
-                
-                # Calculate next milk addition
-                fill_amount = min(self.MILK_PER_STEP, self.TOTAL_MILK - milk_amount)
-                if fill_amount > 0:
-                    pending_changes["milk"] = fill_amount
-                
-                yield env.timeout(1)  # Each step is 1 unit in simulation time
-                
-                if milk_amount < self.TOTAL_MILK:
-                    print(f"{self.format_sim_time(env.now):<15} {'Filling Vat':<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f}")
-                    self.log(env, 'Filling Vat', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+            else:
+                while milk_amount < self.TOTAL_MILK:
+                    # Apply pending changes from previous step
+                    milk_amount += pending_changes["milk"]
+                    pending_changes["milk"] = 0
+                    
+                    # Calculate next milk addition
+                    fill_amount = min(self.MILK_PER_STEP, self.TOTAL_MILK - milk_amount)
+                    if fill_amount > 0:
+                        pending_changes["milk"] = fill_amount
+                    
+                    yield env.timeout(1)  # Each step is 1 unit in simulation time
+                    
+                    if milk_amount < self.TOTAL_MILK:
+                        if self.verbose:
+                            self.print_row(env.now, 'Filling Vat', milk_amount, whey_amount, curd_amount, temperature, pH)
+                        self.log(env, 'Filling Vat', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
             
             # --- Step 2: Set temperature ---    
             # Temperature anomaly check with improved selection
@@ -170,35 +374,45 @@ class CheeseVat:
             
             # Determine target temperature based on anomaly
             if temp_anomaly == "temperature_low":
-                target_temp = round(random.uniform(28.0, 30.0), 1)
+                target_temp = round(self.random.uniform(28.0, 30.0), 1)
                 anomalies.append(f"Underheated milk ({target_temp}°C)")
                 anomaly_effects["weak_curds"] = True
                 anomaly_effects["high_moisture"] = True
             elif temp_anomaly == "temperature_high":
-                target_temp = round(random.uniform(34.0, 40.0), 1)
+                target_temp = round(self.random.uniform(34.0, 40.0), 1)
                 anomalies.append(f"Overheated milk ({target_temp}°C)")
                 anomaly_effects["weak_curds"] = True
             else:
                 # Normal temperature range
-                target_temp = round(random.uniform(self.TEMP_OPTIMAL_MIN, self.TEMP_OPTIMAL_MAX), 1)
+                target_temp = round(self.random.uniform(self.TEMP_OPTIMAL_MIN, self.TEMP_OPTIMAL_MAX), 1)
             
             # Simulate heating - continue until target temperature is reached
             temp_step = (target_temp - temperature) / 60  # Aim to reach target in ~15 minutes
             
-            while abs(temperature - target_temp) > 0.1:  # Continue until we're very close to target
-                # Apply pending changes from previous step
-                temperature += pending_changes["temp"]
-                pending_changes["temp"] = 0
-                
-                # Calculate next temperature change
-                if temperature < target_temp:
-                    pending_changes["temp"] = min(temp_step, target_temp - temperature)
-                else:
-                    pending_changes["temp"] = max(-temp_step, target_temp - temperature)
-                
-                print(f"{self.format_sim_time(env.now):<15} {'Heating Milk':<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f} {', '.join(anomalies):<100}")
-                self.log(env, 'Heating Milk', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
-                yield env.timeout(1)
+            ramp = self.ramp_temperatures(temperature, pending_changes["temp"], target_temp, temp_step) if self.phase_kernels else None
+            if ramp:
+                temperatures, pending_changes["temp"] = ramp
+                rows = [('Heating Milk', milk_amount, whey_amount, curd_amount, value, pH, anomalies) for value in temperatures]
+                yield from self.play_phase(env, rows)
+                if temperatures:
+                    temperature = temperatures[-1]
+            else:
+                # Step-wise, and the fallback for a ramp that never settles
+                while abs(temperature - target_temp) > 0.1:  # Continue until we're very close to target
+                    # Apply pending changes from previous step
+                    temperature += pending_changes["temp"]
+                    pending_changes["temp"] = 0
+                    
+                    # Calculate next temperature change
+                    if temperature < target_temp:
+                        pending_changes["temp"] = min(temp_step, target_temp - temperature)
+                    else:
+                        pending_changes["temp"] = max(-temp_step, target_temp - temperature)
+                    
+                    if self.verbose:
+                        self.print_row(env.now, 'Heating Milk', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    self.log(env, 'Heating Milk', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    yield env.timeout(1)
             
             # Ensure we hit the exact target
             temperature = round(target_temp, 1)
@@ -215,25 +429,33 @@ class CheeseVat:
                 anomalies.append("Too much rennet added")
                 anomaly_effects["rubbery_curds"] = True
             elif rennet_anomaly == "ph_off":
-                pending_changes["ph"] = round(random.uniform(6.3, 6.8), 2) - pH
+                pending_changes["ph"] = round(self.random.uniform(6.3, 6.8), 2) - pH
                 anomalies.append(f"pH not optimal ({pH + pending_changes['ph']})")
                 anomaly_effects["weak_curds"] = True
             
             # Rennet dosing (fixed time - 2 minutes)
-            for step in range(8):  # 2 minutes = 8 steps
-                # Apply pending changes
+            if self.phase_kernels:
                 pH += pending_changes["ph"]
                 pending_changes["ph"] = 0
+                yield from self.play_phase(env, [('Rennet Dosing', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)] * 8)
+                yield from self.play_phase(env, [('Gentle Stirring (for rennet)', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)] * 20)
+            else:
+                for step in range(8):  # 2 minutes = 8 steps
+                    # Apply pending changes
+                    pH += pending_changes["ph"]
+                    pending_changes["ph"] = 0
+                    
+                    if self.verbose:
+                        self.print_row(env.now, 'Rennet Dosing', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    self.log(env, 'Rennet Dosing', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    yield env.timeout(1)
                 
-                print(f"{self.format_sim_time(env.now):<15} {'Rennet Dosing':<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f} {', '.join(anomalies):<100}")
-                self.log(env, 'Rennet Dosing', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
-                yield env.timeout(1)
-            
-            # Gentle stirring (fixed time - 5 minutes)
-            for step in range(20):  # 5 minutes = 20 steps
-                print(f"{self.format_sim_time(env.now):<15} {'Gentle Stirring (for rennet)':<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f} {', '.join(anomalies):<100}")
-                self.log(env, 'Gentle Stirring (for rennet)', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
-                yield env.timeout(1)
+                # Gentle stirring (fixed time - 5 minutes)
+                for step in range(20):  # 5 minutes = 20 steps
+                    if self.verbose:
+                        self.print_row(env.now, 'Gentle Stirring (for rennet)', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    self.log(env, 'Gentle Stirring (for rennet)', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    yield env.timeout(1)
             
             # --- Step 4: Coagulation ---
             # Calculate conversion rates based on anomalies
@@ -272,39 +494,48 @@ class CheeseVat:
                 coagulation_descriptions = ["Normal coagulation in progress"]
             
             # Simulate coagulation - continue until all milk is converted
-            step_count = 0
-            while milk_amount > 0.1 and step_count < self.MAX_STEPS_PER_PHASE:  # Continue until milk is essentially gone
-                # Apply pending changes
+            if self.phase_kernels:
+                states, (milk_amount, curd_amount, whey_amount) = self.coagulation_states(milk_amount, curd_amount, whey_amount, milk_per_step, curd_factor)
+                rows = [
+                    (f"Coagulation: {coagulation_descriptions[step % len(coagulation_descriptions)]}", milk, whey, curd, temperature, pH, anomalies)
+                    for step, (milk, curd, whey) in enumerate(states)
+                ]
+                yield from self.play_phase(env, rows)
+            else:
+                step_count = 0
+                while milk_amount > 0.1 and step_count < self.MAX_STEPS_PER_PHASE:  # Continue until milk is essentially gone
+                    # Apply pending changes
+                    milk_amount -= pending_changes["milk"]
+                    curd_amount += pending_changes["curd"]
+                    whey_amount += pending_changes["whey"]
+                    pending_changes["milk"] = 0
+                    pending_changes["curd"] = 0
+                    pending_changes["whey"] = 0
+                    
+                    # Cycle through descriptions
+                    description_idx = step_count % len(coagulation_descriptions)
+                    description = f"Coagulation: {coagulation_descriptions[description_idx]}"
+                    
+                    # Calculate next conversion
+                    if milk_amount > 0:
+                        milk_converted = min(milk_per_step, milk_amount)
+                        pending_changes["milk"] = milk_converted
+                        pending_changes["curd"] = milk_converted * curd_factor
+                        pending_changes["whey"] = milk_converted * (1 - curd_factor)
+                    
+                    if self.verbose:
+                        self.print_row(env.now, description, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    self.log(env, description, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    yield env.timeout(1)
+                    step_count += 1
+                
+                # Apply final pending changes
                 milk_amount -= pending_changes["milk"]
                 curd_amount += pending_changes["curd"]
                 whey_amount += pending_changes["whey"]
                 pending_changes["milk"] = 0
                 pending_changes["curd"] = 0
                 pending_changes["whey"] = 0
-                
-                # Cycle through descriptions
-                description_idx = step_count % len(coagulation_descriptions)
-                description = f"Coagulation: {coagulation_descriptions[description_idx]}"
-                
-                # Calculate next conversion
-                if milk_amount > 0:
-                    milk_converted = min(milk_per_step, milk_amount)
-                    pending_changes["milk"] = milk_converted
-                    pending_changes["curd"] = milk_converted * curd_factor
-                    pending_changes["whey"] = milk_converted * (1 - curd_factor)
-                
-                print(f"{self.format_sim_time(env.now):<15} {description:<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f} {', '.join(anomalies):<100}")
-                self.log(env, description, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
-                yield env.timeout(1)
-                step_count += 1
-            
-            # Apply final pending changes
-            milk_amount -= pending_changes["milk"]
-            curd_amount += pending_changes["curd"]
-            whey_amount += pending_changes["whey"]
-            pending_changes["milk"] = 0
-            pending_changes["curd"] = 0
-            pending_changes["whey"] = 0
             
             # Ensure milk is completely gone
             if milk_amount < 0.1:
@@ -332,44 +563,49 @@ class CheeseVat:
                 cutting_desc = "Cutting"
                 whey_release_rate = self.BASE_WHEY_RELEASE_RATE
             
-            # Target to release 20% of curd as whey during cutting
-            target_whey_release = curd_amount * 0.2
-            initial_curd = curd_amount
-            released_whey = 0
+            # Determine description based on conditions
+            if anomaly_effects["uneven_curds"]:
+                desc = f"{cutting_desc} (uneven particle sizes)"
+            elif anomaly_effects["weak_curds"] or anomaly_effects["small_curds"]:
+                desc = f"{cutting_desc} (challenging due to curd properties)"
+            else:
+                desc = cutting_desc
             
-            # Simulate cutting - continue until target whey release is achieved
-            step_count = 0
-            while released_whey < target_whey_release and step_count < self.MAX_STEPS_PER_PHASE:
-                # Apply pending changes
+            if self.phase_kernels:
+                states, (curd_amount, whey_amount) = self.cutting_states(curd_amount, whey_amount, whey_release_rate)
+                yield from self.play_phase(env, [(desc, milk_amount, whey, curd, temperature, pH, anomalies) for curd, whey in states])
+            else:
+                # Target to release 20% of curd as whey during cutting
+                target_whey_release = curd_amount * 0.2
+                initial_curd = curd_amount
+                released_whey = 0
+                
+                # Simulate cutting - continue until target whey release is achieved
+                step_count = 0
+                while released_whey < target_whey_release and step_count < self.MAX_STEPS_PER_PHASE:
+                    # Apply pending changes
+                    curd_amount -= pending_changes["curd"]
+                    whey_amount += pending_changes["whey"]
+                    pending_changes["curd"] = 0
+                    pending_changes["whey"] = 0
+                    
+                    # Calculate next whey release
+                    whey_released = min(initial_curd * whey_release_rate, curd_amount * 0.01, target_whey_release - released_whey)
+                    pending_changes["curd"] = whey_released
+                    pending_changes["whey"] = whey_released
+                    released_whey += whey_released
+                    
+                    if self.verbose:
+                        self.print_row(env.now, desc, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    self.log(env, desc, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    yield env.timeout(1)
+                    step_count += 1
+                
+                # Apply final pending changes
                 curd_amount -= pending_changes["curd"]
                 whey_amount += pending_changes["whey"]
                 pending_changes["curd"] = 0
                 pending_changes["whey"] = 0
-                
-                # Calculate next whey release
-                whey_released = min(initial_curd * whey_release_rate, curd_amount * 0.01, target_whey_release - released_whey)
-                pending_changes["curd"] = whey_released
-                pending_changes["whey"] = whey_released
-                released_whey += whey_released
-                
-                # Determine description based on conditions
-                if anomaly_effects["uneven_curds"]:
-                    desc = f"{cutting_desc} (uneven particle sizes)"
-                elif anomaly_effects["weak_curds"] or anomaly_effects["small_curds"]:
-                    desc = f"{cutting_desc} (challenging due to curd properties)"
-                else:
-                    desc = cutting_desc
-                
-                print(f"{self.format_sim_time(env.now):<15} {desc:<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f} {', '.join(anomalies):<100}")
-                self.log(env, desc, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
-                yield env.timeout(1)
-                step_count += 1
-            
-            # Apply final pending changes
-            curd_amount -= pending_changes["curd"]
-            whey_amount += pending_changes["whey"]
-            pending_changes["curd"] = 0
-            pending_changes["whey"] = 0
             
             # --- Step 6: Stirring and cooking ---
             # Check for stirring anomaly with improved selection
@@ -401,81 +637,97 @@ class CheeseVat:
             temp_step = (self.TEMP_COOKING - temperature) / 60  # Aim to reach target in ~15 minutes
             
             # Continue until target temperature is reached
-            while abs(temperature - self.TEMP_COOKING) > 0.1:
-                # Apply pending changes
-                temperature += pending_changes["temp"]
-                curd_amount -= pending_changes["curd"]
-                whey_amount += pending_changes["whey"]
-                pending_changes["temp"] = 0
-                pending_changes["curd"] = 0
-                pending_changes["whey"] = 0
-                
-                # Calculate next temperature change
-                if temperature < self.TEMP_COOKING:
-                    pending_changes["temp"] = min(temp_step, self.TEMP_COOKING - temperature)
-                else:
-                    pending_changes["temp"] = max(-temp_step, self.TEMP_COOKING - temperature)
-                
-                print(f"{self.format_sim_time(env.now):<15} {'Cooking (heating temperature)':<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f} {', '.join(anomalies):<100}")
-                self.log(env, 'Cooking (heating temperature)', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
-                yield env.timeout(1)
+            ramp = self.ramp_temperatures(temperature, pending_changes["temp"], self.TEMP_COOKING, temp_step) if self.phase_kernels else None
+            if ramp:
+                # Curd and whey changes from cutting are already applied, so only the temperature moves
+                temperatures, pending_changes["temp"] = ramp
+                rows = [('Cooking (heating temperature)', milk_amount, whey_amount, curd_amount, value, pH, anomalies) for value in temperatures]
+                yield from self.play_phase(env, rows)
+                if temperatures:
+                    temperature = temperatures[-1]
+            else:
+                # Step-wise, and the fallback for a ramp that never settles
+                while abs(temperature - self.TEMP_COOKING) > 0.1:
+                    # Apply pending changes
+                    temperature += pending_changes["temp"]
+                    curd_amount -= pending_changes["curd"]
+                    whey_amount += pending_changes["whey"]
+                    pending_changes["temp"] = 0
+                    pending_changes["curd"] = 0
+                    pending_changes["whey"] = 0
+                    
+                    # Calculate next temperature change
+                    if temperature < self.TEMP_COOKING:
+                        pending_changes["temp"] = min(temp_step, self.TEMP_COOKING - temperature)
+                    else:
+                        pending_changes["temp"] = max(-temp_step, self.TEMP_COOKING - temperature)
+                    
+                    if self.verbose:
+                        self.print_row(env.now, 'Cooking (heating temperature)', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    self.log(env, 'Cooking (heating temperature)', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    yield env.timeout(1)
             
             # Ensure we hit the exact target
             temperature = self.TEMP_COOKING
             
             # Second part: Stirring at cooking temperature
-            # Target to release specified percentage of curd as whey during stirring
-            target_whey_release = curd_amount * whey_factor
-            target_curd_loss = curd_amount * curd_loss_factor
-            initial_curd = curd_amount
-            released_whey = 0
-            lost_curd = 0
-            
-            # Simulate stirring - continue until target whey release is achieved
-            step_count = 0
-            while (released_whey < target_whey_release or lost_curd < target_curd_loss) and step_count < self.MAX_STEPS_PER_PHASE:
-                # Apply pending changes
+            # Description based on conditions
+            if stirring_anomaly == "stirring_excessive":
+                desc = "Stirring and Cooking (excessive shear force)"
+            elif stirring_anomaly == "stirring_uneven":
+                desc = "Stirring and Cooking (uneven heating)"
+            elif anomaly_effects["weak_curds"] or anomaly_effects["small_curds"]:
+                desc = "Stirring and Cooking (curd breaking apart)"
+            else:
+                desc = "Stirring and Cooking"
+            
+            if self.phase_kernels:
+                states, (curd_amount, whey_amount) = self.stirring_states(curd_amount, whey_amount, whey_factor, curd_loss_factor)
+                yield from self.play_phase(env, [(desc, milk_amount, whey, curd, temperature, pH, anomalies) for curd, whey in states])
+            else:
+                # Target to release specified percentage of curd as whey during stirring
+                target_whey_release = curd_amount * whey_factor
+                target_curd_loss = curd_amount * curd_loss_factor
+                initial_curd = curd_amount
+                released_whey = 0
+                lost_curd = 0
+                
+                # Simulate stirring - continue until target whey release is achieved
+                step_count = 0
+                while (released_whey < target_whey_release or lost_curd < target_curd_loss) and step_count < self.MAX_STEPS_PER_PHASE:
+                    # Apply pending changes
+                    curd_amount -= pending_changes["curd"]
+                    whey_amount += pending_changes["whey"]
+                    pending_changes["curd"] = 0
+                    pending_changes["whey"] = 0
+                    
+                    # Calculate next whey release and curd loss
+                    if curd_amount > 0:
+                        # Whey release
+                        whey_released = min(initial_curd * self.BASE_WHEY_RELEASE_RATE, curd_amount * 0.02, target_whey_release - released_whey)
+                        if whey_released > 0:
+                            pending_changes["curd"] = whey_released
+                            pending_changes["whey"] = whey_released
+                            released_whey += whey_released
+                        
+                        # Curd loss
+                        if curd_loss_factor > 0:
+                            curd_lost = min(initial_curd * curd_loss_factor / 100, curd_amount * 0.01, target_curd_loss - lost_curd)
+                            if curd_lost > 0:
+                                pending_changes["curd"] += curd_lost
+                                lost_curd += curd_lost
+                    
+                    if self.verbose:
+                        self.print_row(env.now, desc, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    self.log(env, desc, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    yield env.timeout(1)
+                    step_count += 1
+                
+                # Apply final pending changes
                 curd_amount -= pending_changes["curd"]
                 whey_amount += pending_changes["whey"]
                 pending_changes["curd"] = 0
                 pending_changes["whey"] = 0
-                
-                # Calculate next whey release and curd loss
-                if curd_amount > 0:
-                    # Whey release
-                    whey_released = min(initial_curd * self.BASE_WHEY_RELEASE_RATE, curd_amount * 0.02, target_whey_release - released_whey)
-                    if whey_released > 0:
-                        pending_changes["curd"] = whey_released
-                        pending_changes["whey"] = whey_released
-                        released_whey += whey_released
-                    
-                    # Curd loss
-                    if curd_loss_factor > 0:
-                        curd_lost = min(initial_curd * curd_loss_factor / 100, curd_amount * 0.01, target_curd_loss - lost_curd)
-                        if curd_lost > 0:
-                            pending_changes["curd"] += curd_lost
-                            lost_curd += curd_lost
-                
-                # Description based on conditions
-                if stirring_anomaly == "stirring_excessive":
-                    desc = "Stirring and Cooking (excessive shear force)"
-                elif stirring_anomaly == "stirring_uneven":
-                    desc = "Stirring and Cooking (uneven heating)"
-                elif anomaly_effects["weak_curds"] or anomaly_effects["small_curds"]:
-                    desc = "Stirring and Cooking (curd breaking apart)"
-                else:
-                    desc = "Stirring and Cooking"
-                
-                print(f"{self.format_sim_time(env.now):<15} {desc:<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f} {', '.join(anomalies):<100}")
-                self.log(env, desc, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
-                yield env.timeout(1)
-                step_count += 1
-            
-            # Apply final pending changes
-            curd_amount -= pending_changes["curd"]
-            whey_amount += pending_changes["whey"]
-            pending_changes["curd"] = 0
-            pending_changes["whey"] = 0
             
             # --- Step 7: Whey release ---
             # Check for whey release anomaly with improved selection
@@ -509,91 +761,93 @@ class CheeseVat:
             # Calculate drain rate
             whey_drain_rate = self.BASE_WHEY_DRAIN_RATE * drain_factor
             
-            # Simulate whey release - continue until all whey is drained
-            step_count = 0
-            while whey_amount > 0.1 and step_count < self.MAX_STEPS_PER_PHASE:
-                # Apply pending changes
+            # Description based on conditions
+            if whey_anomaly == "drain_clogged":
+                desc = "Whey Release (slow due to clogged valve)"
+            elif whey_anomaly == "drain_too_fast":
+                if curd_loss_factor > 0.05:
+                    desc = "Whey Release (too fast, significant curd loss)"
+                else:
+                    desc = "Whey Release (too fast, some curd loss)"
+            elif anomaly_effects["small_curds"] or anomaly_effects["weak_curds"]:
+                desc = "Whey Release (curd particles passing through)"
+            else:
+                desc = "Whey Release"
+            
+            if self.phase_kernels:
+                states, (curd_amount, whey_amount) = self.draining_states(curd_amount, whey_amount, whey_drain_rate, curd_loss_factor)
+                yield from self.play_phase(env, [(desc, milk_amount, whey, curd, temperature, pH, anomalies) for curd, whey in states])
+            else:
+                # Simulate whey release - continue until all whey is drained
+                step_count = 0
+                while whey_amount > 0.1 and step_count < self.MAX_STEPS_PER_PHASE:
+                    # Apply pending changes
+                    whey_amount -= pending_changes["whey"]
+                    curd_amount -= pending_changes["curd"]
+                    pending_changes["whey"] = 0
+                    pending_changes["curd"] = 0
+                    
+                    # Calculate next whey drain
+                    whey_to_drain = min(whey_amount * whey_drain_rate, whey_amount)
+                    pending_changes["whey"] = whey_to_drain
+                    
+                    # Curd loss calculation - more pronounced as draining progresses
+                    if curd_amount > 0 and curd_loss_factor > 0:
+                        # Progressive loss - more pronounced in middle of draining
+                        drain_progress = 1 - (whey_amount / (whey_amount + pending_changes["whey"]))
+                        # Bell curve effect - peak loss in middle of draining
+                        progress_factor = 4 * drain_progress * (1 - drain_progress)
+                        curd_loss = curd_amount * curd_loss_factor * progress_factor * whey_drain_rate
+                        pending_changes["curd"] = curd_loss
+                    
+                    if self.verbose:
+                        self.print_row(env.now, desc, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    self.log(env, desc, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
+                    yield env.timeout(1)
+                    step_count += 1
+                
+                # Apply final pending changes
                 whey_amount -= pending_changes["whey"]
                 curd_amount -= pending_changes["curd"]
                 pending_changes["whey"] = 0
                 pending_changes["curd"] = 0
-                
-                # Calculate next whey drain
-                whey_to_drain = min(whey_amount * whey_drain_rate, whey_amount)
-                pending_changes["whey"] = whey_to_drain
-                
-                # Curd loss calculation - more pronounced as draining progresses
-                if curd_amount > 0 and curd_loss_factor > 0:
-                    # Progressive loss - more pronounced in middle of draining
-                    drain_progress = 1 - (whey_amount / (whey_amount + pending_changes["whey"]))
-                    # Bell curve effect - peak loss in middle of draining
-                    progress_factor = 4 * drain_progress * (1 - drain_progress)
-                    curd_loss = curd_amount * curd_loss_factor * progress_factor * whey_drain_rate
-                    pending_changes["curd"] = curd_loss
-                
-                # Description based on conditions
-                if whey_anomaly == "drain_clogged":
-                    desc = "Whey Release (slow due to clogged valve)"
-                elif whey_anomaly == "drain_too_fast":
-                    if curd_loss_factor > 0.05:
-                        desc = "Whey Release (too fast, significant curd loss)"
-                    else:
-                        desc = "Whey Release (too fast, some curd loss)"
-                elif anomaly_effects["small_curds"] or anomaly_effects["weak_curds"]:
-                    desc = "Whey Release (curd particles passing through)"
-                else:
-                    desc = "Whey Release"
-                
-                print(f"{self.format_sim_time(env.now):<15} {desc:<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f} {', '.join(anomalies):<100}")
-                self.log(env, desc, milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
-                yield env.timeout(1)
-                step_count += 1
-            
-            # Apply final pending changes
-            whey_amount -= pending_changes["whey"]
-            curd_amount -= pending_changes["curd"]
-            pending_changes["whey"] = 0
-            pending_changes["curd"] = 0
             
             # Ensure whey is completely gone
             if whey_amount < 0.1:
                 whey_amount = 0
             
             # --- Step 8: Curd storage ---
-            print(f"{self.format_sim_time(env.now):<15} {'Curd Stored for Processing':<50} {milk_amount:<20.2f} {whey_amount:<20.2f} {curd_amount:<20.2f} {temperature:<15.1f} {pH:<10.2f} {', '.join(anomalies):<100}")
+            if self.verbose:
+                self.print_row(env.now, 'Curd Stored for Processing', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
             self.log(env, 'Curd Stored for Processing', milk_amount, whey_amount, curd_amount, temperature, pH, anomalies)
             
             # --- Final Report ---
-            print("\n" + "=" * 150)
-            print("SIMULATION COMPLETE".center(150))
-            print("=" * 150)
-            print(f"Total milk processed: {self.TOTAL_MILK:.2f}L")
-            print(f"Final curd amount: {curd_amount:.2f}L ({curd_amount/self.TOTAL_MILK*100:.1f}%)")
-            print(f"Final whey amount: {whey_amount:.2f}L ({whey_amount/self.TOTAL_MILK*100:.1f}%)")
-            print(f"Remaining milk: {milk_amount:.2f}L ({milk_amount/self.TOTAL_MILK*100:.1f}%)")
+            if self.verbose:
+                print("\n" + "=" * 150)
+                print("SIMULATION COMPLETE".center(150))
+                print("=" * 150)
+                print(f"Total milk processed: {self.TOTAL_MILK:.2f}L")
+                print(f"Final curd amount: {curd_amount:.2f}L ({curd_amount/self.TOTAL_MILK*100:.1f}%)")
+                print(f"Final whey amount: {whey_amount:.2f}L ({whey_amount/self.TOTAL_MILK*100:.1f}%)")
+                print(f"Remaining milk: {milk_amount:.2f}L ({milk_amount/self.TOTAL_MILK*100:.1f}%)")
             
             # Report anomaly effects
             active_effects = [effect.replace("_", " ").title() for effect, active in anomaly_effects.items() if active]
             if active_effects:
-                print(f"Anomaly effects: {', '.join(active_effects)}")
+                if self.verbose:
+                    print(f"Anomaly effects: {', '.join(active_effects)}")
             
-            print(f"Anomalies detected: {', '.join(anomalies)}")
+            if self.verbose:
+                print(f"Anomalies detected: {', '.join(anomalies)}")
             
             yield self.output.put(curd_amount)
 
-    def save_observations_to_json(self, filename='Backend/data/cheese_vat_data.json'):
-        folder = os.path.dirname(filename)
-        if folder:
-            os.makedirs(folder, exist_ok=True)
-
-        with open(filename, 'w') as f:
-            json.dump(self.observer, f, indent=4)
-
-        print(f"Observations saved to {filename}")
+    def save_observations_to_json(self, filename='Backend/data/cheese_vat_data.json', compact=False, compression=None):
+        return save_observations(self.observer, filename, compact=compact, compression=compression, verbose=self.verbose)
 
     @staticmethod
-    def run(env, input_store, output_store, optimal_ph, milk_flow_rate, anomaly_probability=None, clock=None, logger=None):
+    def run(env, input_store, output_store, optimal_ph, milk_flow_rate, anomaly_probability=None, clock=None, logger=None, observer_config=None, verbose=True, phase_kernels=False, rng=None):
         """Create a CheeseVat and start its process in the given environment."""
-        vat = CheeseVat(input_store, output_store, optimal_ph, milk_flow_rate, anomaly_probability or 10, clock, logger)
+        vat = CheeseVat(input_store, output_store, optimal_ph, milk_flow_rate, anomaly_probability or 10, clock, logger, observer_config=observer_config, verbose=verbose, phase_kernels=phase_kernels, rng=rng)
         env.process(vat.cheese_vat_process(env, anomaly_probability or vat.DEFAULT_ANOMALY_PROBABILITY))
         return vat
@@ -2,25 +2,42 @@ import simpy
 import random
 import json
 import os
+import numpy as np
 from datetime import datetime, timezone
 from helpers.ndjson_logger import build_standard_event
+from helpers.observer_store import ObserverStore
+from helpers.observation_export import save_observations
 
 class CurdCutter:
-    def __init__(self, env, input_conveyor, output_conveyor, avg_blade_wear_rate=None, base_auger_speed=None, clock=None, logger=None):
+    CUTTING_MODES = ("per_curd", "chunked")
+
+    def __init__(self, env, input_conveyor, output_conveyor, avg_blade_wear_rate=None, base_auger_speed=None, clock=None, logger=None, observer_config=None, verbose=True, cutting_mode="per_curd", chunk_size=100, rng=None):
         self.env = env
         self.input_conveyor = input_conveyor
         self.output_conveyor = output_conveyor
         self.avg_blade_wear_rate = avg_blade_wear_rate
         self.base_auger_speed = base_auger_speed
         self.clock = clock() if clock else None
-        self.observer = []
+        self.observer = ObserverStore.from_config(observer_config, name='curd_cutter')
         self.batch_logs = []
         self.logger = logger
+        self.verbose = verbose
+        if cutting_mode not in self.CUTTING_MODES:
+            raise ValueError(f"cutting_mode must be one of {self.CUTTING_MODES}, got {cutting_mode!r}")
+        self.cutting_mode = cutting_mode
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size!r}")
+        self.chunk_size = chunk_size
+        self.random = rng or random
+        self.generator = None
+        if cutting_mode == "chunked":
+            self.generator = rng.generator if rng else np.random.default_rng(random.getrandbits(64))
 
     def process_batch(self):
         while True:
             batch = yield self.input_conveyor.get()
-            print(f"[{self.env.now:.2f}] Starting curd cutting for batch {batch['batch_id']}")
+            if self.verbose:
+                print(f"[{self.env.now:.2f}] Starting curd cutting for batch {batch['batch_id']}")
 
             start_time = self.env.now
             curds = []
@@ -31,11 +48,15 @@ class CurdCutter:
             total_whey = 0
             anomalies_handled = []
 
+            if self.cutting_mode == "chunked":
+                total_curd, total_whey = yield from self.cut_chunks(batch, total_mass, num_curds)
+                num_curds = 0
+
             for i in range(num_curds):
                 yield self.env.timeout(0.1)  # small delay per curd
 
                 blade_sharpness = max(100 - self.avg_blade_wear_rate * i, 50)
-                auger_speed = self.base_auger_speed + random.uniform(-5, 5)
+                auger_speed = self.base_auger_speed + self.random.uniform(-5, 5)
 
                 curd_mass = total_mass / num_curds * 0.9  # 90% milk to curd
                 whey_mass = total_mass / num_curds * 0.1
@@ -80,9 +101,9 @@ class CurdCutter:
                 'end_time_min': end_time,
                 'total_milk_in_L': total_mass,
                 'curd_yield_L': round(total_curd, 2),
-                'curd_yield_%': round((total_curd / total_mass) * 100, 2),
+                'curd_yield_%': round((total_curd / total_mass) * 100, 2) if total_mass else 0,
                 'whey_yield_L': round(total_whey, 2),
-                'whey_yield_%': round((total_whey / total_mass) * 100, 2),
+                'whey_yield_%': round((total_whey / total_mass) * 100, 2) if total_mass else 0,
                 'avg_temp_C': batch['avg_temperature'],
                 'final_pH': batch['final_pH'],
                 'anomalies_handled': batch['anomalies'],
@@ -106,17 +127,65 @@ class CurdCutter:
                         extra={'curd_yield_percent': batch_summary['curd_yield_%']},
                     )
                 )
-            print(f"[{self.env.now:.2f}] Finished cutting batch {batch['batch_id']}")
+            if self.verbose:
+                print(f"[{self.env.now:.2f}] Finished cutting batch {batch['batch_id']}")
+
+    def cut_chunks(self, batch, total_mass, num_curds):
+        """Cut a batch in chunks of `chunk_size` curds, one aggregated packet per chunk.
+
+        Blade sharpness and auger speed are computed for the whole chunk with
+        NumPy. Each packet carries `curd_count` plus the summed curd and whey
+        mass of its curds, so downstream totals match the per-curd mode.
+        Returns the batch's total curd and whey mass; a batch too small to
+        yield a single curd sends nothing on.
+        """
+        if num_curds == 0:
+            return 0, 0
+        curd_mass = total_mass / num_curds * 0.9  # 90% milk to curd
+        whey_mass = total_mass / num_curds * 0.1
+        total_curd = 0
+        total_whey = 0
+
+        for start in range(0, num_curds, self.chunk_size):
+            count = min(self.chunk_size, num_curds - start)
+            yield self.env.timeout(0.1 * count)  # same delay as cutting the curds one by one
+
+            index = np.arange(start, start + count)
+            blade_sharpness = np.maximum(100 - self.avg_blade_wear_rate * index, 50)
+            auger_speed = self.base_auger_speed + self.generator.uniform(-5, 5, count)
+
+            total_curd += curd_mass * count
+            total_whey += whey_mass * count
+
+            curd_data = {
+                'batch_id': batch['batch_id'],
+                'curd_id': f"{batch['batch_id']}_curd_{start}-{start + count - 1}",
+                'curd_count': count,
+                'blade_sharpness': round(float(blade_sharpness.mean()), 2),
+                'blade_sharpness_min': round(float(blade_sharpness.min()), 2),
+                'auger_speed': round(float(auger_speed.mean()), 2),
+                'auger_speed_min': round(float(auger_speed.min()), 2),
+                'auger_speed_max': round(float(auger_speed.max()), 2),
+                'curd_mass': round(count * round(curd_mass, 3), 3),
+                'whey_mass': round(count * round(whey_mass, 3), 3),
+                'anomaly_response': batch['anomalies']
+            }
 
-    def save_observations_to_json(self, filename='Backend/data/curd_cutter_data.json'):
-        folder = os.path.dirname(filename)
-        if folder:
-            os.makedirs(folder, exist_ok=True)
+            utc_time = self.clock.now() if self.clock else datetime.now(timezone.utc).isoformat()
 
-        with open(filename, 'w') as f:
-            json.dump(self.observer, f, indent=4)
+            self.observer.append({
+                'sim_time_min': self.env.now,
+                'utc_time': utc_time,
+                **curd_data,
+                'machine': 'curd_cutter'
+            })
+
+            yield self.output_conveyor.put(curd_data)
+
+        return total_curd, total_whey
 
-        print(f"Observations saved to {filename}")
+    def save_observations_to_json(self, filename='Backend/data/curd_cutter_data.json', compact=False, compression=None):
+        return save_observations(self.observer, filename, compact=compact, compression=compression, verbose=self.verbose)
     
     def save_batch_logs_to_json(self, filename='Backend/data/curd_cutter_batch_data.json'):
         folder = os.path.dirname(filename)
@@ -126,10 +195,11 @@ class CurdCutter:
         with open(filename, 'w') as f:
             json.dump(self.batch_logs, f, indent=4)
 
-        print(f"Batch logs saved to {filename}")
+        if self.verbose:
+            print(f"Batch logs saved to {filename}")
 
     @staticmethod
-    def run(env, input_conveyor, output_conveyor, clock, avg_blade_wear_rate=0.1, base_auger_speed=50, logger=None):
-        machine = CurdCutter(env, input_conveyor, output_conveyor, avg_blade_wear_rate, base_auger_speed, clock, logger)
+    def run(env, input_conveyor, output_conveyor, clock, avg_blade_wear_rate=0.1, base_auger_speed=50, logger=None, observer_config=None, verbose=True, cutting_mode="per_curd", chunk_size=100, rng=None):
+        machine = CurdCutter(env, input_conveyor, output_conveyor, avg_blade_wear_rate, base_auger_speed, clock, logger, observer_config=observer_config, verbose=verbose, cutting_mode=cutting_mode, chunk_size=chunk_size, rng=rng)
         env.process(machine.process_batch())
         return machine
@@ -2,18 +2,21 @@ import random
 from datetime import datetime, timedelta, timezone
 import simpy
 import json
-import os
 from helpers.ndjson_logger import build_standard_event
+from helpers.observer_store import ObserverStore
+from helpers.observation_export import save_observations
 
 class WheyDrainer:
-    def __init__(self, env, input_store, output_store, target_moisture=None, clock=None, logger=None):
+    def __init__(self, env, input_store, output_store, target_moisture=None, clock=None, logger=None, observer_config=None, verbose=True, rng=None):
         self.env = env
         self.input_store = input_store
         self.output_store = output_store
         self.clock = clock() if clock else None
         self.target_moisture = target_moisture
-        self.observer = []
+        self.observer = ObserverStore.from_config(observer_config, name='whey_drainer')
         self.logger = logger
+        self.verbose = verbose
+        self.random = rng or random
 
     def process(self):
         while True:
@@ -39,21 +42,22 @@ class WheyDrainer:
             whey_drained_per_interval = INITIAL_WHEY / intervals
 
             # Print header
-            print("\nWhey Draining Simulation")
-            print(f"Initial Mix: {total_volume:.0f}L | Whey: {INITIAL_WHEY:.1f}L | Curd: {INITIAL_CURD:.1f}L")
-            print("Time (UTC)          | Time(min) | Temp(C) | Whey Remaining(L) | Curd(L) | Moisture(%)")
-            print("----------------------------------------------------------------------------------------")
+            if self.verbose:
+                print("\nWhey Draining Simulation")
+                print(f"Initial Mix: {total_volume:.0f}L | Whey: {INITIAL_WHEY:.1f}L | Curd: {INITIAL_CURD:.1f}L")
+                print("Time (UTC)          | Time(min) | Temp(C) | Whey Remaining(L) | Curd(L) | Moisture(%)")
+                print("----------------------------------------------------------------------------------------")
 
             while time_elapsed <= DRAIN_TIME and moisture > self.target_moisture + 0.1:
                 temp = TEMP_START - ((TEMP_START - TEMP_END) / DRAIN_TIME) * time_elapsed
 
-                drained = min(whey_drained_per_interval * random.uniform(0.95, 1.05), whey_remaining)
+                drained = min(whey_drained_per_interval * self.random.uniform(0.95, 1.05), whey_remaining)
                 whey_remaining -= drained
 
-                curd_loss = curd * random.uniform(0.002, 0.005)
+                curd_loss = curd * self.random.uniform(0.002, 0.005)
                 curd -= curd_loss
 
-                moisture = max(self.target_moisture, moisture - moisture_drop_per_interval * random.uniform(0.95, 1.05))
+                moisture = max(self.target_moisture, moisture - moisture_drop_per_interval * self.random.uniform(0.95, 1.05))
 
                 utc_time = self.clock.now() if self.clock else datetime.now(timezone.utc).isoformat()
 
@@ -83,16 +87,18 @@ class WheyDrainer:
                     )
 
                 # Logging
-                print(f"{current_time.now()} | {time_elapsed:03d}       | {temp:7.1f} | "
-                      f"{whey_remaining:12.1f}      | {curd:7.1f} | {moisture:9.1f}")
+                if self.verbose:
+                    print(f"{current_time.now()} | {time_elapsed:03d}       | {temp:7.1f} | "
+                          f"{whey_remaining:12.1f}      | {curd:7.1f} | {moisture:9.1f}")
 
                 # Advance SimPy time
                 yield self.env.timeout(5)
                 time_elapsed += 5
 
-            print("\n--- Process Complete ---")
-            print(f"Final Curd: {curd:.1f}L | Moisture: {moisture:.1f}%")
-            print(f"Total Time: {time_elapsed-5} minutes\n")
+            if self.verbose:
+                print("\n--- Process Complete ---")
+                print(f"Final Curd: {curd:.1f}L | Moisture: {moisture:.1f}%")
+                print(f"Total Time: {time_elapsed-5} minutes\n")
 
             # Push results to output store
             batch_result = {
@@ -103,18 +109,11 @@ class WheyDrainer:
             }
             yield self.output_store.put(batch_result)
 
-    def save_observations_to_json(self, filename='Backend/data/whey_draining_data.json'):
-        folder = os.path.dirname(filename)
-        if folder:
-            os.makedirs(folder, exist_ok=True)
-
-        with open(filename, 'w') as f:
-            json.dump(self.observer, f, indent=4)
-
-        print(f"Observations saved to {filename}")
+    def save_observations_to_json(self, filename='Backend/data/whey_draining_data.json', compact=False, compression=None):
+        return save_observations(self.observer, filename, compact=compact, compression=compression, verbose=self.verbose)
 
     @staticmethod
-    def run(env, input_store, output_store, clock, target_moisture, logger=None):
-        machine = WheyDrainer(env, input_store, output_store, target_moisture, clock, logger)
+    def run(env, input_store, output_store, clock, target_moisture, logger=None, observer_config=None, verbose=True, rng=None):
+        machine = WheyDrainer(env, input_store, output_store, target_moisture, clock, logger, observer_config=observer_config, verbose=verbose, rng=rng)
         env.process(machine.process())
         return machine
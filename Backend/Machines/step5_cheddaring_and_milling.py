@@ -1,10 +1,16 @@
 import simpy
 import math
 import json
-import os
+import numpy as np
+from helpers.ndjson_logger import build_standard_event
+from helpers.observer_store import ObserverStore
+from helpers.observation_export import save_observations
+
+# Cheddaring curves per parameter set, shared by every machine instance
+_CURVE_CACHE = {}
 
 class Cheddaring:
-    def __init__(self, env, input, output_store, clock, total_time=180, step=15, logger=None):
+    def __init__(self, env, input, output_store, clock, total_time=180, step=15, logger=None, observer_config=None, verbose=True):
         self.env = env
         self.initial_curd = input
         self.output_store = output_store
@@ -19,8 +25,9 @@ class Cheddaring:
         self.total_time = total_time
         self.step = step
         
-        self.observer = []
+        self.observer = ObserverStore.from_config(observer_config, name='cheddaring_and_milling')
         self.logger = logger
+        self.verbose = verbose
 
     #Moisture function 
     def moisture(self, t):
@@ -35,11 +42,48 @@ class Cheddaring:
         #Logistic (sigmoid) curve centered around milling start.
         return self.texture_max / (1 + math.exp(self.sigmoid_k * (t - self.mill_start)))
 
+    def curves(self):
+        """Return (times, moisture, texture, milled) arrays for this machine's parameters.
+
+        The curves only depend on constants and (total_time, step), so they
+        are computed once per parameter set and cached at module level.
+        """
+        key = (self.moisture_diff, self.moisture_final, self.decay_pre, self.decay_post,
+               self.mill_start, self.sigmoid_k, self.texture_max, self.total_time, self.step)
+        curves = _CURVE_CACHE.get(key)
+        if curves is None:
+            times = np.arange(0, self.total_time + 1, self.step)
+            moisture = np.array([self.moisture(t) for t in times.tolist()])
+            texture = np.array([self.texture(t) for t in times.tolist()])
+            milled = times >= self.mill_start
+            curves = _CURVE_CACHE[key] = (times, moisture, texture, milled)
+        return curves
+
     #Main SimPy process
     def process(self):
+        times, moisture, texture, milled_flags = self.curves()
+        # Per-step values are the same for every batch, so round them once
+        rows = list(zip(times.tolist(), moisture.tolist(), texture.tolist(),
+                        ["Yes" if m else "No" for m in milled_flags.tolist()]))
+        rounded = [(round(m, 2), round(tx, 2)) for _, m, tx, _ in rows]
+        # Whey lost (kg) per kg of curd: portion of curd that is not moisture
+        whey_fraction = (100 - moisture) / 100
+
         while True:
             batch = yield self.initial_curd.get()
-            # Print initial curd mass
+            # Take any batches already queued behind it and compute them in one go
+            batches = [batch]
+            while self.initial_curd.items:
+                batches.append((yield self.initial_curd.get()))
+            whey_lost = np.multiply.outer(batches, whey_fraction).tolist()
+
+            for batch, whey_row in zip(batches, whey_lost):
+                yield from self.replay_batch(batch, rows, rounded, whey_row)
+
+    def replay_batch(self, batch, rows, rounded, whey_row):
+        """Log and time one batch's precomputed cheddaring steps."""
+        # Print initial curd mass
+        if self.verbose:
             print(f"Starting curd: {batch:.2f} kg\n")
             # Print table header
             print("-" * 80)
@@ -47,60 +91,44 @@ class Cheddaring:
                 f"{'Texture (0–10)':<18} {'Milled?'}")
             print("-" * 80)
 
-            # Loop over time steps from 0 up to total_time (inclusive)
-            for t in range(0, self.total_time + 1, self.step):
-                # Compute whether milling has started
-                milled = "Yes" if t >= self.mill_start else "No"
-                # Calculate moisture at time t
-                m = self.moisture(t)
-                # Calculate whey lost (kg): portion of curd that is not moisture
-                whey_kg = ((100 - m) / 100) * batch
-                # Calculate texture at time t
-                tx = self.texture(t)
-
-                # Report whole minutes (integer)
-                event = {
-                    'sim_time_min': int(self.env.now),
-                    'utc_time': self.clock.now(),
-                    'time_elapsed_min': t,
-                    'moisture_percent': round(m, 2),
-                    'whey_lost_kg': round(whey_kg, 2),
-                    'texture_score': round(tx, 2),
-                    'milled': milled,
-                    'machine': 'cheddaring_and_milling'
-                }
-                self.observer.append(event)
-                if self.logger:
-                    from helpers.ndjson_logger import build_standard_event
-                    self.logger.log_event(
-                        build_standard_event(
-                            machine='cheddaring_and_milling',
-                            sim_time_min=event['sim_time_min'],
-                            utc_time=event['utc_time'],
-                            output_moisture_percent=event['moisture_percent'],
-                            extra={'whey_lost_kg': event['whey_lost_kg'], 'texture_score': event['texture_score'], 'milled': milled},
-                        )
+        # Loop over time steps from 0 up to total_time (inclusive)
+        for (t, m, tx, milled), (m_rounded, tx_rounded), whey_kg in zip(rows, rounded, whey_row):
+            # Report whole minutes (integer)
+            event = {
+                'sim_time_min': int(self.env.now),
+                'utc_time': self.clock.now(),
+                'time_elapsed_min': t,
+                'moisture_percent': m_rounded,
+                'whey_lost_kg': round(whey_kg, 2),
+                'texture_score': tx_rounded,
+                'milled': milled,
+                'machine': 'cheddaring_and_milling'
+            }
+            self.observer.append(event)
+            if self.logger:
+                self.logger.log_event(
+                    build_standard_event(
+                        machine='cheddaring_and_milling',
+                        sim_time_min=event['sim_time_min'],
+                        utc_time=event['utc_time'],
+                        output_moisture_percent=event['moisture_percent'],
+                        extra={'whey_lost_kg': event['whey_lost_kg'], 'texture_score': event['texture_score'], 'milled': milled},
                     )
+                )
 
-                # Print one row of the table
+            # Print one row of the table
+            if self.verbose:
                 print(f"{t:<12} {m:<15.2f} {whey_kg:<20.2f} {tx:<18.2f} {milled}")
 
-                # Tell SimPy to wait until the next step (advance time by `step`)
-                yield self.env.timeout(self.step)
-                yield self.output_store.put(batch)
-
-    def save_observations_to_json(self, filename='Backend/data/cheddaring_and_milling_data.json'):
-        folder = os.path.dirname(filename)
-        if folder:
-            os.makedirs(folder, exist_ok=True)
-
-        with open(filename, 'w') as f:
-            json.dump(self.observer, f, indent=4)
+            # Tell SimPy to wait until the next step (advance time by `step`)
+            yield self.env.timeout(self.step)
+            yield self.output_store.put(batch)
 
-        print(f"Observations saved to {filename}")
+    def save_observations_to_json(self, filename='Backend/data/cheddaring_and_milling_data.json', compact=False, compression=None):
+        return save_observations(self.observer, filename, compact=compact, compression=compression, verbose=self.verbose)
 
     @staticmethod
-    def run(env, input, output_store, clock, total_time=180, step=15, logger=None):
-        machine = Cheddaring(env, input, output_store, clock, total_time, step, logger)
+    def run(env, input, output_store, clock, total_time=180, step=15, logger=None, observer_config=None, verbose=True):
+        machine = Cheddaring(env, input, output_store, clock, total_time, step, logger, observer_config=observer_config, verbose=verbose)
         env.process(machine.process())
         return machine
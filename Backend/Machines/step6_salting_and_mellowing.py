@@ -1,11 +1,13 @@
 import simpy
+from helpers.patched_environment import create_store
 from datetime import datetime, timezone
 import json
-import os
 from helpers.ndjson_logger import build_standard_event
+from helpers.observer_store import ObserverStore
+from helpers.observation_export import save_observations
 
 class SaltingMachine:
-    def __init__(self, env, input_conveyor, clock, mellowing_conveyor, mellowing_output_conveyor, mellowing_time=None, salt_recipe=None, logger=None):
+    def __init__(self, env, input_conveyor, clock, mellowing_conveyor, mellowing_output_conveyor, mellowing_time=None, salt_recipe=None, logger=None, observer_config=None, verbose=True):
         self.env = env
         self.clock = clock()
         self.input_conveyor = input_conveyor
@@ -13,8 +15,9 @@ class SaltingMachine:
         self.mellowing_output_conveyor = mellowing_output_conveyor
         self.mellowing_time = mellowing_time
         self.salt_recipe = salt_recipe
-        self.observer = []
+        self.observer = ObserverStore.from_config(observer_config, name='salting_and_mellowing')
         self.logger = logger
+        self.verbose = verbose
 
     def salt_dispenser(self):
         while True:
@@ -23,22 +26,29 @@ class SaltingMachine:
             curd_slice['salt'] += salt_amount
 
             self.log(curd_slice, 'salt_dispenser')
-            print(f"[{self.env.now:.2f}] Salted curd slice {curd_slice['id']} with {salt_amount:.2f} kg salt")
+            if self.verbose:
+                print(f"[{self.env.now:.2f}] Salted curd slice {curd_slice['id']} with {salt_amount:.2f} kg salt")
 
-            yield self.mellowing_conveyor.put(curd_slice)
-            self.env.process(self.mellowing_delay(curd_slice))
+            # Slices queue in arrival order with the time they entered mellowing
+            yield self.mellowing_conveyor.put((self.env.now, curd_slice))
+            self.log(curd_slice, 'mellowing_start')
+            if self.verbose:
+                print(f"[{self.env.now:.2f}] Starting mellowing for curd slice {curd_slice['id']}")
 
-    def mellowing_delay(self, curd_slice):
-        self.log(curd_slice, 'mellowing_start')
-        print(f"[{self.env.now:.2f}] Starting mellowing for curd slice {curd_slice['id']}")
-
-        yield self.env.timeout(self.mellowing_time)
-        yield self.mellowing_conveyor.get()
+    def mellowing_stage(self):
+        # Every slice mellows for the same time, so the queue releases in FIFO
+        # order and one process serves all of them
+        while True:
+            entry_time, curd_slice = yield self.mellowing_conveyor.get()
+            remaining = entry_time + self.mellowing_time - self.env.now
+            if remaining > 0:
+                yield self.env.timeout(remaining)
 
-        self.log(curd_slice, 'mellowing_end')
-        print(f"[{self.env.now:.2f}] Finished mellowing for curd slice {curd_slice['id']}")
+            self.log(curd_slice, 'mellowing_end')
+            if self.verbose:
+                print(f"[{self.env.now:.2f}] Finished mellowing for curd slice {curd_slice['id']}")
 
-        yield self.mellowing_output_conveyor.put(curd_slice)
+            yield self.mellowing_output_conveyor.put(curd_slice)
 
     def log(self, curd_slice, machine_stage):
         # Report whole minutes (integer)
@@ -62,22 +72,16 @@ class SaltingMachine:
                 )
             )
 
-    def save_observations_to_json(self, filename='Backend/data/salting_and_mellowing_data.json'):
-        folder = os.path.dirname(filename)
-        if folder:
-            os.makedirs(folder, exist_ok=True)
-
-        with open(filename, 'w') as f:
-            json.dump(self.observer, f, indent=4)
-
-        print(f"Observations saved to {filename}")
+    def save_observations_to_json(self, filename='Backend/data/salting_and_mellowing_data.json', compact=False, compression=None):
+        return save_observations(self.observer, filename, compact=compact, compression=compression, verbose=self.verbose)
 
     @staticmethod
-    def run(env, input_conveyor, salting_output, clock, mellowing_time=10, salt_recipe=0.033, logger=None):
-        mellowing_conveyor = simpy.Store(env)
+    def run(env, input_conveyor, salting_output, clock, mellowing_time=10, salt_recipe=0.033, logger=None, observer_config=None, verbose=True):
+        mellowing_conveyor = create_store(env)
 
         machine = SaltingMachine(env, input_conveyor, clock, mellowing_conveyor, salting_output,
-                                 mellowing_time=mellowing_time, salt_recipe=salt_recipe, logger=logger)
+                                 mellowing_time=mellowing_time, salt_recipe=salt_recipe, logger=logger, observer_config=observer_config, verbose=verbose)
 
         env.process(machine.salt_dispenser())
+        env.process(machine.mellowing_stage())
         return machine  # return instance in case you want to inspect `.observer` or save logs
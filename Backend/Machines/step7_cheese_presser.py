@@ -1,9 +1,10 @@
 import simpy
 import random
 import json
-import os
 from datetime import datetime
 from helpers.ndjson_logger import build_standard_event
+from helpers.observer_store import ObserverStore
+from helpers.observation_export import save_observations
 
 #simulation
 #Constants
@@ -16,7 +17,7 @@ MAINTENANCE_DURATION = 10            # time (in minutes) needed to perform maint
 
 # machine logic
 class CheesePresser:
-    def __init__(self, env, input_conveyor, output_conveyor, clock, anomaly_chance, mold_count=None, logger=None):
+    def __init__(self, env, input_conveyor, output_conveyor, clock, anomaly_chance, mold_count=None, logger=None, observer_config=None, verbose=True, rng=None):
         self.env = env
         self.input_conveyor = input_conveyor
         self.output_conveyor = output_conveyor
@@ -25,8 +26,10 @@ class CheesePresser:
         self.mold_count = mold_count
         self.health = 100.0
         self.is_under_maintenance = False
-        self.observer = []
+        self.observer = ObserverStore.from_config(observer_config, name='cheese_presser')
         self.logger = logger
+        self.verbose = verbose
+        self.random = rng or random
 
     def press_batch(self, batch):
         start_time = self.env.now
@@ -47,12 +50,12 @@ class CheesePresser:
         weight_loss = batch['input_weight_kg'] * (reduction * 0.9)
         output_weight = batch['input_weight_kg'] - weight_loss
 
-        if random.random() < self.anomaly_chance:
+        if self.random.random() < self.anomaly_chance:
             anomaly_occurred = True
             final_moisture += 2
             output_weight -= 0.1
 
-        self.health -= random.uniform(1, 3)
+        self.health -= self.random.uniform(1, 3)
         end_time = self.env.now
 
         # Report whole minutes (integer)
@@ -98,19 +101,12 @@ class CheesePresser:
         batch['output_moisture_percent'] = final_moisture
         yield self.output_conveyor.put(batch)
     
-    def save_observations_to_json(self, filename='Backend/data/cheese_presser_data.json'):
-        folder = os.path.dirname(filename)
-        if folder:
-            os.makedirs(folder, exist_ok=True)
-
-        with open(filename, 'w') as f:
-            json.dump(self.observer, f, indent=4)
-
-        print(f"Observations saved to {filename}")
+    def save_observations_to_json(self, filename='Backend/data/cheese_presser_data.json', compact=False, compression=None):
+        return save_observations(self.observer, filename, compact=compact, compression=compression, verbose=self.verbose)
     
     @staticmethod
-    def run(env, input_conveyor, output_conveyor, clock, anomaly_chance, mold_count=None, logger=None):
-        machine = CheesePresser(env, input_conveyor, output_conveyor, clock, anomaly_chance, mold_count, logger)
+    def run(env, input_conveyor, output_conveyor, clock, anomaly_chance, mold_count=None, logger=None, observer_config=None, verbose=True, rng=None):
+        machine = CheesePresser(env, input_conveyor, output_conveyor, clock, anomaly_chance, mold_count, logger, observer_config=observer_config, verbose=verbose, rng=rng)
 
         def consumer(env, input_conveyor, machine):
             while True:
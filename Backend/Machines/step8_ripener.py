@@ -1,8 +1,9 @@
 import simpy
 import json
-import os
 from helpers.ndjson_logger import build_standard_event
 from datetime import datetime, timezone
+from helpers.observer_store import ObserverStore
+from helpers.observation_export import save_observations
 
 class Ripener:
 
@@ -15,18 +16,34 @@ class Ripener:
     # --- Step Calculations ---
     STEP_DURATION_SEC = 15
     STEPS_PER_MIN = 60 // STEP_DURATION_SEC
+    STEPS_PER_MONTH = 30 * 24 * 60 * STEPS_PER_MIN
 
     # --- Temperature Adjustment ---
     TEMP_DROP_PER_STEP = 1     # Cooling rate per step
     TEMP_RISE_WHEN_COLD = 1.5  # Reheating rate per step
 
-    def __init__(self, env, input_blocks, clock, initial_temp=None, logger=None):
+    def __init__(self, env, input_blocks, clock, initial_temp=None, logger=None, observer_config=None, verbose=True, report_interval=None, milestones=None):
         self.incoming_blocks = input_blocks
         self.clock = clock()
         self.initial_temp = initial_temp
         self.env = env
-        self.observer = []
+        self.observer = ObserverStore.from_config(observer_config, name='ripener')
         self.logger = logger
+        self.verbose = verbose
+        self.report_interval = report_interval
+
+        # Storage state, brought up to date by accumulate()
+        self.blocks = 0
+        self.intake = 0
+        self.stored_kg = 0
+        self.ripening = 0
+        self.last_update = None
+        self.temperature = initial_temp
+        self.status = "Adding pressed cheeses to shelves..."
+
+        # Block ages (steps) at which the ripener wakes up again
+        self.milestones = self.maturity_milestones(milestones)
+        self.milestones_reached = 0
 
     @staticmethod
     def format_sim_time(sim_time):
@@ -34,105 +51,136 @@ class Ripener:
         total_seconds = sim_time * Ripener.STEP_DURATION_SEC
         return f"{int(total_seconds // 60)}:{int(total_seconds % 60):02d}"
 
-    def ripening_process(self):
-        # Storage state variables
-        ripening = 0
-        intake = yield self.incoming_blocks.get()
-        step_weight = intake
-        
-
-        # Machine state variables
-        temperature = self.initial_temp
-        status = "Adding pressed cheeses to shelves..."
-
-        # Header
-        print("-" * 95)
-
-        # Emit an immediate intake event so ripener appears even if the sim ends soon after handoff
-        first_event = {
-            'sim_time_min': int(self.env.now // self.STEPS_PER_MIN),
+    def ripening_months(self):
+        """Months the cheese needs at the current temperature, or None if it will not ripen."""
+        if self.temperature > self.TEMP_OPTIMAL_MAX:
+            return None
+        if self.temperature > self.TEMP_OPTIMAL_MIN:
+            return 12
+        if self.temperature >= self.TEMP_MIN_OPERATING:
+            return 18
+        return None
+
+    def maturity_milestones(self, milestones):
+        """(steps, name) pairs sorted by block age; `milestones` maps names to ages in minutes.
+
+        Defaults to a single "ripe" milestone after ripening_months().
+        """
+        if milestones is None:
+            months = self.ripening_months()
+            return [(months * self.STEPS_PER_MONTH, "ripe")] if months else []
+        return sorted((int(minutes * self.STEPS_PER_MIN), name) for name, minutes in milestones.items())
+
+    def accumulate(self, now=None):
+        """Add the storage accumulated since the last wake-up (stored mass x elapsed steps).
+
+        Matches the old per-step loop: a block stored at step t counts from step t + 1.
+        """
+        now = self.env.now if now is None else now
+        if self.last_update is not None:
+            self.ripening += self.stored_kg * (now - self.last_update)
+        self.last_update = now
+
+    def log_state(self, now=None):
+        now = self.env.now if now is None else now
+        event = {
+            'sim_time_min': int(now // self.STEPS_PER_MIN),
             'utc_time': self.clock.now(),
-            'intake_kg': round(intake, 2),
-            'total_ripening_kg': round(ripening, 2),
-            'temperature_C': round(temperature, 2),
-            'status': status,
+            'intake_kg': round(self.intake, 2),
+            'total_ripening_kg': round(self.ripening, 2),
+            'temperature_C': round(self.temperature, 2),
+            'status': self.status,
             'machine': 'ripener'
         }
-        self.observer.append(first_event)
+        self.observer.append(event)
         if self.logger:
             self.logger.log_event(
                 build_standard_event(
                     machine='ripener',
-                    sim_time_min=first_event['sim_time_min'],
-                    utc_time=first_event['utc_time'],
-                    temperature_C=first_event['temperature_C'],
-                    output_weight_kg=first_event['total_ripening_kg'],
+                    sim_time_min=event['sim_time_min'],
+                    utc_time=event['utc_time'],
+                    temperature_C=event['temperature_C'],
+                    output_weight_kg=event['total_ripening_kg'],
                     extra={
-                        'intake_kg': first_event['intake_kg'],
-                        'status': status,
+                        'intake_kg': event['intake_kg'],
+                        'status': self.status,
+                        'blocks_stored': self.blocks,
+                        'stored_kg': round(self.stored_kg, 2),
+                        'milestones_reached': self.milestones_reached,
                     },
                 )
             )
 
-        # Processing loop
-        while True:
-            yield self.env.timeout(1)
-
-            ripening += step_weight
-
-            event = {
-                'sim_time_min': int(self.env.now // self.STEPS_PER_MIN),
-                'utc_time': self.clock.now(),
-                'intake_kg': round(intake, 2),
-                'total_ripening_kg': round(ripening, 2),
-                'temperature_C': round(temperature, 2),
-                'status': status,
-                'machine': 'ripener'
-            }
-            self.observer.append(event)
-            if self.logger:
-                self.logger.log_event(
-                    build_standard_event(
-                        machine='ripener',
-                        sim_time_min=event['sim_time_min'],
-                        utc_time=event['utc_time'],
-                        temperature_C=event['temperature_C'],
-                        output_weight_kg=event['total_ripening_kg'],
-                        extra={
-                            'intake_kg': event['intake_kg'],
-                            'status': status,
-                        },
-                    )
-                )
+        if self.verbose:
+            print(f"{self.clock.now()} {self.intake:<14.2f} {self.ripening:<14.2f} {self.temperature:<10.2f} {self.status}")
 
-            print(f"{self.clock.now()} {intake:<14.2f} {ripening:<14.2f} {temperature:<10.2f} {status}")
-
-            # Final report
-            stored_blocks = ripening
+    def ripening_process(self):
+        # Sleep until a block arrives; storage in between is accumulated analytically
+        while True:
+            intake = yield self.incoming_blocks.get()
+
+            # Header
+            if self.verbose and self.blocks == 0:
+                print("-" * 95)
+
+            self.accumulate()
+            self.blocks += 1
+            self.intake = intake
+            self.stored_kg += intake
+            self.status = "Adding pressed cheeses to shelves..."
+            self.log_state()
+            if self.milestones:
+                self.env.process(self.maturing_process(self.blocks))
+
+    def maturing_process(self, block):
+        # Wake once per maturity milestone of this block
+        stored_at = self.env.now
+        for steps, name in self.milestones:
+            yield self.env.timeout(stored_at + steps - self.env.now)
+            self.accumulate()
+            self.milestones_reached += 1
+            self.status = f"Block {block} {name}"
+            self.log_state()
+
+    def report_process(self):
+        # Optional periodic snapshots between intakes
+        while True:
+            yield self.env.timeout(self.report_interval)
+            if self.blocks:
+                self.accumulate()
+                self.log_state()
+
+    def finalize(self):
+        """Bring storage up to the end of the run, log it and print the final report."""
+        if not self.blocks:
+            return
+        # env.run(until=...) stops before the step at `until`, so the last step counted is the one before it;
+        # blocks arrive at fractional times, and one stored after that step adds nothing more
+        last_step = max(self.env.now - 1, self.last_update)
+        self.accumulate(last_step)
+        self.log_state(last_step)
+
+        # Final report
+        if self.verbose:
+            stored_blocks = self.ripening
             print("\n--- Storage Update ---")
             print(f"Total Mass Stored: {stored_blocks} or {stored_blocks}kg")
-            if temperature > self.TEMP_OPTIMAL_MAX:
+            months = self.ripening_months()
+            if months:
+                print(f"The Cheese took {months} months to ripen.")
+            elif self.temperature > self.TEMP_OPTIMAL_MAX:
                 print("The Cheese did not ripen properly")
-            elif temperature > self.TEMP_OPTIMAL_MIN:
-                print("The Cheese took 12 months to ripen.")
-            elif temperature >= self.TEMP_MIN_OPERATING:
-                print("The Cheese took 18 months to ripen.")
-            elif temperature < self.TEMP_MIN_OPERATING:
+            else:
                 print("The Cheese took too long to ripen.")
 
-    def save_observations_to_json(self, filename='Backend/data/ripener_data.json'):
-        folder = os.path.dirname(filename)
-        if folder:
-            os.makedirs(folder, exist_ok=True)
-
-        with open(filename, 'w') as f:
-            json.dump(self.observer, f, indent=4)
-
-        print(f"Observations saved to {filename}")
+    def save_observations_to_json(self, filename='Backend/data/ripener_data.json', compact=False, compression=None):
+        return save_observations(self.observer, filename, compact=compact, compression=compression, verbose=self.verbose)
 
     @staticmethod
-    def run(env, input_blocks, clock, initial_temp=None, logger=None):
+    def run(env, input_blocks, clock, initial_temp=None, logger=None, observer_config=None, verbose=True, report_interval=None, milestones=None):
        
-        machine = Ripener(env, input_blocks, clock, initial_temp, logger)
+        machine = Ripener(env, input_blocks, clock, initial_temp, logger, observer_config=observer_config, verbose=verbose, report_interval=report_interval, milestones=milestones)
         env.process(machine.ripening_process())
+        if report_interval:
+            env.process(machine.report_process())
         return machine
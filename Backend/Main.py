@@ -1,24 +1,34 @@
 import simpy
 import json
 import os
+import shutil
 from Machines import *
 from helpers import *
 import sys
+import time
 import logging
+from datetime import datetime, timezone
 
 
 log_file_path = "cheese_sim_log.txt"
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),             # Console output
-        logging.FileHandler(log_file_path, mode="w")  # File output
-    ]
-)
 
-logging.info("This will print to console and also be saved in cheese_sim_log.txt")
+def configure_logging(verbose=True, log_path=log_file_path):
+    # In production mode stdout is reserved for the structured event stream
+    handlers = [logging.FileHandler(log_path, mode="w")]  # File output
+    if verbose:
+        handlers.insert(0, logging.StreamHandler(sys.stdout))  # Console output
+    logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=handlers, force=True)
+
+    logging.info("This will print to console and also be saved in cheese_sim_log.txt")
+
+
+def release_logging():
+    # Close the run log's handlers so a long-lived process does not keep them open between runs
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
 
 
 def load_defaults(filename="args.json"):
@@ -27,118 +37,236 @@ def load_defaults(filename="args.json"):
         return json.load(f)
     
 
+def is_verbose(args):
+    # "verbose" prints the human-readable tables, "production" keeps stdout to the event stream only
+    return args["global"].get("verbosity", "verbose") != "production"
+
+
 # Constants
 MAX_FLOW_RATE = 181.5
 
-def main(args=None):
+def main(args=None, output_dir=None, run_id=None, index_run=True):
+    """Run the full pipeline once.
+
+    Every run gets a run ID and its own directory, data/runs/<run_id>,
+    holding the event log, the observation files, the run log and the
+    args used, so several runs can share one host. `output_dir` overrides
+    the directory. Each run is recorded in data/runs/index.ndjson unless
+    `index_run` is False (for runs whose directory is deleted afterwards).
+    Returns that index record.
+    """
     if args is None:
         args = load_defaults()
-        print("Using default args.json")
+        from_frontend = False
     else:
-        print("Using config from frontend")
-        print(json.dumps(args, indent=2))
+        from_frontend = True
 
-    env = create_env(args["global"]["time_mode"], 1, True)
+    started = time.time()
     # Resolve data directory absolute path so it works no matter the cwd
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(base_dir, "data")
-    os.makedirs(data_dir, exist_ok=True)
+    runs_dir = os.path.join(base_dir, "data", "runs")
+    run_id = run_id or args["global"].get("run_id")
+    if output_dir:
+        run_id = run_id or new_run_id()
+        data_dir = output_dir
+        os.makedirs(data_dir, exist_ok=True)
+    else:
+        run_id, data_dir = create_run_dir(runs_dir, run_id)
+    with open(os.path.join(data_dir, "args.json"), "w") as f:
+        json.dump(args, f, indent=2)
+
+    verbose = is_verbose(args)
+    configure_logging(verbose, os.path.join(data_dir, log_file_path))
+    if verbose:
+        if from_frontend:
+            print("Using config from frontend")
+            print(json.dumps(args, indent=2))
+        else:
+            print("Using default args.json")
+
+    env = create_env(args["global"]["time_mode"], 1, True, engine=args["global"].get("engine", "simpy"))
+    # Independent random stream per machine; the same seed reproduces the run
+    streams = RandomStreams(args["global"].get("seed"))
+    if verbose:
+        print(f"Run {run_id} -> {data_dir}")
+        print(f"Random seed: {streams.seed}")
     nd_path = os.path.join(data_dir, "data.ndjson")
     final_json_path = os.path.join(data_dir, "data.json")
     # time_mode: 0 -> batch mode (no streaming), 1 -> streaming NDJSON
     stream = True if args["global"].get("time_mode", 1) == 1 else False
-    logger = NdjsonLogger(ndjson_path=nd_path, final_json_path=final_json_path, stream=stream)
-
-    # Derived values
-    MAX_SLICES = int((MAX_FLOW_RATE * args["machines"]["salting_machine"]["mellowing_time"]) / (args["machines"]["salting_machine"]["flow_rate"] * (args["machines"]["salting_machine"]["mellowing_time"] / int((MAX_FLOW_RATE * args["machines"]["salting_machine"]["mellowing_time"]) / args["machines"]["salting_machine"]["flow_rate"]))))
-    GENERATION_INTERVAL = args["machines"]["salting_machine"]["mellowing_time"] / MAX_SLICES
-    SLICE_MASS = args["machines"]["salting_machine"]["flow_rate"] * GENERATION_INTERVAL
-
-    # Create conveyors
-    waste_store = simpy.Store(env)
-    pasteuriser_input = simpy.Store(env)
-    pasteuriser_output = simpy.Store(env)
-    vat_input = simpy.Store(env)
-    vat_output = simpy.Store(env)
-    cutter_input = simpy.Store(env)
-    cutter_output = simpy.Store(env)
-    whey_input = simpy.Store(env)
-    whey_output = simpy.Store(env)
-    cheddaring_input = simpy.Store(env)
-    cheddaring_output = simpy.Store(env)
-    salting_input = simpy.Store(env, capacity=MAX_SLICES)
-    salting_output = simpy.Store(env)
-    presser_input = simpy.Store(env)
-    presser_output = simpy.Store(env)
-    ripener_input = simpy.Store(env)
-
-    pasteuriser_input.items = [args["global"]["milk_to_process"]]
-    '''
-    machines running in sequence with their respective helper functions
-    '''
-    # Run pasteuriser
-    pasteuriser = Pasteuriser.run(env, pasteuriser_input, pasteuriser_output, args["machines"]["pasteuriser"]["temp_optimal"], waste_store, args["machines"]["pasteuriser"]["flow_rate"], Clock, logger)
+    # Event log write path: one persistent buffered handle unless disabled in args["logging"]
+    log_cfg = args.get("logging", {})
+    logger_kwargs = dict(
+        ndjson_path=nd_path,
+        final_json_path=final_json_path,
+        stream=stream,
+        buffered=log_cfg.get("buffered", True),
+        buffer_size=log_cfg.get("buffer_size", 1 << 16),
+        fsync_every_events=log_cfg.get("fsync_every_events"),
+        fsync_every_seconds=log_cfg.get("fsync_every_seconds"),
+        streaming_finalize=log_cfg.get("streaming_finalize", True),
+        output_format=log_cfg.get("output_format", "ndjson"),
+        carry_forward=log_cfg.get("carry_forward", "global"),
+    )
+    if log_cfg.get("async", False):
+        # Serialization and disk I/O happen on a background writer thread
+        logger = AsyncNdjsonLogger(
+            queue_size=log_cfg.get("queue_size", 10000),
+            overflow_policy=log_cfg.get("overflow_policy", "block"),
+            **logger_kwargs,
+        )
+    else:
+        logger = NdjsonLogger(**logger_kwargs)
+    # Closed on every exit path, so a failed run does not leave its file or writer thread behind
+    sink = logger
+    spill_dir = None
+    try:
+        # Optional change-only filter and per-machine decimation between the machines and the logger
+        deadband_cfg = log_cfg.get("deadband", {})
+        if deadband_cfg.get("enabled", False):
+            logger = DeadbandFilter(
+                logger,
+                default_epsilon=deadband_cfg.get("default_epsilon", 0.01),
+                epsilons=deadband_cfg.get("epsilons"),
+                status_fields=deadband_cfg.get("status_fields", DeadbandFilter.DEFAULT_STATUS_FIELDS),
+                tracked_fields=deadband_cfg.get("tracked_fields"),
+            )
+        if EventSampler.active(log_cfg.get("sampling")):
+            logger = EventSampler(logger, log_cfg["sampling"])
+
+        # Retention policy for each machine's observation records
+        observer_config = log_cfg.get("observer")
+        if observer_config and observer_config.get("retention") == "spill":
+            # Spilled chunks go under the run's directory (or spill_dir/<run_id>) and are removed after export
+            if observer_config.get("spill_dir"):
+                spill_dir = os.path.join(observer_config["spill_dir"], run_id)
+            else:
+                spill_dir = os.path.join(data_dir, "observer_spill")
+            observer_config = dict(observer_config, spill_dir=spill_dir)
+
+        # Derived values
+        MAX_SLICES = int((MAX_FLOW_RATE * args["machines"]["salting_machine"]["mellowing_time"]) / (args["machines"]["salting_machine"]["flow_rate"] * (args["machines"]["salting_machine"]["mellowing_time"] / int((MAX_FLOW_RATE * args["machines"]["salting_machine"]["mellowing_time"]) / args["machines"]["salting_machine"]["flow_rate"]))))
+        GENERATION_INTERVAL = args["machines"]["salting_machine"]["mellowing_time"] / MAX_SLICES
+        SLICE_MASS = args["machines"]["salting_machine"]["flow_rate"] * GENERATION_INTERVAL
+
+        # Create conveyors
+        waste_store = create_store(env)
+        pasteuriser_input = create_store(env)
+        # Float milk flow; pooled so pasteuriser_to_vat wakes once per vat batch
+        pasteuriser_output = create_coalescing_store(env) if args["machines"]["pasteuriser"].get("coalescing_output", True) else create_store(env)
+        vat_input = create_store(env)
+        vat_output = create_store(env)
+        cutter_input = create_store(env)
+        cutter_output = create_store(env)
+        whey_input = create_store(env)
+        whey_output = create_store(env)
+        cheddaring_input = create_store(env)
+        cheddaring_output = create_store(env)
+        salting_input = create_store(env, capacity=MAX_SLICES)
+        salting_output = create_store(env)
+        presser_input = create_store(env)
+        presser_output = create_store(env)
+        ripener_input = create_store(env)
+
+        pasteuriser_input.items = [args["global"]["milk_to_process"]]
+        '''
+        machines running in sequence with their respective helper functions
+        '''
+        # Run pasteuriser
+        pasteuriser = Pasteuriser.run(env, pasteuriser_input, pasteuriser_output, args["machines"]["pasteuriser"]["temp_optimal"], waste_store, args["machines"]["pasteuriser"]["flow_rate"], Clock, logger, observer_config=observer_config, verbose=verbose, fast_forward=args["machines"]["pasteuriser"].get("fast_forward", False), rng=streams.stream("pasteuriser"))
     
-    # Convert pasteuriser output to cheesevat input
-    env.process(pasteuriser_to_vat(env, pasteuriser_output, vat_input, args["machines"]["cheese_vat"]["vat_batch_size"]))
+        # Convert pasteuriser output to cheesevat input
+        env.process(pasteuriser_to_vat(env, pasteuriser_output, vat_input, args["machines"]["cheese_vat"]["vat_batch_size"]))
 
-    # Run cheese vat
-    cheese_vat = CheeseVat.run(env, vat_input, vat_output, args["machines"]["cheese_vat"]["optimal_ph"], args["machines"]["cheese_vat"]["milk_flow_rate"], args["machines"]["cheese_vat"]["anomaly_probability"], Clock, logger)
+        # Run cheese vat
+        cheese_vat = CheeseVat.run(env, vat_input, vat_output, args["machines"]["cheese_vat"]["optimal_ph"], args["machines"]["cheese_vat"]["milk_flow_rate"], args["machines"]["cheese_vat"]["anomaly_probability"], Clock, logger, observer_config=observer_config, verbose=verbose, phase_kernels=args["machines"]["cheese_vat"].get("phase_kernels", False), rng=streams.stream("cheese_vat"))
 
-    # Convert vat output to cutter input
-    env.process(vat_to_cutter(env, vat_output, cutter_input))
+        # Convert vat output to cutter input
+        env.process(vat_to_cutter(env, vat_output, cutter_input))
 
-    # Run curd cutter
-    curd_cutter = CurdCutter.run(env, cutter_input, cutter_output, Clock, args["machines"]["curd_cutter"]["blade_wear_rate"], args["machines"]["curd_cutter"]["auger_speed"], logger)
+        # Run curd cutter
+        cutter_cfg = args["machines"]["curd_cutter"]
+        curd_cutter = CurdCutter.run(env, cutter_input, cutter_output, Clock, cutter_cfg["blade_wear_rate"], cutter_cfg["auger_speed"], logger, observer_config=observer_config, verbose=verbose, cutting_mode=cutter_cfg.get("cutting_mode", "per_curd"), chunk_size=cutter_cfg.get("chunk_size", 100), rng=streams.stream("curd_cutter"))
 
-    # Convert cutter output to whey input
-    env.process(cutter_to_whey(env, cutter_output, whey_input, args["machines"]["whey_drainer"]["target_mass"]))
+        # Convert cutter output to whey input
+        env.process(cutter_to_whey(env, cutter_output, whey_input, args["machines"]["whey_drainer"]["target_mass"]))
 
-    # Run whey drainer
-    whey_drainer = WheyDrainer.run(env, whey_input, whey_output, Clock, args["machines"]["whey_drainer"]["target_moisture"], logger)
+        # Run whey drainer
+        whey_drainer = WheyDrainer.run(env, whey_input, whey_output, Clock, args["machines"]["whey_drainer"]["target_moisture"], logger, observer_config=observer_config, verbose=verbose, rng=streams.stream("whey_drainer"))
 
-    # Convert whe output to cheddaring input
-    env.process(whey_to_cheddaring(env, whey_output, cheddaring_input))
+        # Convert whe output to cheddaring input
+        env.process(whey_to_cheddaring(env, whey_output, cheddaring_input))
 
-    # Run cheddaring machine
-    cheddaring_machine = Cheddaring.run(env, cheddaring_input, cheddaring_output, Clock, logger=logger)
+        # Run cheddaring machine
+        cheddaring_machine = Cheddaring.run(env, cheddaring_input, cheddaring_output, Clock, logger=logger, observer_config=observer_config, verbose=verbose)
     
-    # Convert cheddaring output to salting input
-    env.process(cheddaring_to_salting(env, cheddaring_output, salting_input, SLICE_MASS, GENERATION_INTERVAL))
-
-    # Run the salting machine
-    salting_machine = SaltingMachine.run(env, salting_input, salting_output, Clock, mellowing_time=args["machines"]["salting_machine"]["mellowing_time"], salt_recipe=args["machines"]["salting_machine"]["salt_recipe"], logger=logger)
-
-    # Convert salting output to presser input
-    env.process(salting_to_presser(env, salting_output, presser_input, args["machines"]["cheese_presser"]["block_weight"]))
-
-    # Run Presser
-    cheese_presser = CheesePresser.run(env, presser_input, presser_output, Clock, args["machines"]["cheese_presser"]["anomaly_chance"], args["machines"]["cheese_presser"]["mold_count"], logger)
-
-    # Convert presser output to ripener input
-    env.process(presser_to_ripener(env, presser_output, ripener_input))
-
-    # Run ripener
-    ripener = Ripener.run(env, ripener_input, Clock, args["machines"]["ripener"]["initial_temp"], logger)
-
-    # Centralized NDJSON logging is handled per machine; no test writer needed
-
-    # Run sim
-    env.run(until=args["global"]["simulation_time"])
-
-    # Save logs
-    pasteuriser.save_observations_to_json()
-    cheese_vat.save_observations_to_json()
-    curd_cutter.save_observations_to_json()
-    whey_drainer.save_observations_to_json()
-    cheddaring_machine.save_observations_to_json()
-    salting_machine.save_observations_to_json()
-    cheese_presser.save_observations_to_json()
-    ripener.save_observations_to_json()
-
-
-    # Convert NDJSON stream to final JSON array
-    logger.finalize_json()
+        # Convert cheddaring output to salting input
+        env.process(cheddaring_to_salting(env, cheddaring_output, salting_input, SLICE_MASS, GENERATION_INTERVAL))
+
+        # Run the salting machine
+        salting_machine = SaltingMachine.run(env, salting_input, salting_output, Clock, mellowing_time=args["machines"]["salting_machine"]["mellowing_time"], salt_recipe=args["machines"]["salting_machine"]["salt_recipe"], logger=logger, observer_config=observer_config, verbose=verbose)
+
+        # Convert salting output to presser input
+        env.process(salting_to_presser(env, salting_output, presser_input, args["machines"]["cheese_presser"]["block_weight"], retain_slices=args["machines"]["cheese_presser"].get("retain_slices", False), rng=streams.stream("salting_to_presser")))
+
+        # Run Presser
+        cheese_presser = CheesePresser.run(env, presser_input, presser_output, Clock, args["machines"]["cheese_presser"]["anomaly_chance"], args["machines"]["cheese_presser"]["mold_count"], logger, observer_config=observer_config, verbose=verbose, rng=streams.stream("cheese_presser"))
+
+        # Convert presser output to ripener input
+        env.process(presser_to_ripener(env, presser_output, ripener_input))
+
+        # Run ripener
+        ripener = Ripener.run(env, ripener_input, Clock, args["machines"]["ripener"]["initial_temp"], logger, observer_config=observer_config, verbose=verbose, report_interval=args["machines"]["ripener"].get("report_interval"), milestones=args["machines"]["ripener"].get("milestones"))
+
+        # Centralized NDJSON logging is handled per machine; no test writer needed
+
+        # Run sim
+        env.run(until=args["global"]["simulation_time"])
+        # Log what the vat computed before the end of the run and close out the ripener's storage
+        cheese_vat.finalize(env)
+        ripener.finalize()
+
+        # Save logs
+        machines = [pasteuriser, cheese_vat, curd_cutter, whey_drainer, cheddaring_machine, salting_machine, cheese_presser, ripener]
+        export_cfg = log_cfg.get("export", {})
+        timings = export_observations(
+            machines,
+            parallel=export_cfg.get("parallel", True),
+            max_workers=export_cfg.get("max_workers"),
+            compact=export_cfg.get("compact", False),
+            compression=export_cfg.get("compression"),
+            output_dir=data_dir,
+        )
+        if verbose:
+            for timing in timings:
+                print(f"Exported {timing['records']} {timing['machine']} observations to {timing['path']} in {timing['seconds']}s")
+
+
+        # Convert NDJSON stream to final JSON array
+        logger.finalize_json()
+        stats = logger.stats()
+        if verbose:
+            print(f"Event log stats: {stats}")
+
+        run = {
+            "run_id": run_id,
+            "started_utc": datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            "seconds": round(time.time() - started, 3),
+            "seed": streams.seed,
+            "engine": args["global"].get("engine", "simpy"),
+            "simulation_time": args["global"]["simulation_time"],
+            "data_dir": data_dir,
+            "event_log": final_json_path,
+            "observations": [timing["path"] for timing in timings],
+            "stats": stats,
+        }
+        if index_run:
+            append_run_index(runs_dir, run)
+        return run
+    finally:
+        sink.close()
+        if spill_dir:
+            shutil.rmtree(spill_dir, ignore_errors=True)
 
 if __name__ == "__main__":
     import sys, json
@@ -149,11 +277,12 @@ if __name__ == "__main__":
         stdin_data = sys.stdin.read()
         if stdin_data and stdin_data.strip():
             args = json.loads(stdin_data)
-            print("✅ Using config from frontend")
-            print(json.dumps(args, indent=2))
-        else:
+            if is_verbose(args):
+                print("✅ Using config from frontend")
+                print(json.dumps(args, indent=2))
+        elif is_verbose(load_defaults()):
             print("ℹ️ No stdin config supplied, using defaults")
     except json.JSONDecodeError as e:
-        print(f"⚠️ Failed to parse stdin JSON ({e}), falling back to defaults")
+        print(f"⚠️ Failed to parse stdin JSON ({e}), falling back to defaults", file=sys.stderr)
 
     main(args)
@@ -0,0 +1,171 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import Main
+from helpers.experiments import KPI_FIELDS, apply_params, make_pool, run_experiment, run_seed, terminate_pool
+from helpers.replication import RunningStats
+from helpers.run_registry import append_run_index
+
+# Independent seeded replications of one configuration, run until every
+# KPI's confidence interval is as narrow as asked for.
+#
+#   python Replicate.py [spec.json] [--workers N] [--base args.json]
+#
+# spec.json (every key optional):
+#   {
+#     "name": "baseline",
+#     "seed": 1,                                  # replication i uses run_seed(seed, i)
+#     "base": {"global.simulation_time": 6000},  # overrides, as in Sweep.py
+#     "params": {"machines.cheese_presser.block_weight": 27},
+#     "confidence": 0.95,
+#     "min_replications": 5,
+#     "max_replications": 200,
+#     "targets": {"milk_burnt_L": {"relative": 0.05}, "mean_block_kg": {"absolute": 0.1}}
+#   }
+#
+# Results are folded into the running statistics in replication order, so
+# the stopping point does not depend on which worker finishes first. Rows
+# go to data/replications/<name>/replications.csv and the intervals to
+# summary.json next to it.
+#
+# The runner keeps every worker busy, so some replications start before it is
+# known whether they are needed. Runs are only added to data/runs/index.ndjson
+# once folded in; when the target is met, replications still running are
+# killed and the directories of every unfolded replication are removed.
+
+REPLICATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "replications")
+RUNS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "runs")
+
+DEFAULT_TARGETS = {
+    "milk_pasteurised_L": {"relative": 0.01},
+    "milk_burnt_L": {"relative": 0.05},
+    "curd_yield_percent": {"relative": 0.01},
+    "mean_block_kg": {"relative": 0.01},
+}
+
+
+def precise_enough(stats, targets, confidence):
+    return all(stats[kpi].meets(target, confidence) for kpi, target in targets.items())
+
+
+def replicate(spec, base_args, workers=None):
+    name = spec.get("name", "replication")
+    base_seed = spec.get("seed", 0)
+    params = spec.get("params", {})
+    confidence = spec.get("confidence", 0.95)
+    # Fewer than 3 replications leave too few degrees of freedom for the stopping rule to trust
+    min_replications = max(spec.get("min_replications", 5), 3)
+    max_replications = spec.get("max_replications", 200)
+    targets = spec.get("targets", DEFAULT_TARGETS)
+    unknown = set(targets) - set(KPI_FIELDS)
+    if unknown:
+        raise SystemExit(f"Unknown KPIs in targets: {sorted(unknown)}; choose from {list(KPI_FIELDS)}")
+
+    out_dir = os.path.join(REPLICATIONS_DIR, name)
+    os.makedirs(out_dir, exist_ok=True)
+    base_args = apply_params(base_args, spec.get("base", {}))
+    stats = {kpi: RunningStats() for kpi in targets}
+    workers = workers or os.cpu_count() or 1
+
+    fields = ["run_id", "replication", "seed", "status", "error"] + list(params) + list(KPI_FIELDS) + ["seconds"]
+    finished = {}
+    unfolded = {}
+    folded = 0
+    submitted = 0
+    stopped_by = "max_replications"
+    # Replications share one configuration, so workers are reused between runs
+    pool = make_pool(workers, fresh_workers=False)
+    try:
+        with open(os.path.join(out_dir, "replications.csv"), "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            running = {}
+            while folded < max_replications:
+                # Keep every worker busy until the precision target is met
+                while len(running) < workers and submitted < max_replications:
+                    run_id = f"{name}-r{submitted:05d}"
+                    seed = run_seed(base_seed, submitted)
+                    output_dir = os.path.join(out_dir, "runs", run_id)
+                    future = pool.submit(run_experiment, base_args, params, seed, run_id=run_id, output_dir=output_dir, index_run=False)
+                    running[future] = (submitted, run_id, seed)
+                    unfolded[submitted] = output_dir
+                    submitted += 1
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, run_id, seed = running.pop(future)
+                    try:
+                        row = dict(future.result(), status="ok")
+                    except Exception as e:
+                        row = dict(params, run_id=run_id, seed=seed, status="failed", error=str(e))
+                    row["replication"] = index
+                    finished[index] = row
+
+                before = folded
+                while folded in finished:
+                    row = finished.pop(folded)
+                    del unfolded[folded]
+                    writer.writerow(row)
+                    if row["status"] == "ok":
+                        append_run_index(RUNS_DIR, row.pop("run"))
+                        for kpi, kpi_stats in stats.items():
+                            if row.get(kpi) is not None:
+                                kpi_stats.add(row[kpi])
+                    folded += 1
+                    if folded >= min_replications and precise_enough(stats, targets, confidence):
+                        stopped_by = "precision"
+                        break
+                if folded == before:
+                    continue
+                f.flush()
+                print(f"{folded} replications: " + ", ".join(f"{kpi} {s.mean:.4g} ± {s.half_width(confidence):.3g}" for kpi, s in stats.items()), flush=True)
+                if stopped_by == "precision":
+                    break
+    finally:
+        # Stop now: queued replications are cancelled, running ones killed, and unused outputs removed
+        terminate_pool(pool)
+        for output_dir in unfolded.values():
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    summary = {
+        "name": name,
+        "params": params,
+        "confidence": confidence,
+        "replications": folded,
+        "stopped_by": stopped_by,
+        "kpis": {kpi: s.summary(confidence, targets[kpi]) for kpi, s in stats.items()},
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replicate one configuration until its KPIs are precise enough")
+    parser.add_argument("spec", nargs="?", help="replication spec JSON file (default: args.json as is)")
+    parser.add_argument("--base", help="base args file (default: Backend/args.json)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    options = parser.parse_args()
+
+    spec = {}
+    if options.spec:
+        with open(options.spec) as f:
+            spec = json.load(f)
+    if options.base:
+        with open(options.base) as f:
+            base_args = json.load(f)
+    else:
+        base_args = Main.load_defaults()
+    summary = replicate(spec, base_args, workers=options.workers)
+    print(f"Stopped after {summary['replications']} replications ({summary['stopped_by']})")
+    for kpi, kpi_summary in summary["kpis"].items():
+        low, high = kpi_summary["ci"]
+        print(f"  {kpi}: {kpi_summary['mean']:.4f} [{low:.4f}, {high:.4f}] {'met' if kpi_summary['met'] else 'not met'}")
+
+
+if __name__ == "__main__":
+    main()
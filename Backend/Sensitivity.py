@@ -0,0 +1,151 @@
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import as_completed
+
+import numpy as np
+
+import Main
+from helpers.experiments import KPI_FIELDS, apply_params, make_pool, run_experiment, run_seed
+from helpers.sensitivity import morris_indices, morris_sample, saltelli_sample, scale_samples, sobol_indices, unscale_samples
+
+# Global sensitivity analysis of pipeline outputs to machine parameters.
+#
+#   python Sensitivity.py spec.json [--workers N] [--base args.json]
+#
+# spec.json:
+#   {
+#     "name": "vat-presser",
+#     "method": "morris",              # or "sobol" (Saltelli design)
+#     "seed": 1,
+#     "parameters": {                  # [low, high] per dotted args path
+#       "machines.cheese_vat.vat_batch_size": [5000, 20000],
+#       "machines.cheese_presser.block_weight": [20, 35]
+#     },
+#     "metrics": ["pressed_kg", "milk_burnt_L", "seconds"],
+#     "trajectories": 20, "levels": 4, # morris
+#     "samples": 256,                  # sobol: base sample size n
+#     "replications": 1,               # seeds each point is averaged over
+#     "base": {"global.simulation_time": 6000}
+#   }
+#
+# Every design point is run with the same replication seeds (common random
+# numbers), so differences between points come from the parameters rather
+# than from the draws. Workers are reused across evaluations and each
+# run's output directory is removed once its KPIs are read. The sample
+# table goes to data/sensitivity/<name>/samples.csv and the indices to
+# indices.json next to it.
+
+SENSITIVITY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sensitivity")
+METHODS = ("morris", "sobol")
+
+
+def build_sample(spec, k):
+    method = spec.get("method", "morris")
+    seed = spec.get("seed", 0)
+    if method == "morris":
+        return morris_sample(k, spec.get("trajectories", 20), levels=spec.get("levels", 4), seed=seed)
+    if method == "sobol":
+        return saltelli_sample(k, spec.get("samples", 256), seed=seed)
+    raise SystemExit(f"method must be one of {METHODS}, got {method!r}")
+
+
+def evaluate(spec, base_args, design, paths, metrics, out_dir, workers=None):
+    """Mean of every metric at every design point, shape (points, metrics)."""
+    name = spec.get("name", "sensitivity")
+    seeds = [run_seed(spec.get("seed", 0), r) for r in range(spec.get("replications", 1))]
+    totals = np.zeros((len(design), len(metrics)))
+    runs = len(design) * len(seeds)
+    with make_pool(workers, fresh_workers=False) as pool:
+        futures = {}
+        for point, values in enumerate(design):
+            params = dict(zip(paths, values))
+            for replication, seed in enumerate(seeds):
+                run_id = f"{name}-{point:05d}-r{replication}"
+                output_dir = os.path.join(out_dir, "runs", run_id)
+                future = pool.submit(run_experiment, base_args, params, seed, run_id=run_id, output_dir=output_dir, keep_outputs=False)
+                futures[future] = point
+        for finished, future in enumerate(as_completed(futures), 1):
+            try:
+                row = future.result()
+            except Exception as e:
+                print(f"Run for point {futures[future]} failed: {e}", flush=True)
+                row = {}
+            # A failed run or a KPI the run never reached counts as NaN and shows up in its indices
+            totals[futures[future]] += [np.nan if row.get(m) is None else row[m] for m in metrics]
+            if finished % 50 == 0 or finished == runs:
+                print(f"[{finished}/{runs}] runs done", flush=True)
+    return totals / len(seeds)
+
+
+def run_analysis(spec, base_args, workers=None):
+    name = spec.get("name", "sensitivity")
+    method = spec.get("method", "morris")
+    parameters = spec["parameters"]
+    paths = list(parameters)
+    metrics = spec.get("metrics", ["pressed_kg", "milk_burnt_L", "seconds"])
+    unknown = set(metrics) - set(KPI_FIELDS) - {"seconds"}
+    if unknown:
+        raise SystemExit(f"Unknown metrics {sorted(unknown)}; choose from {list(KPI_FIELDS) + ['seconds']}")
+
+    out_dir = os.path.join(SENSITIVITY_DIR, name)
+    os.makedirs(out_dir, exist_ok=True)
+    base_args = apply_params(base_args, spec.get("base", {}))
+    unit = build_sample(spec, len(paths))
+    bounds = [tuple(parameters[p]) for p in paths]
+    design = scale_samples(unit, bounds)
+    print(f"{method}: {len(paths)} parameters, {len(design)} points x {spec.get('replications', 1)} replications")
+
+    outputs = evaluate(spec, base_args, design, paths, metrics, out_dir, workers=workers)
+    with open(os.path.join(out_dir, "samples.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(paths + metrics)
+        for values, y in zip(design, outputs.tolist()):
+            writer.writerow(values + y)
+
+    indices = {}
+    for column, metric in enumerate(metrics):
+        y = outputs[:, column]
+        if method == "morris":
+            # Effects use the values actually run, which integer bounds round
+            result = morris_indices(unit, y, applied=unscale_samples(design, bounds))
+        else:
+            result = sobol_indices(y, len(paths), seed=spec.get("seed", 0))
+        indices[metric] = {
+            path: {index: values[i].item() for index, values in result.items()}
+            for i, path in enumerate(paths)
+        }
+    report = {"name": name, "method": method, "parameters": parameters, "points": len(design), "indices": indices}
+    with open(os.path.join(out_dir, "indices.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Morris / Sobol sensitivity analysis over args.json parameters")
+    parser.add_argument("spec", help="sensitivity spec JSON file")
+    parser.add_argument("--base", help="base args file (default: Backend/args.json)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    options = parser.parse_args()
+
+    with open(options.spec) as f:
+        spec = json.load(f)
+    if options.base:
+        with open(options.base) as f:
+            base_args = json.load(f)
+    else:
+        base_args = Main.load_defaults()
+    report = run_analysis(spec, base_args, workers=options.workers)
+
+    # Most influential parameter first for each metric
+    ranking = "mu_star" if report["method"] == "morris" else "ST"
+    for metric, by_path in report["indices"].items():
+        print(f"{metric}:")
+        # Factors whose effects were all skipped (NaN) go last
+        for path, values in sorted(by_path.items(), key=lambda item: (np.isnan(item[1][ranking]), -abs(item[1][ranking]))):
+            print("  " + path + "  " + "  ".join(f"{index}={value:.4g}" for index, value in values.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import contextlib
+import json
+import os
+import socket
+import sys
+import time
+import traceback
+import uuid
+
+# Importing Main pulls in SimPy, NumPy and every machine once, up front
+import Main
+
+# Resident simulation worker: one warm interpreter runs jobs back to back
+# instead of paying interpreter start-up and imports for every run.
+#
+#   python -u SimWorker.py                  jobs on stdin, messages on stdout
+#   python -u SimWorker.py --socket PATH    jobs over a local Unix socket
+#
+# A job is one JSON line: {"job_id": "...", "args": {...}}, where args is
+# what Main.main accepts (omit it for args.json). A bare args object is
+# accepted too. Each job is a run whose run ID is the job_id, so it writes
+# into data/runs/<job_id> unless "output_dir" is given. While a job runs
+# its event stream goes to the same output as usual; when it ends the
+# worker writes one {"type": "job_complete", ...} or
+# {"type": "job_failed", ...} line.
+
+
+def parse_job(line):
+    job = json.loads(line)
+    if "args" not in job and ("global" in job or "machines" in job):
+        job = {"args": job}
+    job.setdefault("job_id", uuid.uuid4().hex[:12])
+    return job
+
+
+def run_job(job):
+    """Run one job and return the completion message."""
+    started = time.perf_counter()
+    try:
+        result = Main.main(job.get("args"), output_dir=job.get("output_dir"), run_id=job["job_id"])
+    except Exception as e:
+        traceback.print_exc(file=sys.stderr)
+        return {"type": "job_failed", "job_id": job["job_id"], "error": str(e)}
+    finally:
+        # Main closes the event log itself; the run log's handlers are released here, pass or fail
+        Main.release_logging()
+    return {
+        "type": "job_complete",
+        "job_id": job["job_id"],
+        "output_dir": result["data_dir"],
+        "event_log": result["event_log"],
+        "seed": result["seed"],
+        "events_written": result["stats"].get("events_written"),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def send(message, out):
+    out.write(json.dumps(message) + "\n")
+    out.flush()
+
+
+def handle_lines(lines, out):
+    """Run every job line from `lines`, writing events and messages to `out`."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            job = parse_job(line)
+        except json.JSONDecodeError as e:
+            send({"type": "job_failed", "job_id": None, "error": f"Invalid job JSON: {e}"}, out)
+            continue
+        with contextlib.redirect_stdout(out):
+            message = run_job(job)
+        send(message, out)
+
+
+def serve_stdin():
+    send({"type": "ready", "pid": os.getpid()}, sys.stdout)
+    handle_lines(sys.stdin, sys.stdout)
+
+
+def serve_socket(path):
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    print(json.dumps({"type": "ready", "pid": os.getpid(), "socket": path}), flush=True)
+    try:
+        while True:
+            conn, _ = server.accept()
+            # One client at a time: jobs still run strictly back to back
+            with conn, conn.makefile("r") as reader, conn.makefile("w") as writer:
+                try:
+                    handle_lines(reader, writer)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+    finally:
+        server.close()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--socket":
+        serve_socket(sys.argv[2])
+    else:
+        serve_stdin()
@@ -0,0 +1,138 @@
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import as_completed
+
+import Main
+from helpers.experiments import KPI_FIELDS, apply_params, grid_design, make_pool, random_design, run_experiment, run_seed
+
+# Parameter sweep over args.json variants, one pipeline run per design point.
+#
+#   python Sweep.py design.json [--workers N] [--base args.json]
+#
+# design.json:
+#   {
+#     "name": "batch-size",                      # sweep directory and run ID prefix
+#     "seed": 1,                                 # per-run seeds are derived from it
+#     "base": {"global.simulation_time": 3000},  # optional overrides for every run
+#     "grid": {"machines.cheese_vat.vat_batch_size": [5000, 10000, 20000]}
+#     -- or --
+#     "random": {"runs": 50, "space": {"machines.cheese_presser.block_weight": [20, 35]}}
+#   }
+#
+# Results go to data/sweeps/<name>/results.csv, one row per run as it
+# finishes, with each run's outputs under data/sweeps/<name>/runs/<run_id>.
+# Re-running the same design skips every run that finished, so an
+# interrupted sweep picks up where it stopped; failed runs are tried again
+# and their old rows dropped from the results.
+
+SWEEPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sweeps")
+
+
+def build_design(spec):
+    if "grid" in spec:
+        return grid_design(spec["grid"])
+    if "random" in spec:
+        random_spec = spec["random"]
+        return random_design(random_spec["space"], random_spec["runs"], seed=spec.get("seed"))
+    raise ValueError('design needs a "grid" or "random" section')
+
+
+def load_design(sweep_dir, design):
+    """The sweep's design; a resumed sweep must use the one it started with."""
+    path = os.path.join(sweep_dir, "design.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+        if saved != design:
+            raise SystemExit(f"{path} holds a different design; use a new sweep name")
+        return saved
+    os.makedirs(sweep_dir, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(design, f, indent=2)
+    return design
+
+
+def completed_runs(results_path):
+    """IDs of the runs that finished; rows of failed runs are removed so a retry does not duplicate them."""
+    if not os.path.exists(results_path):
+        return set()
+    with open(results_path, newline="") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    ok = [row for row in rows if row.get("status") == "ok"]
+    if len(ok) < len(rows):
+        with open(results_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=reader.fieldnames)
+            writer.writeheader()
+            writer.writerows(ok)
+    return {row["run_id"] for row in ok}
+
+
+def run_sweep(spec, base_args, workers=None, fresh_workers=True):
+    name = spec.get("name", "sweep")
+    base_seed = spec.get("seed", 0)
+    sweep_dir = os.path.join(SWEEPS_DIR, name)
+    design = load_design(sweep_dir, build_design(spec))
+    base_args = apply_params(base_args, spec.get("base", {}))
+
+    results_path = os.path.join(sweep_dir, "results.csv")
+    done = completed_runs(results_path)
+    pending = []
+    for index, params in enumerate(design):
+        run_id = f"{name}-{index:05d}"
+        if run_id not in done:
+            pending.append((index, run_id, params))
+    print(f"Sweep {name}: {len(design)} runs, {len(done)} already done, {len(pending)} to run")
+    if not pending:
+        return results_path
+
+    param_fields = list(dict.fromkeys(path for params in design for path in params))
+    fields = ["run_id", "index", "seed", "status", "error"] + param_fields + list(KPI_FIELDS) + ["seconds"]
+    write_header = not os.path.exists(results_path)
+    with open(results_path, "a", newline="") as f, make_pool(workers, fresh_workers) as pool:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        if write_header:
+            writer.writeheader()
+        futures = {}
+        for index, run_id, params in pending:
+            seed = run_seed(base_seed, index)
+            output_dir = os.path.join(sweep_dir, "runs", run_id)
+            future = pool.submit(run_experiment, base_args, params, seed, run_id=run_id, output_dir=output_dir)
+            futures[future] = (index, run_id, seed, params)
+
+        for finished, future in enumerate(as_completed(futures), 1):
+            index, run_id, seed, params = futures[future]
+            try:
+                row = dict(future.result(), status="ok")
+            except Exception as e:
+                row = dict(params, run_id=run_id, seed=seed, status="failed", error=str(e))
+            row["index"] = index
+            writer.writerow(row)
+            # Every finished run is on disk before the next is reported
+            f.flush()
+            print(f"[{finished}/{len(pending)}] {run_id} {row['status']}", flush=True)
+    return results_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parameter sweep over args.json variants")
+    parser.add_argument("design", help="sweep design JSON file")
+    parser.add_argument("--base", help="base args file (default: Backend/args.json)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    options = parser.parse_args()
+
+    with open(options.design) as f:
+        spec = json.load(f)
+    if options.base:
+        with open(options.base) as f:
+            base_args = json.load(f)
+    else:
+        base_args = Main.load_defaults()
+    results_path = run_sweep(spec, base_args, workers=options.workers)
+    print(f"Results: {results_path}")
+
+
+if __name__ == "__main__":
+    main()
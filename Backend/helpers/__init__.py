@@ -1,4 +1,4 @@
-from .patched_environment import TimeMode, create_env
+from .patched_environment import TimeMode, create_env, create_store
 from .pasteuriser_to_vat import pasteuriser_to_vat
 from .vat_to_cutter import vat_to_cutter
 from .cutter_to_whey import cutter_to_whey
@@ -7,5 +7,14 @@ from .cheddaring_to_salting import cheddaring_to_salting
 from .salting_to_presser import salting_to_presser
 from .presser_to_ripener import presser_to_ripener
 from .clock import Clock
-from .ndjson_logger import NdjsonLogger
+from .ndjson_logger import NdjsonLogger, AsyncNdjsonLogger
+from .event_sampling import EventSampler, DeadbandFilter
+from .observer_store import ObserverStore
 
+from .observation_export import export_observations, save_observations
+from .coalescing_store import CoalescingStore, create_coalescing_store
+from .random_streams import RandomStreams, RandomStream
+from .run_registry import new_run_id, create_run_dir, append_run_index, load_run_index
+from .experiments import KPI_FIELDS, apply_params, grid_design, random_design, run_seed, extract_kpis, ExperimentPool, make_pool, terminate_pool, run_experiment
+from .replication import RunningStats, t_quantile
+from .sensitivity import scale_samples, unscale_samples, morris_sample, morris_indices, saltelli_sample, sobol_indices
@@ -0,0 +1,32 @@
+import simpy
+
+from . import fast_env
+
+
+class _Coalescing:
+    def get_until(self, volume):
+        """Event that fires when `volume` has accumulated, taking it from the pool."""
+        return self.get(volume)
+
+
+class CoalescingStore(_Coalescing, simpy.Container):
+    """Conveyor for float-valued flows (litres, kg) that pools volume instead of queuing items.
+
+    Producers put() amounts exactly as they would onto a simpy.Store, but
+    the amounts are added to a single level rather than kept as separate
+    items. Consumers call get_until(volume), which fires only once the
+    pooled level reaches `volume` and then takes exactly that much, so a
+    consumer waiting for a batch wakes once per batch instead of once per
+    put.
+    """
+
+
+class FastCoalescingStore(_Coalescing, fast_env.Container):
+    """CoalescingStore for the fast engine (see helpers.fast_env)."""
+
+
+def create_coalescing_store(env):
+    """A CoalescingStore matching the engine `env` belongs to."""
+    if isinstance(env, fast_env.FastEnvironment):
+        return FastCoalescingStore(env)
+    return CoalescingStore(env)
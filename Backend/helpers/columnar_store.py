@@ -0,0 +1,393 @@
+import json
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+# Column kinds as stored on disk:
+#
+# - "i8": ints, in the narrowest signed dtype holding the chunk; the dtype's
+#   minimum marks missing values
+# - "f8": float64, NaN for missing
+# - "n8": chunks mixing ints and floats: float64 values plus an int8
+#   `<field>.<chunk>.int.npy` file flagging the rows that were ints, so
+#   both round-trip with their original type
+# - "b1": bools as int8, -1 for missing
+# - "str": dictionary codes (narrowest signed dtype, -1 for missing) into the
+#   run-wide dictionary; only for the low-cardinality `dictionary_fields`
+# - "ts": ISO-8601 UTC timestamps as int64 epoch microseconds, I8_MISSING
+#   for missing
+# - "utf8" / "json": any other string / the JSON text of any other value, as
+#   UTF-8 bytes plus int64 row offsets in `<field>.<chunk>.offsets.npy`
+# - "const": a number, bool or None shared by every row of the chunk, kept in
+#   the manifest's "constants" instead of a file
+#
+# A chunk's "absent" list names fields that some rows did not have at all
+# (`<field>.<chunk>.absent.npy` flags those rows) and "nulls" names utf8/json
+# fields holding None (`<field>.<chunk>.null.npy`), so explicit nulls and
+# missing keys both round-trip.
+DICTIONARY_FIELDS = ("machine", "status", "phase")
+
+I8_MISSING = np.iinfo(np.int64).min
+
+MANIFEST_NAME = "manifest.json"
+DICTIONARY_NAME = "dictionary.json"
+
+# Machine directory for events without a machine name
+OTHERS_MACHINE = "_others"
+
+_INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _scalar_kind(value: Any) -> Optional[str]:
+    if isinstance(value, bool):
+        return "b1"
+    if isinstance(value, int):
+        return "i8" if I8_MISSING < value <= np.iinfo(np.int64).max else "json"
+    if isinstance(value, float):
+        return "f8"
+    if isinstance(value, str):
+        return "utf8"
+    return None if value is None else "json"
+
+
+def _infer_kind(values: List[Any]) -> str:
+    """Pick the narrowest column kind able to hold every value of a chunk."""
+    kinds = {_scalar_kind(v) for v in values}
+    kinds.discard(None)
+    if not kinds:
+        return "f8"
+    if len(kinds) == 1:
+        return kinds.pop()
+    if kinds <= {"i8", "f8"}:
+        return "n8"
+    return "json"
+
+
+def _is_constant(values: List[Any]) -> bool:
+    first = values[0]
+    if _scalar_kind(first) not in (None, "b1", "i8", "f8") or first != first:
+        # Only numbers, bools and None go to the manifest (NaN never equals itself)
+        return False
+    kind = type(first)
+    return all(type(v) is kind and v == first for v in values)
+
+
+def _timestamp_us(text: str) -> Optional[int]:
+    """Epoch microseconds of an ISO-8601 UTC timestamp, or None unless it formats back to `text`."""
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if moment.utcoffset() != timedelta(0) or moment.isoformat() != text:
+        return None
+    delta = moment - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _timestamp_text(us: int) -> str:
+    return (_EPOCH + timedelta(microseconds=us)).isoformat()
+
+
+def _int_dtype(low: int, high: int):
+    """Narrowest signed dtype whose minimum stays free as the missing marker."""
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min < low and high <= info.max:
+            return dtype
+    return np.int64
+
+
+def _chunk_path(root: str, machine: str, field: str, chunk_idx: int, suffix: str = "") -> str:
+    return os.path.join(root, machine, f"{field}.{chunk_idx:05d}{suffix}.npy")
+
+
+class ColumnarEventWriter:
+    """Write event dicts as typed, per-machine, per-field NumPy column chunks.
+
+    Events are buffered per machine and written every `chunk_size` rows as
+    one `.npy` file per field: `<root>/<machine>/<field>.<chunk>.npy`.
+    Strings in `dictionary_fields` (machine, status, phase) are
+    dictionary-encoded against a single run-wide dictionary; timestamps are
+    stored as epoch microseconds and fields constant over a chunk only in
+    the manifest (see the column kinds above). close() flushes the last chunks and
+    writes `manifest.json` and `dictionary.json`, after which the directory
+    can be opened with ColumnarEventReader.
+    """
+
+    def __init__(self, root: str, chunk_size: int = 4096, dictionary_fields=DICTIONARY_FIELDS):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.dictionary_fields = frozenset(dictionary_fields)
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root)
+
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._machines: Dict[str, Dict[str, Any]] = {}
+        self._codes: Dict[str, int] = {}
+        self._dictionary: List[str] = []
+        self.bytes_written = 0
+        self.closed = False
+
+    def append(self, event: Dict[str, Any]) -> None:
+        machine = event.get("machine") or OTHERS_MACHINE
+        rows = self._pending.get(machine)
+        if rows is None:
+            rows = self._pending[machine] = []
+            self._machines[machine] = {"rows": 0, "chunks": []}
+            os.makedirs(os.path.join(self.root, machine), exist_ok=True)
+        rows.append(event)
+        if len(rows) >= self.chunk_size:
+            self._flush_machine(machine)
+
+    def _code(self, text: str) -> int:
+        code = self._codes.get(text)
+        if code is None:
+            code = self._codes[text] = len(self._dictionary)
+            self._dictionary.append(text)
+        return code
+
+    def _kind(self, field: str, values: List[Any]) -> str:
+        if _is_constant(values):
+            return "const"
+        kind = _infer_kind(values)
+        if kind == "utf8":
+            if field in self.dictionary_fields:
+                return "str"
+            if all(v is None or _timestamp_us(v) is not None for v in values):
+                return "ts"
+        return kind
+
+    def _save(self, path: str, array: np.ndarray) -> None:
+        np.save(path, array)
+        self.bytes_written += os.path.getsize(path)
+
+    def _write_column(self, machine: str, field: str, chunk_idx: int, kind: str, values: List[Any]) -> bool:
+        """Write one chunk of a column; returns whether it holds None values needing a null mask."""
+        path = _chunk_path(self.root, machine, field, chunk_idx)
+        if kind == "i8":
+            ints = [v for v in values if v is not None]
+            dtype = _int_dtype(min(ints), max(ints))
+            self._save(path, np.array([np.iinfo(dtype).min if v is None else v for v in values], dtype=dtype))
+        elif kind in ("f8", "n8"):
+            self._save(path, np.array([np.nan if v is None else v for v in values], dtype=np.float64))
+            if kind == "n8":
+                flags = np.array([type(v) is int for v in values], dtype=np.int8)
+                self._save(_chunk_path(self.root, machine, field, chunk_idx, ".int"), flags)
+        elif kind == "b1":
+            self._save(path, np.array([-1 if v is None else int(v) for v in values], dtype=np.int8))
+        elif kind == "str":
+            codes = [-1 if v is None else self._code(v) for v in values]
+            self._save(path, np.array(codes, dtype=_int_dtype(0, max(codes))))
+        elif kind == "ts":
+            self._save(path, np.array([I8_MISSING if v is None else _timestamp_us(v) for v in values], dtype=np.int64))
+        else:
+            texts = [b"" if v is None else (v if kind == "utf8" else json.dumps(v)).encode("utf-8") for v in values]
+            offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+            np.cumsum([len(t) for t in texts], out=offsets[1:])
+            self._save(path, np.frombuffer(b"".join(texts), dtype=np.uint8))
+            self._save(_chunk_path(self.root, machine, field, chunk_idx, ".offsets"), offsets)
+            nulls = np.array([v is None for v in values], dtype=np.int8)
+            if nulls.any():
+                self._save(_chunk_path(self.root, machine, field, chunk_idx, ".null"), nulls)
+                return True
+        return False
+
+    def _flush_machine(self, machine: str) -> None:
+        rows = self._pending[machine]
+        if not rows:
+            return
+        fields: Dict[str, None] = {}
+        for row in rows:
+            fields.update(dict.fromkeys(row))
+
+        meta = self._machines[machine]
+        chunk_idx = len(meta["chunks"])
+        chunk: Dict[str, Any] = {"rows": len(rows), "columns": {}}
+        for field in fields:
+            absent = np.array([field not in row for row in rows], dtype=np.int8)
+            if absent.any():
+                self._save(_chunk_path(self.root, machine, field, chunk_idx, ".absent"), absent)
+                chunk.setdefault("absent", []).append(field)
+            values = [row.get(field) for row in rows]
+            kind = self._kind(field, [row[field] for row in rows if field in row])
+            if kind == "const":
+                chunk.setdefault("constants", {})[field] = next(row[field] for row in rows if field in row)
+            elif self._write_column(machine, field, chunk_idx, kind, values):
+                chunk.setdefault("nulls", []).append(field)
+            chunk["columns"][field] = kind
+
+        meta["chunks"].append(chunk)
+        meta["rows"] += len(rows)
+        self._pending[machine] = []
+
+    def close(self) -> None:
+        """Flush all pending chunks and write the manifest and dictionary."""
+        if self.closed:
+            return
+        for machine in self._pending:
+            self._flush_machine(machine)
+        manifest = {"version": 2, "chunk_size": self.chunk_size, "machines": self._machines}
+        for name, payload in ((MANIFEST_NAME, manifest), (DICTIONARY_NAME, self._dictionary)):
+            path = os.path.join(self.root, name)
+            with open(path, "w") as f:
+                json.dump(payload, f)
+            self.bytes_written += os.path.getsize(path)
+        self.closed = True
+
+
+class ColumnarEventReader:
+    """Read a directory written by ColumnarEventWriter.
+
+    Column chunks are opened with `np.load(mmap_mode="r")`, so chunks() and
+    single-chunk column() calls never copy the data into memory. Dictionary
+    columns come back as codes (use decode() or `dictionary` to map them
+    back to text), timestamps as int64 epoch microseconds, and utf8/json
+    columns as object arrays of their values. Missing ints are the minimum
+    of the chunk's dtype.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        with open(os.path.join(root, MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(root, DICTIONARY_NAME)) as f:
+            self.dictionary: List[str] = json.load(f)
+
+    def machines(self) -> List[str]:
+        return list(self.manifest["machines"])
+
+    def rows(self, machine: str) -> int:
+        return self.manifest["machines"][machine]["rows"]
+
+    def fields(self, machine: str) -> List[str]:
+        fields: Dict[str, None] = {}
+        for chunk in self.manifest["machines"][machine]["chunks"]:
+            fields.update(dict.fromkeys(chunk["columns"]))
+        return list(fields)
+
+    @staticmethod
+    def _chunk_kind(chunk: Dict[str, Any], field: str) -> Optional[str]:
+        kind = chunk["columns"].get(field)
+        if kind == "const":
+            return _scalar_kind(chunk["constants"][field])
+        return kind
+
+    def kind(self, machine: str, field: str) -> Optional[str]:
+        """Common kind of a column across chunks, or None if the chunks disagree."""
+        kinds = {self._chunk_kind(c, field) for c in self.manifest["machines"][machine]["chunks"]}
+        kinds.discard(None)
+        if not kinds:
+            return "f8"
+        if len(kinds) == 1:
+            return kinds.pop()
+        if kinds <= {"i8", "f8", "n8"}:
+            return "f8"
+        return None
+
+    def _load(self, machine: str, field: str, idx: int, suffix: str = "") -> np.ndarray:
+        return np.load(_chunk_path(self.root, machine, field, idx, suffix), mmap_mode="r")
+
+    def chunks(self, machine: str, field: str) -> Iterator[np.ndarray]:
+        """Yield the chunks of one column, memory-mapped where stored as a single array.
+
+        Constant chunks, and chunks in which the field never appeared, are
+        yielded as filled arrays so chunk lengths always line up with rows().
+        """
+        for idx, chunk in enumerate(self.manifest["machines"][machine]["chunks"]):
+            kind = chunk["columns"].get(field)
+            if kind == "const":
+                value = chunk["constants"][field]
+                yield np.full(chunk["rows"], np.nan if value is None else value)
+            elif kind is None:
+                column_kind = self.kind(machine, field)
+                missing = {"str": -1, "b1": -1, "ts": I8_MISSING}.get(column_kind, np.nan)
+                yield np.full(chunk["rows"], missing)
+            elif kind in ("utf8", "json"):
+                yield np.array(self._decode_chunk(chunk, machine, field, idx), dtype=object)
+            else:
+                yield self._load(machine, field, idx)
+
+    def column(self, machine: str, field: str) -> np.ndarray:
+        """Return one whole column; memory-mapped when it is a single stored chunk.
+
+        Columns spanning several chunks are rebuilt as int64 (I8_MISSING for
+        missing ints), float64 (NaN), int8 bools, int64 codes or timestamps,
+        or as an object array of values for text or when the chunks' kinds
+        disagree.
+        """
+        parts = list(self.chunks(machine, field))
+        if len(parts) == 1:
+            return parts[0]
+        kind = self.kind(machine, field)
+        if kind in ("str", "ts"):
+            return np.concatenate([np.asarray(p, dtype=np.int64) for p in parts])
+        values = self.decode(machine, field)
+        if kind == "i8":
+            return np.array([I8_MISSING if v is None else v for v in values], dtype=np.int64)
+        if kind in ("f8", "n8"):
+            return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        if kind == "b1":
+            return np.array([-1 if v is None else int(v) for v in values], dtype=np.int8)
+        return np.array(values, dtype=object)
+
+    def decode(self, machine: str, field: str) -> List[Any]:
+        """Return a column as plain Python values (strings decoded, null or missing as None)."""
+        values: List[Any] = []
+        for idx, chunk in enumerate(self.manifest["machines"][machine]["chunks"]):
+            values.extend(self._decode_chunk(chunk, machine, field, idx))
+        return values
+
+    def _decode_chunk(self, chunk: Dict[str, Any], machine: str, field: str, idx: int) -> List[Any]:
+        kind = chunk["columns"].get(field)
+        if kind is None:
+            return [None] * chunk["rows"]
+        if kind == "const":
+            return [chunk["constants"][field]] * chunk["rows"]
+        data = self._load(machine, field, idx)
+        if kind == "i8":
+            missing = np.iinfo(data.dtype).min
+            return [None if v == missing else v for v in data.tolist()]
+        if kind == "f8":
+            return [None if v != v else v for v in data.tolist()]
+        if kind == "n8":
+            flags = self._load(machine, field, idx, ".int").tolist()
+            return [None if v != v else (int(v) if is_int else v) for v, is_int in zip(data.tolist(), flags)]
+        if kind == "b1":
+            return [None if v < 0 else bool(v) for v in data.tolist()]
+        if kind == "str":
+            return [None if c < 0 else self.dictionary[c] for c in data.tolist()]
+        if kind == "ts":
+            return [None if v == I8_MISSING else _timestamp_text(v) for v in data.tolist()]
+        blob = data.tobytes()
+        offsets = self._load(machine, field, idx, ".offsets").tolist()
+        values = [blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+        if kind == "json":
+            values = [json.loads(text) if text else None for text in values]
+        if field in chunk.get("nulls", ()):
+            for row in np.flatnonzero(self._load(machine, field, idx, ".null")).tolist():
+                values[row] = None
+        return values
+
+    def iter_records(self, machine: str) -> Iterator[Dict[str, Any]]:
+        """Rebuild event dicts for one machine, one chunk at a time.
+
+        Explicit None values are kept; keys a row did not have are left out.
+        """
+        for idx, chunk in enumerate(self.manifest["machines"][machine]["chunks"]):
+            columns = []
+            for field in chunk["columns"]:
+                absent = None
+                if field in chunk.get("absent", ()):
+                    absent = self._load(machine, field, idx, ".absent").tolist()
+                columns.append((field, self._decode_chunk(chunk, machine, field, idx), absent))
+            for row in range(chunk["rows"]):
+                record = {}
+                for field, values, absent in columns:
+                    if absent is None or not absent[row]:
+                        record[field] = values[row]
+                yield record
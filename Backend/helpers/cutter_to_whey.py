@@ -1,11 +1,19 @@
+import math
 import simpy
 
 def cutter_to_whey(env, input_store, output_store, target_mass):
     total_milk = 0  
     while True:
         curd = yield input_store.get()  
-        total_milk += curd['curd_mass'] + curd['whey_mass']
-        
-        if total_milk >= target_mass:
-            yield output_store.put(total_milk)
-            total_milk = 0 
\ No newline at end of file
+        # Chunked cutting sends packets of several curds; split them where a
+        # single curd would have crossed the target
+        count = curd.get('curd_count', 1)
+        unit_mass = (curd['curd_mass'] + curd['whey_mass']) / count
+        while count:
+            take = min(count, max(1, math.ceil((target_mass - total_milk) / unit_mass)))
+            total_milk += unit_mass * take
+            count -= take
+
+            if total_milk >= target_mass:
+                yield output_store.put(total_milk)
+                total_milk = 0 
@@ -0,0 +1,311 @@
+from typing import Any, Dict, List, Optional
+
+
+class LoggerStage:
+    """Base class for filters that sit between the machines and NdjsonLogger.
+
+    A stage exposes the same log_event/finalize_json/stats interface as the
+    logger it wraps, so machines cannot tell the difference. Events a stage
+    holds back are released by flush(), which finalize_json calls before
+    handing over to the wrapped logger. Any other attribute is looked up on
+    the wrapped logger.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def log_event(self, event: Dict[str, Any]) -> None:
+        self.inner.log_event(event)
+
+    def log_events(self, events: List[Dict[str, Any]]) -> None:
+        for event in events:
+            self.log_event(event)
+
+    def flush(self) -> None:
+        """Emit any events still held back by this stage."""
+
+    def finalize_json(self) -> None:
+        self.flush()
+        self.inner.finalize_json()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.inner.stats()
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Identifier fields: numeric, but labels rather than measurements
+IDENTIFIER_FIELDS = ("batch_id", "curd_id", "block_id")
+
+
+def _is_identifier(name: str) -> bool:
+    return name in IDENTIFIER_FIELDS or name.endswith("_id")
+
+
+class _Window:
+    """Running min/mean/max of the numeric fields over one time window.
+
+    `fields` limits aggregation to the listed fields. Identifier fields are
+    not aggregated; they keep the window's last value.
+    """
+
+    __slots__ = ("index", "fields", "count", "last", "sums", "mins", "maxs", "flags")
+
+    def __init__(self, index: int, fields: Optional[List[str]] = None):
+        self.index = index
+        self.fields = set(fields) if fields is not None else None
+        self.count = 0
+        self.last: Dict[str, Any] = {}
+        self.sums: Dict[str, float] = {}
+        self.mins: Dict[str, float] = {}
+        self.maxs: Dict[str, float] = {}
+        self.flags: Dict[str, bool] = {}
+
+    def add(self, event: Dict[str, Any]) -> None:
+        self.count += 1
+        self.last = event
+        for name, value in event.items():
+            if name == "sim_time" or _is_identifier(name):
+                continue
+            if self.fields is not None and name not in self.fields:
+                continue
+            if isinstance(value, bool):
+                self.flags[name] = self.flags.get(name, False) or value
+            elif _is_number(value):
+                if name in self.sums:
+                    self.sums[name] += value
+                    if value < self.mins[name]:
+                        self.mins[name] = value
+                    if value > self.maxs[name]:
+                        self.maxs[name] = value
+                else:
+                    self.sums[name] = value
+                    self.mins[name] = value
+                    self.maxs[name] = value
+
+    def aggregate(self) -> Dict[str, Any]:
+        """Last event of the window with the fields that varied replaced by their mean.
+
+        Only those fields get `<field>_min` / `<field>_max`; a field that held
+        one value for the whole window keeps it unchanged.
+        """
+        event = dict(self.last)
+        for name, total in self.sums.items():
+            if self.mins[name] == self.maxs[name]:
+                continue
+            event[name] = round(total / self.count, 2)
+            event[f"{name}_min"] = self.mins[name]
+            event[f"{name}_max"] = self.maxs[name]
+        event.update(self.flags)
+        event["window_events"] = self.count
+        return event
+
+
+class EventSampler(LoggerStage):
+    """Per-machine decimation of the event stream.
+
+    `policies` maps a machine name (or "default") to one of:
+
+    - {"policy": "full"}: keep every event (full-fidelity override)
+    - {"policy": "every_nth", "n": N}: keep the 1st, N+1th, 2N+1th... event
+    - {"policy": "window", "window": W}: emit one event per W units of the
+      event's own sim_time, with the mean of each numeric field that varied
+      in the window plus `<field>_min` / `<field>_max`, and `window_events`
+      counting the inputs; `"fields": [...]` restricts aggregation to the
+      listed fields. Other fields, and identifiers (batch_id, curd_id,
+      block_id, *_id), keep the window's last value
+
+    stats() reports how many events each machine's policy suppressed.
+    """
+
+    POLICIES = ("full", "every_nth", "window")
+
+    def __init__(self, inner, policies: Optional[Dict[str, Dict[str, Any]]] = None):
+        super().__init__(inner)
+        policies = dict(policies or {})
+        self.default_policy = policies.pop("default", {"policy": "full"})
+        self.policies = policies
+        for policy in [self.default_policy, *self.policies.values()]:
+            if policy.get("policy", "full") not in self.POLICIES:
+                raise ValueError(f"Unknown sampling policy {policy.get('policy')!r}, expected one of {self.POLICIES}")
+        self.seen: Dict[str, int] = {}
+        self.suppressed: Dict[str, int] = {}
+        self._windows: Dict[str, _Window] = {}
+
+    @staticmethod
+    def active(policies: Optional[Dict[str, Dict[str, Any]]]) -> bool:
+        """Whether any policy in `policies` drops or aggregates events."""
+        return any(policy.get("policy", "full") != "full" for policy in (policies or {}).values())
+
+    def policy_for(self, machine: str) -> Dict[str, Any]:
+        return self.policies.get(machine, self.default_policy)
+
+    def log_event(self, event: Dict[str, Any]) -> None:
+        machine = event.get("machine")
+        policy = self.policy_for(machine)
+        kind = policy.get("policy", "full")
+        seen = self.seen.get(machine, 0)
+        self.seen[machine] = seen + 1
+
+        if kind == "every_nth":
+            if seen % policy.get("n", 1) == 0:
+                self.inner.log_event(event)
+            else:
+                self._suppress(machine)
+        elif kind == "window":
+            index = int(event.get("sim_time", 0) // policy.get("window", 1))
+            window = self._windows.get(machine)
+            if window is not None and window.index != index:
+                self._emit_window(machine)
+                window = None
+            if window is None:
+                window = self._windows[machine] = _Window(index, policy.get("fields"))
+            window.add(event)
+        else:
+            self.inner.log_event(event)
+
+    def _suppress(self, machine: str, count: int = 1) -> None:
+        self.suppressed[machine] = self.suppressed.get(machine, 0) + count
+
+    def _emit_window(self, machine: str) -> None:
+        window = self._windows.pop(machine)
+        self.inner.log_event(window.aggregate())
+        self._suppress(machine, window.count - 1)
+
+    def flush(self) -> None:
+        for machine in list(self._windows):
+            self._emit_window(machine)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.inner.stats())
+        stats["sampling"] = {
+            machine: {
+                "policy": self.policy_for(machine).get("policy", "full"),
+                "seen": seen,
+                "suppressed": self.suppressed.get(machine, 0),
+            }
+            for machine, seen in self.seen.items()
+        }
+        return stats
+
+
+class _DeadbandState:
+    __slots__ = ("reference", "held", "phase")
+
+    def __init__(self, reference: Dict[str, Any], phase: tuple):
+        self.reference = reference
+        self.held: Optional[Dict[str, Any]] = None
+        self.phase = phase
+
+
+class DeadbandFilter(LoggerStage):
+    """Change-only emission: drop events that are nearly identical to the last one kept.
+
+    For each machine an event is emitted when any numeric field has moved
+    by more than its epsilon since the last emitted event, when a boolean
+    flips, or when one of `status_fields` changes. A change of status
+    fields starts a new phase; the last event of the previous phase is
+    always emitted before the first event of the new one (and the last
+    event of each machine is emitted by flush), so charts stay exact at
+    every breakpoint.
+
+    Identifiers (batch_id, curd_id, block_id and any other *_id field) are
+    never compared: a new curd or batch number alone does not make an event
+    worth keeping.
+
+    `tracked_fields` optionally limits, per machine, which numeric fields
+    are compared (e.g. {"ripener": ["temperature_C", "intake_kg"]});
+    machines not listed compare every numeric field.
+    """
+
+    DEFAULT_STATUS_FIELDS = ("status", "phase", "anomalies", "milled")
+    IGNORED_FIELDS = ("sim_time", "sim_time_min") + IDENTIFIER_FIELDS
+
+    def __init__(
+        self,
+        inner,
+        default_epsilon: float = 0.01,
+        epsilons: Optional[Dict[str, float]] = None,
+        status_fields=DEFAULT_STATUS_FIELDS,
+        ignore_fields=(),
+        tracked_fields: Optional[Dict[str, list]] = None,
+    ):
+        super().__init__(inner)
+        self.default_epsilon = default_epsilon
+        self.epsilons = dict(epsilons or {})
+        self.status_fields = tuple(status_fields)
+        self.ignored = set(self.IGNORED_FIELDS) | set(ignore_fields)
+        self.tracked_fields = {machine: tuple(fields) for machine, fields in (tracked_fields or {}).items()}
+        self.seen: Dict[str, int] = {}
+        self.suppressed: Dict[str, int] = {}
+        self._state: Dict[str, _DeadbandState] = {}
+
+    def _phase(self, event: Dict[str, Any]) -> tuple:
+        return tuple(event.get(name) for name in self.status_fields)
+
+    def _moved(self, reference: Dict[str, Any], event: Dict[str, Any]) -> bool:
+        tracked = self.tracked_fields.get(event.get("machine"))
+        names = tracked if tracked is not None else event
+        for name in names:
+            if name in self.ignored or name not in event or _is_identifier(name):
+                continue
+            value = event[name]
+            if isinstance(value, bool):
+                if reference.get(name) is not value:
+                    return True
+            elif _is_number(value):
+                previous = reference.get(name)
+                if not _is_number(previous):
+                    return True
+                if abs(value - previous) > self.epsilons.get(name, self.default_epsilon):
+                    return True
+        return False
+
+    def _drop_held(self, machine: str, state: _DeadbandState) -> None:
+        if state.held is not None:
+            state.held = None
+            self.suppressed[machine] = self.suppressed.get(machine, 0) + 1
+
+    def log_event(self, event: Dict[str, Any]) -> None:
+        machine = event.get("machine")
+        self.seen[machine] = self.seen.get(machine, 0) + 1
+        phase = self._phase(event)
+        state = self._state.get(machine)
+
+        if state is None:
+            self._state[machine] = _DeadbandState(event, phase)
+            self.inner.log_event(event)
+        elif phase != state.phase:
+            # Keep the last event of the finished phase, then the first of the new one
+            if state.held is not None:
+                self.inner.log_event(state.held)
+                state.held = None
+            state.reference = event
+            state.phase = phase
+            self.inner.log_event(event)
+        elif self._moved(state.reference, event):
+            self._drop_held(machine, state)
+            state.reference = event
+            self.inner.log_event(event)
+        else:
+            self._drop_held(machine, state)
+            state.held = event
+
+    def flush(self) -> None:
+        for state in self._state.values():
+            if state.held is not None:
+                self.inner.log_event(state.held)
+                state.held = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.inner.stats())
+        stats["deadband"] = {
+            machine: {"seen": seen, "suppressed": self.suppressed.get(machine, 0)}
+            for machine, seen in self.seen.items()
+        }
+        return stats
@@ -0,0 +1,236 @@
+import copy
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Compact per-run results pulled from a run's event log
+KPI_FIELDS = (
+    "milk_pasteurised_L",
+    "milk_burnt_L",
+    "curd_yield_percent",
+    "curd_L",
+    "texture_score",
+    "whey_lost_kg",
+    "blocks_pressed",
+    "pressed_kg",
+    "mean_block_kg",
+    "presser_anomalies",
+    "blocks_ripening",
+    "ripening_kg",
+    "last_event_minute",
+    "events",
+)
+
+
+def set_param(args: Dict[str, Any], path: str, value: Any) -> None:
+    """Set a dotted args path in place, e.g. "machines.cheese_vat.vat_batch_size"."""
+    keys = path.split(".")
+    target = args
+    for key in keys[:-1]:
+        if key not in target:
+            raise KeyError(f"Unknown args path {path!r}")
+        target = target[key]
+    if keys[-1] not in target:
+        raise KeyError(f"Unknown args path {path!r}")
+    target[keys[-1]] = value
+
+
+def apply_params(base_args: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    """A copy of `base_args` with every dotted path in `params` set."""
+    args = copy.deepcopy(base_args)
+    for path, value in params.items():
+        set_param(args, path, value)
+    return args
+
+
+def grid_design(space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Every combination of the listed values, one dict per run."""
+    paths = list(space)
+    return [dict(zip(paths, values)) for values in itertools.product(*(space[p] for p in paths))]
+
+
+def random_design(space: Dict[str, Any], runs: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """`runs` random design points.
+
+    A two-number list or {"low", "high"} is sampled uniformly (integer
+    bounds give integers); any other list is sampled as a set of choices.
+    """
+    rng = np.random.default_rng(seed)
+    design: List[Dict[str, Any]] = [{} for _ in range(runs)]
+    for path, spec in space.items():
+        if isinstance(spec, dict):
+            low, high = spec["low"], spec["high"]
+        elif len(spec) == 2 and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in spec):
+            low, high = spec
+        else:
+            picks = rng.integers(0, len(spec), size=runs)
+            for point, pick in zip(design, picks):
+                point[path] = spec[int(pick)]
+            continue
+        if isinstance(low, int) and isinstance(high, int):
+            values = rng.integers(low, high, size=runs, endpoint=True).tolist()
+        else:
+            values = rng.uniform(low, high, size=runs).tolist()
+        for point, value in zip(design, values):
+            point[path] = value
+    return design
+
+
+def run_seed(base_seed: int, index: int) -> int:
+    """Seed for run `index` of an experiment, independent across runs."""
+    return int(np.random.SeedSequence([base_seed, index]).generate_state(1, dtype=np.uint32)[0])
+
+
+def _events(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def extract_kpis(data_dir: str) -> Dict[str, Any]:
+    """KPI_FIELDS for one finished run, in one pass over its event log."""
+    last: Dict[str, Dict[str, Any]] = {}
+    blocks: Dict[Any, Dict[str, Any]] = {}
+    events = 0
+    last_minute = 0
+    for event in _events(os.path.join(data_dir, "data.ndjson")):
+        events += 1
+        machine = event.get("machine")
+        last[machine] = event
+        last_minute = max(last_minute, event.get("env_time") or 0)
+        if machine == "cheese_presser" and event.get("batch_id"):
+            blocks[event["batch_id"]] = event
+
+    def final(machine: str, field: str) -> Any:
+        return last.get(machine, {}).get(field)
+
+    pressed_kg = sum(b.get("output_weight_kg") or 0 for b in blocks.values())
+    return {
+        "milk_pasteurised_L": final("pasteuriser", "milk_L"),
+        "milk_burnt_L": final("pasteuriser", "burnt_total_L"),
+        "curd_yield_percent": final("curd_cutter", "curd_yield_percent"),
+        "curd_L": final("whey_drainer", "curd_L"),
+        "texture_score": final("cheddaring_and_milling", "texture_score"),
+        "whey_lost_kg": final("cheddaring_and_milling", "whey_lost_kg"),
+        "blocks_pressed": len(blocks),
+        "pressed_kg": round(pressed_kg, 3),
+        "mean_block_kg": round(pressed_kg / len(blocks), 4) if blocks else None,
+        "presser_anomalies": sum(1 for b in blocks.values() if b.get("anomaly")),
+        "blocks_ripening": final("ripener", "blocks_stored"),
+        "ripening_kg": final("ripener", "stored_kg"),
+        "last_event_minute": round(last_minute, 3),
+        "events": events,
+    }
+
+
+def _record_worker_pid(pids) -> None:
+    pids.put(os.getpid())
+
+
+class ExperimentPool(ProcessPoolExecutor):
+    """ProcessPoolExecutor whose workers report their PIDs as they start.
+
+    Each worker puts its PID on a queue from the pool initializer, so
+    terminate_pool can find the pool's worker processes without reaching
+    into the executor.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, mp_context=None, max_tasks_per_child: Optional[int] = None):
+        if mp_context is None:
+            # The queue must come from the workers' context; pick it as ProcessPoolExecutor
+            # does, which cannot recycle workers under the fork start method
+            mp_context = multiprocessing.get_context("spawn" if max_tasks_per_child is not None else None)
+        self._pid_queue = mp_context.SimpleQueue()
+        self._worker_pids = set()
+        kwargs = {} if max_tasks_per_child is None else {"max_tasks_per_child": max_tasks_per_child}
+        super().__init__(max_workers=max_workers, mp_context=mp_context, initializer=_record_worker_pid, initargs=(self._pid_queue,), **kwargs)
+
+    def worker_pids(self) -> set:
+        """PIDs of every worker started so far."""
+        while not self._pid_queue.empty():
+            self._worker_pids.add(self._pid_queue.get())
+        return set(self._worker_pids)
+
+
+def make_pool(workers: Optional[int] = None, fresh_workers: bool = True) -> ExperimentPool:
+    """Process pool for experiment runs.
+
+    With `fresh_workers` every run gets a new worker process
+    (max_tasks_per_child=1, Python 3.11+), so nothing one run leaves in
+    memory reaches the next; otherwise workers are reused.
+    """
+    if fresh_workers and sys.version_info >= (3, 11):
+        return ExperimentPool(workers, max_tasks_per_child=1)
+    return ExperimentPool(workers)
+
+
+def terminate_pool(pool: ExperimentPool) -> None:
+    """Stop a pool now: queued runs are cancelled and running ones killed.
+
+    `shutdown(wait=False)` alone leaves running workers to finish their
+    runs (and the interpreter joins them at exit); here the pool's live
+    workers, matched by the PIDs they reported, are terminated and reaped
+    before this returns, so nothing they were writing changes afterwards.
+    """
+    pids = pool.worker_pids()
+    workers = [process for process in multiprocessing.active_children() if process.pid in pids]
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in workers:
+        if process.is_alive():
+            process.terminate()
+    for process in workers:
+        process.join()
+
+
+def run_experiment(
+    base_args: Dict[str, Any],
+    params: Dict[str, Any],
+    seed: int,
+    run_id: Optional[str] = None,
+    output_dir: Optional[str] = None,
+    keep_outputs: bool = True,
+    index_run: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """Run the pipeline once with `params` applied and return its KPI row.
+
+    Runs quietly (production verbosity, simulated time) so it can be used
+    from worker processes. The KPIs are read from data.ndjson, so the run
+    always logs every event to NDJSON: no sampling, no deadband and no
+    dropped async events, whatever `base_args` says. The row holds run_id,
+    seed, the params, the KPI_FIELDS and the wall-clock seconds. With
+    `keep_outputs=False` the run's directory is removed once its KPIs are
+    read, and the run is not added to data/runs/index.ndjson. `index_run`
+    (default: `keep_outputs`) controls the index on its own; a kept run
+    that is not indexed returns its Main.main record under "run", so the
+    caller can index it once it knows the run is wanted.
+    """
+    # Main imports helpers, so it can only be imported once helpers is loaded
+    import Main
+
+    args = apply_params(base_args, params)
+    args["global"].update(seed=seed, verbosity="production", time_mode=0)
+    log_cfg = args.setdefault("logging", {})
+    log_cfg.update(output_format="ndjson", sampling=None, overflow_policy="block")
+    log_cfg["deadband"] = dict(log_cfg.get("deadband", {}), enabled=False)
+    started = time.perf_counter()
+    if index_run is None:
+        index_run = keep_outputs
+    run = Main.main(args, output_dir=output_dir, run_id=run_id, index_run=index_run and keep_outputs)
+    row = {"run_id": run["run_id"], "seed": seed}
+    row.update(params)
+    row.update(extract_kpis(run["data_dir"]))
+    row["seconds"] = round(time.perf_counter() - started, 3)
+    if not keep_outputs:
+        shutil.rmtree(run["data_dir"], ignore_errors=True)
+    elif not index_run:
+        row["run"] = run
+    return row
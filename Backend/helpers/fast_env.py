@@ -0,0 +1,283 @@
+from heapq import heappop, heappush
+from typing import Any, Generator, List, Optional
+
+# Event priorities, as in SimPy: process start-up runs before regular events
+URGENT = 0
+NORMAL = 1
+
+_PENDING = object()
+
+
+class Event:
+    """Minimal one-shot event: callbacks run when the scheduler reaches it."""
+
+    __slots__ = ("env", "callbacks", "value")
+
+    def __init__(self, env: "FastEnvironment"):
+        self.env = env
+        self.callbacks: Optional[list] = []
+        self.value = _PENDING
+
+    @property
+    def triggered(self) -> bool:
+        return self.value is not _PENDING
+
+    def succeed(self, value: Any = None) -> "Event":
+        self.value = value
+        self.env._schedule(self.env._now, NORMAL, self._fire, value)
+        return self
+
+    def _fire(self, value: Any) -> None:
+        callbacks, self.callbacks = self.callbacks, None
+        for callback in callbacks:
+            callback(self)
+
+
+class _TimeoutToken:
+    """The object env.timeout() hands back; reused, so timeouts allocate nothing.
+
+    A timeout must be yielded straight away (`yield env.timeout(d)`), which
+    is how every machine uses it. Each timeout() call bumps the
+    environment's timeout generation, so Process._resume can tell when the
+    token it is handed was issued before the latest call and now holds
+    another timeout's delay.
+    """
+
+    __slots__ = ("delay", "value")
+
+
+class Process:
+    """Drives one machine generator, resuming it when what it yielded fires."""
+
+    __slots__ = ("env", "generator", "alive")
+
+    def __init__(self, env: "FastEnvironment", generator: Generator):
+        self.env = env
+        self.generator = generator
+        self.alive = True
+        # Start-up is scheduled like SimPy's Initialize event
+        env._schedule(env._now, URGENT, self._resume, None)
+
+    def _resume_event(self, event: Event) -> None:
+        self._resume(event.value)
+
+    def _resume(self, value: Any) -> None:
+        env = self.env
+        token = env._timeout_token
+        send = self.generator.send
+        env.active_process = self
+        while True:
+            generation = env._timeout_generation
+            try:
+                target = send(value)
+            except StopIteration:
+                self.alive = False
+                break
+            if target is token:
+                if env._timeout_generation != generation + 1:
+                    env.active_process = None
+                    raise RuntimeError(
+                        "A timeout was stored or overwritten before being yielded; "
+                        "the fast engine needs `yield env.timeout(delay)` with no other timeout() call in between"
+                    )
+                # The heap entry itself is the timeout: no event object, no callbacks
+                heappush(env._queue, (env._now + token.delay, NORMAL, env._eid, self._resume, token.value))
+                env._eid += 1
+                break
+            if target.callbacks is not None:
+                target.callbacks.append(self._resume_event)
+                break
+            # Already processed: continue with its value straight away
+            value = target.value
+        env.active_process = None
+
+
+class FastEnvironment:
+    """Drop-in replacement for the subset of simpy.Environment the pipeline uses.
+
+    Supports now, timeout, process, run(until) and the Store/Container
+    classes below. Events are ordered exactly like SimPy's (time, priority,
+    insertion id), so a seeded run produces the same event stream on both
+    engines; the gain comes from a flat heap of (time, priority, id,
+    callback, value) entries and timeouts that need no event object or
+    callback list.
+    """
+
+    def __init__(self, initial_time: float = 0):
+        self._now = initial_time
+        self._queue: List[tuple] = []
+        self._eid = 0
+        self._timeout_token = _TimeoutToken()
+        self._timeout_generation = 0
+        self.active_process: Optional[Process] = None
+
+    @property
+    def now(self) -> float:
+        return self._now
+
+    def _schedule(self, time: float, priority: int, callback, value: Any) -> None:
+        heappush(self._queue, (time, priority, self._eid, callback, value))
+        self._eid += 1
+
+    def timeout(self, delay: float = 0, value: Any = None) -> _TimeoutToken:
+        if delay < 0:
+            raise ValueError(f"Negative delay {delay}")
+        self._timeout_generation += 1
+        token = self._timeout_token
+        token.delay = delay
+        token.value = value
+        return token
+
+    def event(self) -> Event:
+        return Event(self)
+
+    def process(self, generator: Generator) -> Process:
+        return Process(self, generator)
+
+    def run(self, until: Optional[float] = None) -> None:
+        queue = self._queue
+        if until is None:
+            while queue:
+                self._now, _, _, callback, value = heappop(queue)
+                callback(value)
+            return
+
+        if until <= self._now:
+            raise ValueError(f"until ({until}) must be greater than the current simulation time")
+        # SimPy stops on an URGENT event scheduled at `until` now; stop at the same key
+        stop = (until, URGENT, self._eid)
+        self._eid += 1
+        while queue and queue[0] < stop:
+            self._now, _, _, callback, value = heappop(queue)
+            callback(value)
+        self._now = until
+
+
+class _Resource:
+    """Put/get queues with SimPy's trigger order (see simpy.resources.base)."""
+
+    def __init__(self, env: FastEnvironment, capacity: float):
+        if capacity <= 0:
+            raise ValueError('"capacity" must be > 0.')
+        self._env = env
+        self._capacity = capacity
+        self.put_queue: List[Event] = []
+        self.get_queue: List[Event] = []
+
+    @property
+    def capacity(self) -> float:
+        return self._capacity
+
+    def _trigger_put(self, get_event: Optional[Event]) -> None:
+        idx = 0
+        while idx < len(self.put_queue):
+            put_event = self.put_queue[idx]
+            proceed = self._do_put(put_event)
+            if not put_event.triggered:
+                idx += 1
+            else:
+                self.put_queue.pop(idx)
+            if not proceed:
+                break
+
+    def _trigger_get(self, put_event: Optional[Event]) -> None:
+        idx = 0
+        while idx < len(self.get_queue):
+            get_event = self.get_queue[idx]
+            proceed = self._do_get(get_event)
+            if not get_event.triggered:
+                idx += 1
+            else:
+                self.get_queue.pop(idx)
+            if not proceed:
+                break
+
+
+class _Request(Event):
+    """Put or get request carrying an item (Store) or amount (Container)."""
+
+    __slots__ = ("payload",)
+
+
+class Store(_Resource):
+    """FIFO item store with the same behaviour as simpy.Store."""
+
+    def __init__(self, env: FastEnvironment, capacity: float = float("inf")):
+        super().__init__(env, capacity)
+        self.items: List[Any] = []
+
+    def put(self, item: Any) -> Event:
+        event = _Request(self._env)
+        event.payload = item
+        self.put_queue.append(event)
+        event.callbacks.append(self._trigger_get)
+        self._trigger_put(None)
+        return event
+
+    def get(self) -> Event:
+        event = _Request(self._env)
+        self.get_queue.append(event)
+        event.callbacks.append(self._trigger_put)
+        self._trigger_get(None)
+        return event
+
+    def _do_put(self, event: _Request) -> Optional[bool]:
+        if len(self.items) < self._capacity:
+            self.items.append(event.payload)
+            event.succeed()
+        return None
+
+    def _do_get(self, event: _Request) -> Optional[bool]:
+        if self.items:
+            event.succeed(self.items.pop(0))
+        return None
+
+
+class Container(_Resource):
+    """Continuous level with the same behaviour as simpy.Container."""
+
+    def __init__(self, env: FastEnvironment, capacity: float = float("inf"), init: float = 0):
+        super().__init__(env, capacity)
+        if init < 0:
+            raise ValueError('"init" must be >= 0.')
+        if init > capacity:
+            raise ValueError('"init" must be <= "capacity".')
+        self._level = init
+
+    @property
+    def level(self) -> float:
+        return self._level
+
+    def put(self, amount: float) -> Event:
+        if amount <= 0:
+            raise ValueError(f"amount(={amount}) must be > 0.")
+        event = _Request(self._env)
+        event.payload = amount
+        self.put_queue.append(event)
+        event.callbacks.append(self._trigger_get)
+        self._trigger_put(None)
+        return event
+
+    def get(self, amount: float) -> Event:
+        if amount <= 0:
+            raise ValueError(f"amount(={amount}) must be > 0.")
+        event = _Request(self._env)
+        event.payload = amount
+        self.get_queue.append(event)
+        event.callbacks.append(self._trigger_put)
+        self._trigger_get(None)
+        return event
+
+    def _do_put(self, event: _Request) -> Optional[bool]:
+        if self._capacity - self._level >= event.payload:
+            self._level += event.payload
+            event.succeed()
+            return True
+        return None
+
+    def _do_get(self, event: _Request) -> Optional[bool]:
+        if self._level >= event.payload:
+            self._level -= event.payload
+            event.succeed()
+            return True
+        return None
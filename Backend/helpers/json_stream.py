@@ -0,0 +1,53 @@
+import gzip
+import json
+from typing import Any, Dict, Iterable, Optional, TextIO, Tuple
+
+# File suffix added for each supported compression
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def write_json_array(f: TextIO, records: Iterable[Dict[str, Any]], indent: Optional[int] = 4) -> int:
+    """Write `records` to `f` as a JSON array, one record at a time.
+
+    The output is byte-for-byte what `json.dump(list(records), f, indent=indent)`
+    would produce, but only one record is held in memory at once. Pass
+    `indent=None` for compact output. Returns the number of records written.
+    """
+    count = 0
+    if indent is None:
+        for record in records:
+            f.write(", " if count else "[")
+            f.write(json.dumps(record))
+            count += 1
+    else:
+        pad = "\n" + " " * indent
+        for record in records:
+            f.write("," + pad if count else "[" + pad)
+            f.write(json.dumps(record, indent=indent).replace("\n", pad))
+            count += 1
+        if count:
+            f.write("\n")
+    f.write("]" if count else "[]")
+    return count
+
+
+def open_json_output(filename: str, compression: Optional[str] = None) -> Tuple[TextIO, str]:
+    """Open `filename` for text writing, optionally through gzip or zstd.
+
+    The compression suffix (.gz / .zst) is appended when missing. Returns
+    the open handle and the final path. zstd needs the optional
+    `zstandard` package.
+    """
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"compression must be one of {list(COMPRESSION_SUFFIXES)}, got {compression!r}")
+    suffix = COMPRESSION_SUFFIXES[compression]
+    path = filename if filename.endswith(suffix) else filename + suffix
+    if compression == "gzip":
+        return gzip.open(path, "wt", compresslevel=6), path
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("zstd compression requires the 'zstandard' package (pip install zstandard)") from e
+        return zstandard.open(path, "wt"), path
+    return open(path, "w", buffering=1 << 16), path
@@ -1,6 +1,32 @@
 import json
 import os
-from typing import Any, Dict, Optional, Union
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from .json_stream import write_json_array
+
+
+# Order in which machine events are grouped in the finalized data.json
+MACHINE_ORDER = [
+    "pasteuriser",
+    "cheese_vat",
+    "curd_cutter",
+    "whey_drainer",
+    "cheddaring_and_milling",
+    "salting_and_mellowing",
+    "cheese_presser",
+    "ripener",
+]
+
+# Finalize group for events whose machine is not in MACHINE_ORDER
+_OTHERS_GROUP = len(MACHINE_ORDER)
+_MACHINE_GROUPS = {name: idx for idx, name in enumerate(MACHINE_ORDER)}
+# How build_standard_event records start in data.ndjson
+_MACHINE_PREFIX = '{"machine": "'
 
 
 class NdjsonLogger:
@@ -9,20 +35,90 @@ class NdjsonLogger:
     Use log_event to write one JSON object per line to `data.ndjson`.
     Later, call finalize_json to convert the NDJSON stream into an array and
     write it to `data.json`.
+
+    By default the file is re-opened for every event (and fsynced when
+    streaming). With `buffered=True` a single handle is kept open for the
+    whole run and writes go through a `buffer_size` byte buffer; durability is
+    then controlled by `fsync_every_events` / `fsync_every_seconds`, and if
+    neither is set the file is only fsynced once, in finalize_json.
+
+    With `streaming_finalize=True` finalize_json reads `data.ndjson` once,
+    copying each line into a temporary per-machine segment file, then
+    reads the segments back in MACHINE_ORDER to write `data.json` one
+    event at a time. Memory use stays constant whatever the run length;
+    the price is writing and re-reading the log once more on disk.
+
+    With `output_format="columnar"` no NDJSON file is written; events go to
+    typed per-machine NumPy column chunks under `columnar_dir` (see
+    helpers/columnar_store.py) and finalize_json builds `data.json` from
+    those columns.
+
+    Carry-forward is global by default: every record also carries the
+    latest fields of every other machine, which is what the frontend
+    reads. With `carry_forward="machine"` an event inherits only the last
+    values its own machine logged, which keeps records small.
     """
 
-    def __init__(self, ndjson_path: str = "Backend/data/data.ndjson", final_json_path: str = "Backend/data/data.json", stream: bool = True):
+    OUTPUT_FORMATS = ("ndjson", "columnar")
+    CARRY_FORWARD_MODES = ("machine", "global")
+
+    def __init__(
+        self,
+        ndjson_path: str = "Backend/data/data.ndjson",
+        final_json_path: str = "Backend/data/data.json",
+        stream: bool = True,
+        buffered: bool = False,
+        buffer_size: int = 1 << 16,
+        fsync_every_events: Optional[int] = None,
+        fsync_every_seconds: Optional[float] = None,
+        streaming_finalize: bool = False,
+        output_format: str = "ndjson",
+        columnar_dir: Optional[str] = None,
+        columnar_chunk_size: int = 4096,
+        carry_forward: str = "global",
+    ):
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {self.OUTPUT_FORMATS}, got {output_format!r}")
+        if carry_forward not in self.CARRY_FORWARD_MODES:
+            raise ValueError(f"carry_forward must be one of {self.CARRY_FORWARD_MODES}, got {carry_forward!r}")
         self.ndjson_path = ndjson_path
         self.final_json_path = final_json_path
         self.stream = stream
-        os.makedirs(os.path.dirname(self.ndjson_path), exist_ok=True)
+        self.buffered = buffered
+        self.buffer_size = buffer_size
+        self.fsync_every_events = fsync_every_events
+        self.fsync_every_seconds = fsync_every_seconds
+        self.output_format = output_format
+        # Columnar output replaces the NDJSON file and has its own finalize
+        self.streaming_finalize = streaming_finalize and output_format == "ndjson"
+        os.makedirs(os.path.dirname(self.ndjson_path) or ".", exist_ok=True)
 
-        # Truncate file at start of run to avoid mixing runs
-        open(self.ndjson_path, "w").close()
+        # Truncate file at start of run to avoid mixing runs. In buffered mode
+        # the same handle stays open until finalize_json/close.
+        self._handle = None
+        self._columns = None
+        if self.output_format == "columnar":
+            from .columnar_store import ColumnarEventWriter
+            self.columnar_dir = columnar_dir or os.path.splitext(self.ndjson_path)[0] + ".columns"
+            self._columns = ColumnarEventWriter(self.columnar_dir, chunk_size=columnar_chunk_size)
+        elif self.buffered:
+            self._handle = open(self.ndjson_path, "w", buffering=self.buffer_size)
+        else:
+            open(self.ndjson_path, "w").close()
         # Global, monotonically increasing simulation minute index (1,2,3,...)
         self._sim_minute_sequence = 1
-        # Persist the latest known values across events to satisfy carry-forward requirement
-        self._last_state: Dict[str, Any] = {}
+        # Persist the latest known values across events to satisfy carry-forward
+        # requirement: one slot row per machine, or a single shared row in
+        # "global" (legacy) mode
+        self.carry_forward = carry_forward
+        self._state: Dict[Optional[str], _SlotRow] = {}
+
+        # Write counters (see stats())
+        self.bytes_written = 0
+        self.events_written = 0
+        self.fsync_count = 0
+        self._events_since_fsync = 0
+        self._last_fsync_time = time.monotonic()
 
     def log_event(self, event: Dict[str, Any]) -> None:
         """Write a single normalized event as one NDJSON line.
@@ -32,39 +128,108 @@ class NdjsonLogger:
         preserved under 'env_time_min' and replaced with the global sequence to
         guarantee no duplicates as requested.
         """
-        # Carry forward: merge with last known state so unchanged fields persist
-        if self._last_state:
-            merged = dict(self._last_state)
-            merged.update(event)
-        else:
-            merged = dict(event)
+        self._write_event(event)
+
+    def log_events(self, events: List[Dict[str, Any]]) -> None:
+        """Write a batch of events in order; same output as calling log_event for each."""
+        for event in events:
+            self._write_event(event)
+
+    def _write_event(self, event: Dict[str, Any]) -> None:
+        """Merge, sequence, serialize and write one event (shared by all logger variants)."""
+        # Carry forward: update the slot row in place so unchanged fields persist
+        key = event.get("machine") if self.carry_forward == "machine" else None
+        row = self._state.get(key)
+        if row is None:
+            row = self._state[key] = _SlotRow()
+        row.update(event)
 
         # Normalize provided time field and preserve original
-        if "sim_time" in merged:
-            merged["env_time"] = merged["sim_time"]
-        elif "sim_time_min" in merged:
+        if "sim_time" in event:
+            row.set("env_time", event["sim_time"])
+        elif "sim_time_min" in event:
             # Backward-compat for callers still sending sim_time_min
-            merged["env_time"] = merged["sim_time_min"]
+            row.set("env_time", event["sim_time_min"])
         # Overwrite with unique global sequence number
-        merged["sim_time"] = self._sim_minute_sequence
-        # Remove legacy key if present to avoid duplicates in output
-        if "sim_time_min" in merged:
-            del merged["sim_time_min"]
+        row.set("sim_time", self._sim_minute_sequence)
         self._sim_minute_sequence += 1
-        # Update last_state AFTER assigning sequence so it contains latest values
-        self._last_state = dict(merged)
-        with open(self.ndjson_path, "a") as f:
-            json.dump(merged, f)
-            f.write("\n")
+
+        # The merged record only exists from here on, for serialization
+        merged = row.materialize()
+
+        if self._columns is not None:
+            self._columns.append(merged)
+            self.events_written += 1
             if self.stream:
-                f.flush()
-                os.fsync(f.fileno())
-        
+                print(json.dumps(merged), flush=True)
+            return
+
+        line = json.dumps(merged)
+        self._write_line(line)
+
         if self.stream:
-            print(json.dumps(merged), flush=True)
+            print(line, flush=True)
+
+    def _write_line(self, line: str) -> None:
+        """Append one serialized event to the NDJSON file and apply the fsync policy."""
+        if self.buffered:
+            self._handle.write(line)
+            self._handle.write("\n")
+        else:
+            with open(self.ndjson_path, "a") as f:
+                f.write(line)
+                f.write("\n")
+                if self.stream:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    self.fsync_count += 1
+
+        # json.dumps escapes non-ASCII by default, so characters == bytes
+        self.bytes_written += len(line) + 1
+        self.events_written += 1
+        if self.buffered:
+            self._events_since_fsync += 1
+            if self.fsync_every_events and self._events_since_fsync >= self.fsync_every_events:
+                self._fsync()
+            elif self.fsync_every_seconds is not None and time.monotonic() - self._last_fsync_time >= self.fsync_every_seconds:
+                self._fsync()
+
+    def _fsync(self) -> None:
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self.fsync_count += 1
+        self._events_since_fsync = 0
+        self._last_fsync_time = time.monotonic()
+
+    def close(self) -> None:
+        """Flush, fsync and close the persistent handle (buffered mode only)."""
+        if self._columns is not None and not self._columns.closed:
+            self._columns.close()
+            self.bytes_written = self._columns.bytes_written
+        if self._handle is None:
+            return
+        self._fsync()
+        self._handle.close()
+        self._handle = None
+
+    def stats(self) -> Dict[str, int]:
+        """Return the write counters for this run."""
+        return {
+            "events_written": self.events_written,
+            "bytes_written": self.bytes_written,
+            "fsync_count": self.fsync_count,
+        }
 
     def finalize_json(self) -> None:
         """Convert NDJSON stream to a JSON array file for convenient reading."""
+        # Make sure everything buffered so far is on disk before re-reading it
+        self.close()
+        if self.streaming_finalize:
+            self._finalize_streaming()
+            return
+        if self._columns is not None:
+            self._finalize_from_columns()
+            return
         if not os.path.exists(self.ndjson_path):
             # Nothing to finalize
             with open(self.final_json_path, "w") as f:
@@ -75,16 +240,7 @@ class NdjsonLogger:
             array = [json.loads(line) for line in f if line.strip()]
 
         # Reorder by machine phases to avoid interleaving, preserving within-machine order
-        machine_order = [
-            "pasteuriser",
-            "cheese_vat",
-            "curd_cutter",
-            "whey_drainer",
-            "cheddaring_and_milling",
-            "salting_and_mellowing",
-            "cheese_presser",
-            "ripener",
-        ]
+        machine_order = MACHINE_ORDER
 
         # Bucket by machine preserving original order
         buckets: Dict[str, list] = {name: [] for name in machine_order}
@@ -112,6 +268,225 @@ class NdjsonLogger:
         with open(self.final_json_path, "w") as f:
             json.dump(ordered, f, indent=4)
 
+    def _finalize_streaming(self) -> None:
+        """Streaming finalize: split data.ndjson into per-machine segments in one pass, then join them in MACHINE_ORDER."""
+        segment_dir = tempfile.mkdtemp(prefix="finalize-", dir=os.path.dirname(self.final_json_path) or ".")
+        try:
+            segments: Dict[int, Any] = {}
+            try:
+                if os.path.exists(self.ndjson_path):
+                    with open(self.ndjson_path, buffering=self.buffer_size) as f:
+                        for line in f:
+                            if not line.strip():
+                                continue
+                            group = _MACHINE_GROUPS.get(_line_machine(line), _OTHERS_GROUP)
+                            segment = segments.get(group)
+                            if segment is None:
+                                path = os.path.join(segment_dir, f"{group:02d}.ndjson")
+                                segment = segments[group] = open(path, "w", buffering=self.buffer_size)
+                            segment.write(line)
+            finally:
+                for segment in segments.values():
+                    segment.close()
+
+            def ordered_events():
+                for group in sorted(segments):
+                    with open(os.path.join(segment_dir, f"{group:02d}.ndjson"), buffering=self.buffer_size) as f:
+                        for line in f:
+                            yield json.loads(line)
+
+            with open(self.final_json_path, "w", buffering=self.buffer_size) as f:
+                write_json_array(f, _resequenced(ordered_events()))
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+    def _finalize_from_columns(self) -> None:
+        """Build data.json from the columnar store, streaming one chunk at a time."""
+        from .columnar_store import ColumnarEventReader, OTHERS_MACHINE
+        reader = ColumnarEventReader(self.columnar_dir)
+        available = reader.machines()
+        order = [m for m in MACHINE_ORDER if m in available]
+        order += [m for m in available if m not in MACHINE_ORDER and m != OTHERS_MACHINE]
+        if OTHERS_MACHINE in available:
+            order.append(OTHERS_MACHINE)
+
+        def ordered_events():
+            for machine in order:
+                yield from reader.iter_records(machine)
+
+        with open(self.final_json_path, "w", buffering=self.buffer_size) as f:
+            write_json_array(f, _resequenced(ordered_events()))
+
+
+class _SlotRow:
+    """Latest known value of every field for one carry-forward key.
+
+    Field names map to fixed slot indexes, so updates overwrite list entries
+    in place instead of copying a dict per event.
+    """
+
+    __slots__ = ("index", "names", "values")
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.names: list = []
+        self.values: list = []
+
+    def set(self, name: str, value: Any) -> None:
+        idx = self.index.get(name)
+        if idx is None:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+            self.values.append(value)
+        else:
+            self.values[idx] = value
+
+    def update(self, event: Dict[str, Any]) -> None:
+        for name, value in event.items():
+            # Legacy key is only used to fill env_time, never stored
+            if name != "sim_time_min":
+                self.set(name, value)
+
+    def materialize(self) -> Dict[str, Any]:
+        return dict(zip(self.names, self.values))
+
+
+def _line_machine(line: str) -> Optional[str]:
+    """Machine of one NDJSON line, read straight off the text when it leads the record."""
+    if line.startswith(_MACHINE_PREFIX):
+        end = line.find('"', len(_MACHINE_PREFIX))
+        machine = line[len(_MACHINE_PREFIX):end]
+        if "\\" not in machine:
+            return machine
+    return json.loads(line).get("machine")
+
+
+def _resequenced(events):
+    """Re-sequence sim_time in finalized output, keeping the prior value."""
+    for idx, ev in enumerate(events, start=1):
+        if "sim_time" in ev and "finalized_prev_sim_time" not in ev:
+            ev["finalized_prev_sim_time"] = ev["sim_time"]
+        ev["sim_time"] = idx
+        yield ev
+
+
+class AsyncNdjsonLogger(NdjsonLogger):
+    """NdjsonLogger variant that moves serialization and disk I/O off the simulation.
+
+    log_event only places the event on a queue; a dedicated writer
+    thread drains it in order and performs the carry-forward merge,
+    json.dumps and file writes. The queue is bounded by events, not
+    items: at most `queue_size` events wait for the writer, however they
+    were batched. When it is full, `overflow_policy` decides what happens:
+    "block" makes the calling machine wait (backpressure), "drop" discards
+    the new event and counts it. log_events behaves as log_event called
+    for each event in turn. finalize_json joins the writer thread before
+    converting the file, so every accepted event is written.
+    """
+
+    OVERFLOW_POLICIES = ("block", "drop")
+
+    def __init__(self, *args, queue_size: int = 10000, overflow_policy: str = "block", **kwargs):
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {self.OVERFLOW_POLICIES}, got {overflow_policy!r}")
+        super().__init__(*args, **kwargs)
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self._queue: queue.Queue = queue.Queue()
+        # Events queued but not yet written; the bound applies to this count
+        self._pending = 0
+        self._room = threading.Condition()
+        self.high_water_mark = 0
+        self.dropped_events = 0
+        self._writer_error: Optional[BaseException] = None
+        self._writer = threading.Thread(target=self._drain, name="ndjson-writer", daemon=True)
+        self._writer.start()
+
+    def log_event(self, event: Dict[str, Any]) -> None:
+        """Queue an event for the writer thread (see overflow_policy)."""
+        self._enqueue([event])
+
+    def log_events(self, events: List[Dict[str, Any]]) -> None:
+        """Queue a batch of events; they take as much of the queue as single events would."""
+        if events:
+            self._enqueue(list(events))
+
+    def _enqueue(self, events: List[Dict[str, Any]]) -> None:
+        # queue_size <= 0 means unbounded, as it did for queue.Queue
+        bounded = self.queue_size > 0
+        while events:
+            with self._room:
+                if bounded and self.overflow_policy == "block":
+                    while self._pending >= self.queue_size and self._writer_error is None:
+                        self._room.wait()
+                if self._writer_error is not None:
+                    raise RuntimeError("NDJSON writer thread failed") from self._writer_error
+                room = max(self.queue_size - self._pending, 0) if bounded else len(events)
+                accepted, events = events[:room], events[room:]
+                if self.overflow_policy == "drop":
+                    # The events that do not fit are the later ones, as with log_event
+                    self.dropped_events += len(events)
+                    events = []
+                if not accepted:
+                    return
+                self._pending += len(accepted)
+                if self._pending > self.high_water_mark:
+                    self.high_water_mark = self._pending
+                self._queue.put(accepted)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of events waiting for the writer thread."""
+        return self._pending
+
+    def _drain(self) -> None:
+        while True:
+            events = self._queue.get()
+            if events is _STOP:
+                return
+            if self._writer_error is None:
+                try:
+                    for event in events:
+                        self._write_event(event)
+                except BaseException as e:
+                    self._writer_error = e
+            # Release the room even after a failure so blocked producers are woken
+            with self._room:
+                self._pending -= len(events)
+                self._room.notify_all()
+
+    def _stop_writer(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        if self._writer_error is not None:
+            raise RuntimeError("NDJSON writer thread failed") from self._writer_error
+
+    def close(self) -> None:
+        """Stop the writer thread, then close the file; a writer error is left to finalize_json."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        super().close()
+
+    def finalize_json(self) -> None:
+        """Join the writer thread, then convert the NDJSON stream as usual."""
+        self._stop_writer()
+        super().finalize_json()
+
+    def stats(self) -> Dict[str, int]:
+        stats = super().stats()
+        stats.update({
+            "queue_depth": self.queue_depth,
+            "queue_high_water_mark": self.high_water_mark,
+            "dropped_events": self.dropped_events,
+        })
+        return stats
+
+
+# Sentinel telling the async writer thread to exit
+_STOP = object()
+
 
 def build_standard_event(
     *,
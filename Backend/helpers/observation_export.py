@@ -0,0 +1,70 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+
+def save_observations(observer, filename: str, compact: bool = False, compression: Optional[str] = None, verbose: bool = False) -> str:
+    """Write a machine's observer records to `filename`, creating its folder.
+
+    This is the body of every machine's save_observations_to_json; see
+    ObserverStore.save_json for `compact` and `compression`. Returns the
+    path written.
+    """
+    folder = os.path.dirname(filename)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    filename = observer.save_json(filename, compact=compact, compression=compression)
+
+    if verbose:
+        print(f"Observations saved to {filename}")
+    return filename
+
+
+def _export_one(machine, compact: bool, compression: Optional[str], clear: bool, output_dir: Optional[str]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    records = len(machine.observer)
+    kwargs = {}
+    if output_dir:
+        kwargs["filename"] = os.path.join(output_dir, f"{machine.observer.name}.json")
+    path = machine.save_observations_to_json(compact=compact, compression=compression, **kwargs)
+    if clear:
+        # Release the records and any spilled chunks once they are on disk
+        machine.observer.clear()
+    return {
+        "machine": machine.observer.name,
+        "path": path,
+        "records": records,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def export_observations(
+    machines: List[Any],
+    parallel: bool = True,
+    max_workers: Optional[int] = None,
+    compact: bool = False,
+    compression: Optional[str] = None,
+    clear: bool = True,
+    output_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Write every machine's observation file, concurrently when `parallel`.
+
+    Each machine streams its ObserverStore through save_observations_to_json,
+    so no file is ever built as one big string. Threads are used because
+    the records live in this process; the JSON encoding holds the GIL, but
+    file writes and gzip/zstd compression release it, so the files overlap.
+
+    With `output_dir`, each file is written there as <machine>.json instead
+    of the machine's default path.
+
+    Returns one timing entry per machine (machine, path, records, seconds),
+    in the order the machines were given.
+    """
+    if not parallel or len(machines) < 2:
+        return [_export_one(m, compact, compression, clear, output_dir) for m in machines]
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(machines), thread_name_prefix="observer-export") as pool:
+        futures = [pool.submit(_export_one, m, compact, compression, clear, output_dir) for m in machines]
+        return [future.result() for future in futures]
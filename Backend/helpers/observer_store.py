@@ -0,0 +1,131 @@
+import json
+import os
+import shutil
+import tempfile
+from collections import deque
+from typing import Any, Dict, Iterator, Optional
+
+from .json_stream import open_json_output, write_json_array
+
+
+class ObserverStore:
+    """Compact, bounded-memory replacement for the machines' `self.observer` lists.
+
+    Records are appended as dicts (same as list.append) but stored as a
+    tuple of values plus a shared, interned tuple of field names, so
+    machines that log the same fields every step pay for the values only.
+
+    `retention` controls how much is kept:
+
+    - "all": keep every record in memory (the old behaviour, compactly)
+    - "ring": keep only the newest `max_records` records
+    - "spill": every `chunk_size` records are written to an NDJSON chunk
+      file under `spill_dir` and dropped from memory
+
+    Iterating the store yields the retained records as dicts in order,
+    reading spilled chunks back one line at a time, so save_json and
+    write_json_array never build the full list.
+    """
+
+    RETENTION_POLICIES = ("all", "ring", "spill")
+
+    def __init__(
+        self,
+        retention: str = "all",
+        max_records: int = 10000,
+        chunk_size: int = 10000,
+        spill_dir: Optional[str] = None,
+        name: str = "observer",
+    ):
+        if retention not in self.RETENTION_POLICIES:
+            raise ValueError(f"retention must be one of {self.RETENTION_POLICIES}, got {retention!r}")
+        self.retention = retention
+        self.max_records = max_records
+        self.chunk_size = chunk_size
+        self.name = name
+        self._spill_dir = spill_dir
+        self._owns_spill_dir = False
+        self._spill_files: list = []
+        self._spilled = 0
+        self._schemas: Dict[tuple, tuple] = {}
+        self._rows = deque(maxlen=max_records) if retention == "ring" else []
+        # Total records ever appended, including those dropped by the ring buffer
+        self.appended = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], name: str) -> "ObserverStore":
+        """Build a store from the `logging.observer` section of args.json."""
+        config = config or {}
+        spill_dir = config.get("spill_dir")
+        return cls(
+            retention=config.get("retention", "all"),
+            max_records=config.get("max_records", 10000),
+            chunk_size=config.get("chunk_size", 10000),
+            spill_dir=os.path.join(spill_dir, name) if spill_dir else None,
+            name=name,
+        )
+
+    def append(self, record: Dict[str, Any]) -> None:
+        keys = tuple(record)
+        schema = self._schemas.get(keys)
+        if schema is None:
+            schema = self._schemas[keys] = keys
+        self._rows.append((schema, tuple(record.values())))
+        self.appended += 1
+        if self.retention == "spill" and len(self._rows) >= self.chunk_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix=f"{self.name}-observer-")
+            self._owns_spill_dir = True
+        os.makedirs(self._spill_dir, exist_ok=True)
+        path = os.path.join(self._spill_dir, f"{self.name}.{len(self._spill_files):05d}.ndjson")
+        with open(path, "w") as f:
+            for keys, values in self._rows:
+                f.write(json.dumps(dict(zip(keys, values))))
+                f.write("\n")
+        self._spill_files.append(path)
+        self._spilled += len(self._rows)
+        self._rows.clear()
+
+    def __len__(self) -> int:
+        """Number of records retained (in memory or spilled)."""
+        return self._spilled + len(self._rows)
+
+    @property
+    def dropped(self) -> int:
+        """Records discarded by the ring buffer."""
+        return self.appended - len(self)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for path in self._spill_files:
+            with open(path) as f:
+                for line in f:
+                    yield json.loads(line)
+        for keys, values in self._rows:
+            yield dict(zip(keys, values))
+
+    def save_json(self, filename: str, compact: bool = False, compression: Optional[str] = None) -> str:
+        """Stream the retained records to `filename` as a JSON array.
+
+        `compact` drops the indentation; `compression` is None, "gzip" or
+        "zstd" (the matching suffix is added). Returns the path written.
+        """
+        f, path = open_json_output(filename, compression)
+        with f:
+            write_json_array(f, self, indent=None if compact else 4)
+        return path
+
+    def clear(self) -> None:
+        """Drop all records and remove any spill files."""
+        self._rows.clear()
+        for path in self._spill_files:
+            if os.path.exists(path):
+                os.remove(path)
+        if self._owns_spill_dir and self._spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+            self._owns_spill_dir = False
+        self._spill_files = []
+        self._spilled = 0
@@ -1,6 +1,12 @@
 import simpy
 
 def pasteuriser_to_vat(env, input_store, output_store, target_volume):
+    if hasattr(input_store, 'get_until'):
+        # Coalescing conveyor: wake once per full vat batch
+        while True:
+            yield input_store.get_until(target_volume)
+            yield output_store.put(target_volume)
+
     buffer = 0  # accumulated volume
     while True:
         item = yield input_store.get()  # get next input (can vary)
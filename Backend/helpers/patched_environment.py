@@ -2,13 +2,30 @@ import simpy
 import time
 import simpy.rt
 from enum import Enum, auto
+from .fast_env import FastEnvironment
+from . import fast_env
 
 class TimeMode(Enum):
     ST = auto()  # Simulation Time
     RT = auto()  # Real Time
 
-def create_env(real_time=False, factor=1.0, strict=True):
+ENGINES = ("simpy", "fast")
+
+def create_env(real_time=False, factor=1.0, strict=True, engine="simpy"):
     # Use a single SimPy environment for the whole pipeline so sim-time flows naturally
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+    if engine == "fast":
+        # Lightweight scheduler with SimPy's event ordering (helpers/fast_env.py)
+        if real_time:
+            raise ValueError("The fast engine only supports simulated time")
+        return FastEnvironment()
     if real_time:
         return simpy.rt.RealtimeEnvironment(factor=factor, strict=strict)
-    return simpy.Environment()
\ No newline at end of file
+    return simpy.Environment()
+
+def create_store(env, capacity=float("inf")):
+    # Conveyors must come from the same engine as the environment
+    if isinstance(env, FastEnvironment):
+        return fast_env.Store(env, capacity=capacity)
+    return simpy.Store(env, capacity=capacity)
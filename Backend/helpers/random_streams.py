@@ -0,0 +1,84 @@
+import bisect
+import itertools
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class RandomStream:
+    """Buffered scalar draws from one NumPy Generator.
+
+    Implements the subset of the `random` module the machines use
+    (random, uniform, randint, choices), so a machine can be handed either
+    a stream or the `random` module itself. Uniform variates are pre-drawn
+    `block_size` at a time and served from a list, so a scalar draw costs
+    a list index rather than a Generator call. `generator` is exposed for
+    code that wants whole NumPy arrays of draws.
+
+    Machines take this as their `rng` argument and keep it as
+    `self.random`: with a stream they draw from it alone, and with
+    `rng=None` they fall back to the global `random` module, so a machine
+    built outside a seeded run behaves as it always did.
+    """
+
+    def __init__(self, generator: np.random.Generator, block_size: int = 1024):
+        self.generator = generator
+        self.block_size = block_size
+        self._block: List[float] = []
+        self._next = 0
+
+    def random(self) -> float:
+        if self._next >= len(self._block):
+            self._block = self.generator.random(self.block_size).tolist()
+            self._next = 0
+        value = self._block[self._next]
+        self._next += 1
+        return value
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+    def randint(self, a: int, b: int) -> int:
+        """Random integer in [a, b], both ends included (like random.randint)."""
+        return a + int(self.random() * (b - a + 1))
+
+    def choices(self, population: Sequence, weights: Optional[Sequence[float]] = None, k: int = 1) -> list:
+        if weights is None:
+            n = len(population)
+            return [population[int(self.random() * n)] for _ in range(k)]
+        cum_weights = list(itertools.accumulate(weights))
+        total = cum_weights[-1]
+        hi = len(cum_weights) - 1
+        return [population[bisect.bisect(cum_weights, self.random() * total, 0, hi)] for _ in range(k)]
+
+
+class RandomStreams:
+    """Independent, reproducible random streams per machine, from one run seed.
+
+    Each stream's Generator is seeded from the run seed plus a spawn key
+    derived from the stream name (crc32), so a machine's draws do not
+    depend on which other machines exist or in which order streams are
+    requested. Two runs with the same seed therefore share common random
+    numbers machine by machine, which is what scenario comparisons need.
+
+    `seed=None` draws fresh entropy; `seed` then holds the value to pass
+    back in to reproduce the run.
+    """
+
+    def __init__(self, seed: Optional[int] = None, block_size: int = 1024):
+        self.seed = np.random.SeedSequence(seed).entropy
+        self.block_size = block_size
+        self._streams: Dict[str, RandomStream] = {}
+
+    def generator(self, name: str) -> np.random.Generator:
+        """A fresh Generator for `name` (same seed + name -> same draws)."""
+        sequence = np.random.SeedSequence(self.seed, spawn_key=(zlib.crc32(name.encode("utf-8")),))
+        return np.random.default_rng(sequence)
+
+    def stream(self, name: str) -> RandomStream:
+        """The buffered stream for `name`, created on first use."""
+        stream = self._streams.get(name)
+        if stream is None:
+            stream = self._streams[name] = RandomStream(self.generator(name), self.block_size)
+        return stream
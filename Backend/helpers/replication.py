@@ -0,0 +1,80 @@
+import math
+from statistics import NormalDist
+from typing import Any, Dict, Optional
+
+
+def t_quantile(p: float, df: int) -> float:
+    """Student-t quantile.
+
+    Exact for 1 and 2 degrees of freedom, where the t distribution has a
+    closed-form inverse; above that, the Cornish-Fisher expansion around
+    the normal, within 1% of the exact value from 3 degrees of freedom up.
+    """
+    if df < 1:
+        raise ValueError(f"df must be at least 1, got {df!r}")
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    v = float(df)
+    return (
+        z
+        + (z ** 3 + z) / (4 * v)
+        + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2)
+        + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3)
+        + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * v ** 4)
+    )
+
+
+class RunningStats:
+    """Streaming mean and variance of one KPI (Welford's algorithm)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def half_width(self, confidence: float = 0.95) -> float:
+        """Half-width of the t confidence interval for the mean."""
+        if self.count < 2:
+            return math.inf
+        return t_quantile(0.5 + confidence / 2, self.count - 1) * self.std / math.sqrt(self.count)
+
+    def meets(self, target: Dict[str, float], confidence: float = 0.95) -> bool:
+        """Whether the interval is within `target`: {"absolute": h} and/or
+        {"relative": r} (half-width at most r * |mean|)."""
+        half_width = self.half_width(confidence)
+        if "absolute" in target and half_width > target["absolute"]:
+            return False
+        if "relative" in target and half_width > target["relative"] * abs(self.mean):
+            return False
+        return True
+
+    def summary(self, confidence: float = 0.95, target: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        half_width = self.half_width(confidence)
+        summary = {
+            "n": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "half_width": half_width,
+            "ci": [self.mean - half_width, self.mean + half_width],
+        }
+        if target is not None:
+            summary["target"] = target
+            summary["met"] = self.meets(target, confidence)
+        return summary
@@ -0,0 +1,49 @@
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+INDEX_FILENAME = "index.ndjson"
+
+
+def new_run_id() -> str:
+    """Sortable, collision-safe run ID: UTC timestamp plus a random suffix."""
+    return time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + "-" + uuid.uuid4().hex[:8]
+
+
+def create_run_dir(runs_dir: str, run_id: Optional[str] = None) -> Tuple[str, str]:
+    """Create the output directory for one run under `runs_dir`.
+
+    Returns (run_id, path). An explicit `run_id` must not already have a
+    directory, so a reused ID never mixes the files of two runs.
+    """
+    run_id = run_id or new_run_id()
+    path = os.path.join(runs_dir, run_id)
+    os.makedirs(runs_dir, exist_ok=True)
+    os.makedirs(path, exist_ok=False)
+    return run_id, path
+
+
+def append_run_index(runs_dir: str, record: Dict[str, Any]) -> None:
+    """Append one run's record to `runs_dir`/index.ndjson.
+
+    The line goes out in a single O_APPEND write, so runs finishing at the
+    same time in different processes do not interleave their records.
+    """
+    os.makedirs(runs_dir, exist_ok=True)
+    line = (json.dumps(record) + "\n").encode("utf-8")
+    fd = os.open(os.path.join(runs_dir, INDEX_FILENAME), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def load_run_index(runs_dir: str) -> List[Dict[str, Any]]:
+    """Every record in the run index, oldest first."""
+    path = os.path.join(runs_dir, INDEX_FILENAME)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -1,42 +1,55 @@
 import random
 
-def salting_to_presser(env, input_conveyor, output_conveyor, target_weight_kg):
+def salting_to_presser(env, input_conveyor, output_conveyor, target_weight_kg, retain_slices=False, rng=None):
+    rng = rng or random
 
     batch_id = 1
-    temp_slices = []
+    # Running totals for the block being assembled, so each slice costs O(1)
+    total_mass = 0
+    moisture_mass = 0
+    total_salt = 0
+    temp_slices = [] if retain_slices else None
 
     while True:
         # Get a new slice from the input conveyor
         slice_ = yield input_conveyor.get()
         # Assign a random moisture if it doesn't exist
         if 'moisture' not in slice_:
-            slice_['moisture'] = random.uniform(38, 42)
-        temp_slices.append(slice_)
+            slice_['moisture'] = rng.uniform(38, 42)
+
+        total_mass += slice_['mass']
+        moisture_mass += slice_['mass'] * slice_['moisture']
+        total_salt += slice_['salt']
+        if retain_slices:
+            temp_slices.append(slice_)
 
         # DEBUG: print each slice as it comes in
         #print(f"[{env.now:.2f} min] Got slice: mass={slice_['mass']:.2f}, moisture={slice_['moisture']:.2f}")
 
-        # Calculate total mass of current accumulated slices
-        total_mass = sum(s['mass'] for s in temp_slices)
-
         if total_mass >= target_weight_kg:
             # Aggregate slices into a single batch
             aggregated_batch = {
                 'batch_id': f"Block{batch_id}",
                 'input_weight_kg': total_mass,
-                'input_moisture_percent': sum(s['mass'] * s['moisture'] for s in temp_slices) / total_mass,
-                'salt': sum(s['salt'] for s in temp_slices),
-                'press_duration_min': random.randint(45, 60),
-                'press_pressure_psi': random.uniform(30, 60)
+                'input_moisture_percent': moisture_mass / total_mass,
+                'salt': total_salt,
+                'press_duration_min': rng.randint(45, 60),
+                'press_pressure_psi': rng.uniform(30, 60)
             }
+            if retain_slices:
+                aggregated_batch['slices'] = temp_slices
 
             # DEBUG: print block info
             # print(f"[{env.now:.2f} min] Created {aggregated_batch['batch_id']} with "
-            #       f"{len(temp_slices)} slices, total_mass={total_mass:.2f}, "
+            #       f"total_mass={total_mass:.2f}, "
             #       f"avg_moisture={aggregated_batch['input_moisture_percent']:.2f}")
 
             # Put aggregated batch onto output conveyor
             yield output_conveyor.put(aggregated_batch)
 
             batch_id += 1
-            temp_slices = []  # reset for next block
+            # Reset for next block
+            total_mass = 0
+            moisture_mass = 0
+            total_salt = 0
+            temp_slices = [] if retain_slices else None
@@ -0,0 +1,143 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Sampling and index estimation for global sensitivity analysis. Designs
+# are built on the unit hypercube and mapped onto parameter bounds with
+# scale_samples, so the estimators never see parameter units.
+
+
+def scale_samples(unit: np.ndarray, bounds: Sequence[Tuple[float, float]]) -> List[List[Any]]:
+    """Map unit-cube rows onto `bounds`; integer bounds give rounded integers."""
+    rows: List[List[Any]] = [[] for _ in range(len(unit))]
+    for column, (low, high) in enumerate(bounds):
+        values = low + unit[:, column] * (high - low)
+        if isinstance(low, int) and isinstance(high, int):
+            values = np.rint(values).astype(int)
+        for row, value in zip(rows, values.tolist()):
+            row.append(value)
+    return rows
+
+
+def unscale_samples(rows: Sequence[Sequence[Any]], bounds: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """Inverse of scale_samples: the unit-cube position of the values actually applied."""
+    values = np.asarray(rows, dtype=float)
+    low = np.array([b[0] for b in bounds], dtype=float)
+    span = np.array([b[1] - b[0] for b in bounds], dtype=float)
+    # A zero-width range has nowhere to move; keep it at 0
+    return np.divide(values - low, span, out=np.zeros_like(values), where=span != 0)
+
+
+def morris_sample(k: int, trajectories: int, levels: int = 4, seed: Optional[int] = None) -> np.ndarray:
+    """Morris one-at-a-time trajectories on a `levels`-point grid.
+
+    Each trajectory is k + 1 rows: a random grid point, then one factor
+    moved by delta = levels / (2 * (levels - 1)) per step, in random order
+    and direction. Returns a (trajectories * (k + 1), k) unit-cube array.
+    """
+    rng = np.random.default_rng(seed)
+    delta = levels / (2 * (levels - 1))
+    grid = np.arange(levels) / (levels - 1)
+    sample = np.empty((trajectories * (k + 1), k))
+    for t in range(trajectories):
+        x = rng.choice(grid, size=k)
+        rows = [x.copy()]
+        for factor in rng.permutation(k):
+            up = x[factor] + delta <= 1 + 1e-12
+            down = x[factor] - delta >= -1e-12
+            x[factor] += delta if up and (not down or rng.random() < 0.5) else -delta
+            rows.append(x.copy())
+        sample[t * (k + 1):(t + 1) * (k + 1)] = rows
+    return sample
+
+
+def morris_indices(unit: np.ndarray, y: np.ndarray, applied: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """mu, mu_star and sigma of the elementary effects for each factor.
+
+    `applied` is the unit-cube position of the values the runs actually
+    used (unscale_samples of the design); it defaults to `unit`. Effects
+    are divided by the applied step, so integer rounding does not distort
+    them. A step that rounding cancelled has no effect and is left out;
+    `skipped` counts those per factor, and a factor with no effects left
+    gets NaN indices.
+    """
+    k = unit.shape[1]
+    trajectories = len(unit) // (k + 1)
+    if applied is None:
+        applied = unit
+    effects = np.empty((trajectories, k))
+    for t in range(trajectories):
+        rows = slice(t * (k + 1), (t + 1) * (k + 1))
+        dy = np.diff(y[rows])
+        # Exactly one factor moves per step of the design
+        factors = np.argmax(np.abs(np.diff(unit[rows], axis=0)), axis=1)
+        steps = np.diff(applied[rows], axis=0)[np.arange(k), factors]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            effects[t, factors] = np.where(steps != 0, dy / steps, np.nan)
+    valid = ~np.isnan(effects)
+    counts = valid.sum(axis=0)
+    filled = np.where(valid, effects, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = filled.sum(axis=0) / counts
+        mu_star = np.abs(filled).sum(axis=0) / counts
+        sigma = np.sqrt((np.where(valid, effects - mu, 0.0) ** 2).sum(axis=0) / (counts - 1))
+    sigma[counts == 1] = 0.0
+    sigma[counts == 0] = np.nan
+    return {
+        "mu": mu,
+        "mu_star": mu_star,
+        "sigma": sigma,
+        "skipped": trajectories - counts,
+    }
+
+
+def saltelli_sample(k: int, n: int, seed: Optional[int] = None) -> np.ndarray:
+    """Saltelli design for first-order and total Sobol indices.
+
+    Rows are A (n), B (n), then AB_i (n each) for every factor i, where
+    AB_i is A with column i taken from B: n * (k + 2) rows in total.
+    A and B are plain Monte Carlo draws.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.random((n, k))
+    b = rng.random((n, k))
+    blocks = [a, b]
+    for i in range(k):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        blocks.append(ab)
+    return np.vstack(blocks)
+
+
+def _sobol_from_blocks(fa: np.ndarray, fb: np.ndarray, fab: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    variance = np.var(np.concatenate([fa, fb]), ddof=1)
+    if variance == 0:
+        zeros = np.zeros(fab.shape[0])
+        return zeros, zeros
+    # Saltelli et al. (2010) first-order and Jansen total-effect estimators
+    first = np.mean(fb * (fab - fa), axis=1) / variance
+    total = 0.5 * np.mean((fa - fab) ** 2, axis=1) / variance
+    return first, total
+
+
+def sobol_indices(y: np.ndarray, k: int, bootstrap: int = 100, confidence: float = 0.95, seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """First-order (S1) and total (ST) indices from a saltelli_sample run,
+    with bootstrap confidence half-widths (S1_conf, ST_conf)."""
+    n = len(y) // (k + 2)
+    fa, fb = y[:n], y[n:2 * n]
+    fab = y[2 * n:].reshape(k, n)
+    first, total = _sobol_from_blocks(fa, fb, fab)
+
+    rng = np.random.default_rng(seed)
+    resamples = rng.integers(0, n, size=(bootstrap, n))
+    boot_first = np.empty((bootstrap, k))
+    boot_total = np.empty((bootstrap, k))
+    for r, idx in enumerate(resamples):
+        boot_first[r], boot_total[r] = _sobol_from_blocks(fa[idx], fb[idx], fab[:, idx])
+    tail = (1 - confidence) / 2
+    return {
+        "S1": first,
+        "S1_conf": (np.quantile(boot_first, 1 - tail, axis=0) - np.quantile(boot_first, tail, axis=0)) / 2,
+        "ST": total,
+        "ST_conf": (np.quantile(boot_total, 1 - tail, axis=0) - np.quantile(boot_total, tail, axis=0)) / 2,
+    }
@@ -3,95 +3,133 @@ const { spawn } = require("child_process");
 const path = require("path");
 const fs = require("fs");
 
-let simProcess = null;
+// One resident Python worker (SimWorker.py) runs every simulation, so a start
+// command no longer pays interpreter start-up and SimPy/machine imports.
+let worker = null;
 let isRunning = false;
+let currentJob = null;
+let jobCounter = 0;
+
+function publish(data) {
+  const { publishMessage } = require("./mqtt");
+  publishMessage?.("simulation/results", data);
+}
+
+function publishFinalJson(dataFilePath) {
+  try {
+    if (fs.existsSync(dataFilePath)) {
+      const jsonData = JSON.parse(fs.readFileSync(dataFilePath, "utf8"));
+      console.log("📦 Loaded final simulation data file.");
+
+      // Publish it to your MQTT topic
+      publish(jsonData);
+      console.log("📤 Published final JSON to MQTT topic simulation/results");
+    } else {
+      console.warn("⚠️ Final JSON file not found:", dataFilePath);
+    }
+  } catch (err) {
+    console.error("❌ Error reading or publishing final JSON:", err);
+  }
+}
+
+function handleWorkerMessage(message) {
+  if (message.type === "ready") {
+    console.log(`🐍 Python worker ready (pid ${message.pid})`);
+  } else if (message.type === "job_complete") {
+    console.log(`✅ Simulation ${message.job_id} finished in ${message.seconds}s`);
+    isRunning = false;
+    currentJob = null;
+    // The worker has closed the job's files before reporting completion
+    publishFinalJson(message.event_log);
+  } else if (message.type === "job_failed") {
+    console.error(`❌ Simulation ${message.job_id} failed: ${message.error}`);
+    isRunning = false;
+    currentJob = null;
+  }
+}
+
+function ensureWorker() {
+  if (worker) return worker;
+
+  console.log("🚀 Starting Python simulation worker...");
+  // Unbuffered stdout; run in backend cwd
+  const proc = spawn("python3", ["-u", "SimWorker.py"], { cwd: path.join(__dirname, "..") });
+  worker = proc;
+
+  let pending = "";
+  proc.stdout.on("data", (data) => {
+    // Keep any partial trailing line until the rest of it arrives
+    const lines = (pending + data.toString()).split("\n");
+    pending = lines.pop();
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      let parsed;
+      try {
+        parsed = JSON.parse(line);
+      } catch {
+        continue;
+      }
+      if (parsed.type) {
+        handleWorkerMessage(parsed);
+      } else {
+        // Simulation event: forward as before
+        publish(parsed);
+      }
+    }
+  });
+
+  proc.stderr.on("data", (data) => {
+    console.error("🐍 Python Error:", data.toString());
+  });
+
+  proc.on("close", (code) => {
+    console.log(`Python worker exited with code ${code}`);
+    // A worker stopped by stopSim may exit after its replacement started
+    if (worker !== proc) return;
+    worker = null;
+    isRunning = false;
+    currentJob = null;
+  });
+
+  return proc;
+}
 
 function startSim(inputData) {
   return new Promise((resolve, reject) => {
     if (isRunning) return reject(new Error("Simulation already running"));
-    console.log("🐍 Starting Python simulation with input:", inputData) ;
-    console.log("🚀 Starting Python simulation...");
-    // Use Main.py and unbuffered stdout; run in backend cwd
-    simProcess = spawn("python3", ["-u", "Main.py"], { cwd: __dirname + "/.." });
-    isRunning = true;
+    console.log("🐍 Starting Python simulation with input:", inputData);
 
-    let buffer = "";
+    const jobId = `${Date.now()}-${++jobCounter}`;
+    const job = { job_id: jobId };
+    if (inputData && Object.keys(inputData).length > 0) job.args = inputData;
 
-    simProcess.stdout.on("data", (data) => {
-      const lines = data.toString().split("\n");
-      for (const line of lines) {
-        if (!line.trim()) continue;
-        try {
-          const parsed = JSON.parse(line);
-          //console.log("📤 Python Output:", parsed);
-
-          const { publishMessage } = require("./mqtt");
+    ensureWorker().stdin.write(JSON.stringify(job) + "\n");
+    isRunning = true;
+    currentJob = jobId;
 
-          // Optionally publish updates to MQTT
-          publishMessage?.("simulation/results", parsed);
-        } catch {
-          buffer += line;
-        }
-      }
-    });
-
-    simProcess.stderr.on("data", (data) => {
-      console.error("🐍 Python Error:", data.toString());
-    });
-
-    simProcess.on("close", (code) => {
-      console.log(`✅ Python simulation exited with code ${code}`);
-      isRunning = false;
-      simProcess = null;
-      
-      // Define where your final JSON is saved (e.g., "Backend/data/data.json")
-      const dataFilePath = path.join(__dirname, "..", "data", "data.json");
-
-      // Wait a moment to ensure Python finishes writing the file
-      setTimeout(() => {
-        try {
-          if (fs.existsSync(dataFilePath)) {
-            const jsonData = JSON.parse(fs.readFileSync(dataFilePath, "utf8"));
-            console.log("📦 Loaded final simulation data file.");
-
-            const { publishMessage } = require("./mqtt");
-
-            // Publish it to your MQTT topic
-            publishMessage("simulation/results", jsonData);
-            console.log("📤 Published final JSON to MQTT topic simulation/results");
-          } else {
-            console.warn("⚠️ Final JSON file not found:", dataFilePath);
-          }
-        } catch (err) {
-          console.error("❌ Error reading or publishing final JSON:", err);
-        }
-      }, 1000); // 1s delay buffer
-    });
-
-    // send initial data (ensure newline to satisfy readline or full read)
-    simProcess.stdin.write(JSON.stringify(inputData));
-    simProcess.stdin.end();
-
-    resolve({ status: "started" });
+    resolve({ status: "started", jobId });
   });
 }
 
 function stopSim() {
   return new Promise((resolve, reject) => {
-    if (!isRunning || !simProcess) {
+    if (!isRunning || !worker) {
       return reject(new Error("Simulation not running"));
     }
 
+    // A running job cannot be interrupted inside the worker; stop the worker
+    // and let the next start command bring up a fresh one
     console.log("🛑 Stopping Python simulation...");
-    simProcess.kill("SIGTERM");
+    worker.kill("SIGTERM");
+    worker = null;
     isRunning = false;
-    simProcess = null;
+    currentJob = null;
     resolve({ status: "stopped" });
   });
 }
 
 function getSimState() {
-  return { isRunning };
+  return { isRunning, jobId: currentJob };
 }
 
 module.exports = { startSim, stopSim, getSimState };
@@ -0,0 +1,33 @@
+import os
+import sys
+
+# Tests import the backend the way Main.py does: `helpers` and `Machines` as top-level packages
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+class ListLogger:
+    """Logger stub that keeps the events it is given."""
+
+    def __init__(self):
+        self.events = []
+
+    def log_event(self, event):
+        self.events.append(event)
+
+    def log_events(self, events):
+        self.events.extend(events)
+
+    def flush(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class FixedClock:
+    """Clock stub with a constant UTC time, so runs compare record for record."""
+
+    def now(self):
+        return "2026-01-01T00:00:00+00:00"
@@ -0,0 +1,90 @@
+import contextlib
+import io
+import random
+
+import pytest
+import simpy
+
+from Machines.step5_cheddaring_and_milling import Cheddaring
+from conftest import FixedClock, ListLogger
+
+
+class PerStepCheddaring(Cheddaring):
+    """The cheddaring loop as it was before the cached curves: every value computed per step."""
+
+    def process(self):
+        while True:
+            batch = yield self.initial_curd.get()
+            if self.verbose:
+                print(f"Starting curd: {batch:.2f} kg\n")
+                print("-" * 80)
+                print(f"{'Time (min)':<12} {'Moisture (%)':<15} {'Whey Lost (kg)':<20} "
+                    f"{'Texture (0–10)':<18} {'Milled?'}")
+                print("-" * 80)
+
+            for t in range(0, self.total_time + 1, self.step):
+                milled = "Yes" if t >= self.mill_start else "No"
+                m = self.moisture(t)
+                whey_kg = ((100 - m) / 100) * batch
+                tx = self.texture(t)
+                event = {
+                    'sim_time_min': int(self.env.now),
+                    'utc_time': self.clock.now(),
+                    'time_elapsed_min': t,
+                    'moisture_percent': round(m, 2),
+                    'whey_lost_kg': round(whey_kg, 2),
+                    'texture_score': round(tx, 2),
+                    'milled': milled,
+                    'machine': 'cheddaring_and_milling'
+                }
+                self.observer.append(event)
+                if self.logger:
+                    from helpers.ndjson_logger import build_standard_event
+                    self.logger.log_event(
+                        build_standard_event(
+                            machine='cheddaring_and_milling',
+                            sim_time_min=event['sim_time_min'],
+                            utc_time=event['utc_time'],
+                            output_moisture_percent=event['moisture_percent'],
+                            extra={'whey_lost_kg': event['whey_lost_kg'], 'texture_score': event['texture_score'], 'milled': milled},
+                        )
+                    )
+                if self.verbose:
+                    print(f"{t:<12} {m:<15.2f} {whey_kg:<20.2f} {tx:<18.2f} {milled}")
+                yield self.env.timeout(self.step)
+                yield self.output_store.put(batch)
+
+
+def feed_batches(env, conveyor, seed):
+    rng = random.Random(seed)
+    for _ in range(12):
+        # Several batches can queue up while one is being cheddared
+        yield env.timeout(rng.choice([0, 0, 40, 200, 500]))
+        yield conveyor.put(rng.uniform(500, 1500))
+
+
+def run_cheddaring(machine_class, seed, total_time, step):
+    env = simpy.Environment()
+    curd = simpy.Store(env)
+    output = simpy.Store(env)
+    logger = ListLogger()
+    machine = machine_class(env, curd, output, FixedClock, total_time=total_time, step=step, logger=logger, verbose=True)
+    env.process(feed_batches(env, curd, seed))
+    env.process(machine.process())
+    printed = io.StringIO()
+    with contextlib.redirect_stdout(printed):
+        env.run(until=20000)
+    return list(machine.observer), logger.events, output.items, printed.getvalue()
+
+
+@pytest.mark.parametrize("seed", [1, 7, 12345])
+@pytest.mark.parametrize("total_time, step", [(180, 15), (200, 7)])
+def test_cached_curves_match_per_step_loop(seed, total_time, step):
+    observations, events, curd, printed = run_cheddaring(PerStepCheddaring, seed, total_time, step)
+    actual = run_cheddaring(Cheddaring, seed, total_time, step)
+
+    assert len(curd) > 12
+    assert actual[0] == observations
+    assert actual[1] == events
+    assert actual[2] == curd
+    assert actual[3] == printed
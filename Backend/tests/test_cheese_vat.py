@@ -0,0 +1,45 @@
+import contextlib
+import io
+
+import pytest
+import simpy
+
+from helpers.random_streams import RandomStreams
+from Machines.step2_cheese_vat import CheeseVat
+from conftest import ListLogger
+
+
+def without_utc_time(record):
+    return {key: value for key, value in record.items() if key != "utc_time"}
+
+
+def run_vat(phase_kernels, seed, batches, until):
+    env = simpy.Environment()
+    input_conveyor = simpy.Store(env)
+    output_conveyor = simpy.Store(env)
+    logger = ListLogger()
+    rng = RandomStreams(seed).stream("cheese_vat")
+    # A high anomaly rate walks the vat through its anomaly branches
+    vat = CheeseVat.run(env, input_conveyor, output_conveyor, 6.55, 5, 60, logger=logger, verbose=True, phase_kernels=phase_kernels, rng=rng)
+    input_conveyor.items = list(batches)
+    printed = io.StringIO()
+    with contextlib.redirect_stdout(printed):
+        env.run(until=until)
+        vat.finalize(env)
+    return output_conveyor.items, [without_utc_time(e) for e in logger.events], [without_utc_time(r) for r in vat.observer], printed.getvalue()
+
+
+@pytest.mark.parametrize("seed", [1, 7, 12345])
+@pytest.mark.parametrize("until", [5000, 130, 333])
+def test_phase_kernels_match_step_wise(seed, until):
+    batches = [10000, 1234.5, 75, 0.05]
+    expected = run_vat(False, seed, batches, until)
+    actual = run_vat(True, seed, batches, until)
+
+    curds, events, observations, printed = expected
+    assert events, "the vat logged nothing"
+    # Final curd amounts are bit-for-bit the step-wise ones, not just close
+    assert actual[0] == curds
+    assert actual[1] == events
+    assert actual[2] == observations
+    assert actual[3] == printed
@@ -0,0 +1,126 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from helpers.columnar_store import ColumnarEventReader, ColumnarEventWriter
+from helpers.ndjson_logger import NdjsonLogger
+
+
+def mixed_events():
+    """Events whose numeric fields mix ints and floats within a chunk."""
+    for i in range(40):
+        machine = ("salting_and_mellowing", "cheese_presser", "ripener")[i % 3]
+        event = {
+            "machine": machine,
+            "sim_time": i,
+            # ints that look like floats once stored as float64
+            "batch_id": i // 5,
+            "curd_id": i,
+            # a float field that sometimes arrives as an int
+            "output_weight_kg": 27 if i % 4 == 0 else 26.5 + i / 10,
+            "status": f"step {i % 2}",
+            "anomaly": i % 7 == 0,
+        }
+        if i % 6 == 0:
+            event["notes"] = {"reason": "check", "value": i}
+        yield event
+
+
+def pipeline_like_events():
+    """Events shaped like the machines': timestamps, explicit nulls, free text."""
+    start = datetime(2026, 10, 16, 21, 9, 35, tzinfo=timezone.utc)
+    for i in range(50):
+        event = {
+            "machine": ("pasteuriser", "cheese_vat")[i % 2],
+            "sim_time": i,
+            # isoformat drops the fraction on whole seconds, which must survive too
+            "utc_time": (start + timedelta(microseconds=250000 * i)).isoformat(),
+            "batch_id": None if i % 3 else i,
+            "temperature_C": 0 if i < 20 else 31.5 + i / 100,
+            "anomaly": False,
+            "status": ("Heating", "Holding")[i % 3 == 0],
+            "anomalies": None if i % 4 else f"Überhitzt {i}",
+        }
+        if i >= 10:
+            event["phase"] = "Filling Vat"
+        yield event
+
+
+def finalized(tmp_path, output_format):
+    out = tmp_path / output_format
+    logger = NdjsonLogger(
+        str(out / "data.ndjson"), str(out / "data.json"), stream=False, buffered=True,
+        streaming_finalize=True, output_format=output_format, columnar_chunk_size=8,
+    )
+    for event in mixed_events():
+        logger.log_event(event)
+    logger.finalize_json()
+    with open(out / "data.json") as f:
+        return json.load(f)
+
+
+def test_columnar_finalize_matches_ndjson_finalize(tmp_path):
+    columnar = finalized(tmp_path, "columnar")
+    ndjson = finalized(tmp_path, "ndjson")
+    assert columnar == ndjson
+    # Same values and the same types: ints stay ints, floats stay floats
+    for a, b in zip(columnar, ndjson):
+        assert {k: type(v) for k, v in a.items()} == {k: type(v) for k, v in b.items()}
+
+
+def test_ints_round_trip_with_missing_and_mixed_values(tmp_path):
+    writer = ColumnarEventWriter(str(tmp_path / "cols"), chunk_size=4)
+    rows = [
+        {"machine": "m", "batch_id": 3, "mass": 1},
+        {"machine": "m", "mass": 2.5},
+        {"machine": "m", "batch_id": 5, "mass": 3.0},
+        {"machine": "m", "batch_id": 2**40, "mass": 4},
+    ]
+    for row in rows:
+        writer.append(row)
+    writer.close()
+    reader = ColumnarEventReader(str(tmp_path / "cols"))
+    records = list(reader.iter_records("m"))
+    assert records == rows
+    assert [type(r["mass"]) for r in records] == [int, float, float, int]
+    assert reader.decode("m", "batch_id") == [3, None, 5, 2**40]
+    assert reader.column("m", "batch_id").dtype == np.int64
+
+
+def test_columnar_output_is_byte_identical_to_ndjson(tmp_path):
+    outputs = {}
+    for output_format in ("ndjson", "columnar"):
+        out = tmp_path / output_format
+        logger = NdjsonLogger(
+            str(out / "data.ndjson"), str(out / "data.json"), stream=False, buffered=True,
+            streaming_finalize=True, output_format=output_format, columnar_chunk_size=16,
+        )
+        for event in pipeline_like_events():
+            logger.log_event(event)
+        logger.finalize_json()
+        outputs[output_format] = (out / "data.json").read_bytes()
+    assert outputs["columnar"] == outputs["ndjson"]
+
+    # Every record, nulls and key order included, serializes to its NDJSON line
+    lines = {}
+    for line in (tmp_path / "ndjson" / "data.ndjson").read_text().splitlines():
+        lines.setdefault(json.loads(line)["machine"], []).append(line)
+    reader = ColumnarEventReader(str(tmp_path / "columnar" / "data.columns"))
+    for machine in reader.machines():
+        assert [json.dumps(r) for r in reader.iter_records(machine)] == lines[machine]
+
+
+def test_only_low_cardinality_strings_use_the_dictionary(tmp_path):
+    writer = ColumnarEventWriter(str(tmp_path / "cols"), chunk_size=16)
+    for event in pipeline_like_events():
+        writer.append(event)
+    writer.close()
+    reader = ColumnarEventReader(str(tmp_path / "cols"))
+
+    assert set(reader.dictionary) == {"pasteuriser", "cheese_vat", "Heating", "Holding", "Filling Vat"}
+    assert reader.kind("cheese_vat", "utc_time") == "ts"
+    assert reader.column("cheese_vat", "utc_time").dtype == np.int64
+    # A column constant over a chunk has no file for that chunk
+    assert not os.path.exists(tmp_path / "cols" / "cheese_vat" / "anomaly.00000.npy")
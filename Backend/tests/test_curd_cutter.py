@@ -0,0 +1,44 @@
+import pytest
+import simpy
+
+from Machines.step3_curd_cutter import CurdCutter
+
+
+def cut(batch, cutting_mode):
+    env = simpy.Environment()
+    input_conveyor = simpy.Store(env)
+    output_conveyor = simpy.Store(env)
+    cutter = CurdCutter.run(env, input_conveyor, output_conveyor, None, verbose=False, cutting_mode=cutting_mode, chunk_size=10)
+    input_conveyor.put(batch)
+    env.run(until=100)
+    return cutter, output_conveyor.items
+
+
+def batch(total_milk_in):
+    return {"batch_id": 1, "total_milk_in": total_milk_in, "avg_temperature": 31, "final_pH": 6.5, "anomalies": []}
+
+
+@pytest.mark.parametrize("cutting_mode", CurdCutter.CUTTING_MODES)
+@pytest.mark.parametrize("total_milk_in", [0, 0.05])
+def test_batch_without_curds(cutting_mode, total_milk_in):
+    cutter, curds = cut(batch(total_milk_in), cutting_mode)
+
+    assert curds == []
+    (summary,) = cutter.batch_logs
+    assert summary["curd_yield_L"] == 0
+    assert summary["curd_yield_%"] == 0
+
+
+@pytest.mark.parametrize("cutting_mode", CurdCutter.CUTTING_MODES)
+def test_modes_yield_the_same_curd(cutting_mode):
+    cutter, curds = cut(batch(2.5), cutting_mode)
+
+    assert sum(curd.get("curd_count", 1) for curd in curds) == 25
+    assert cutter.batch_logs[0]["curd_yield_L"] == 2.25
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1])
+def test_chunk_size_must_be_positive(chunk_size):
+    env = simpy.Environment()
+    with pytest.raises(ValueError):
+        CurdCutter(env, simpy.Store(env), simpy.Store(env), chunk_size=chunk_size)
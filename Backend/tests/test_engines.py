@@ -0,0 +1,93 @@
+import glob
+import json
+import os
+
+import pytest
+
+import Main
+from helpers.experiments import apply_params
+from helpers.fast_env import FastEnvironment
+
+# The fast engine (helpers/fast_env.py) must reproduce the SimPy run event
+# for event, in every mode that changes how machines schedule or log.
+
+SEEDS = (1, 12345)
+
+MODES = {
+    "default": {},
+    "fast_forward": {"machines.pasteuriser.fast_forward": True},
+    "chunked_cutting": {"machines.curd_cutter.cutting_mode": "chunked"},
+    "phase_kernels": {"machines.cheese_vat.phase_kernels": True},
+    "ripener_wake_ups": {"machines.ripener.report_interval": 40, "machines.ripener.milestones": {"turned": 30}},
+    "async_logging": {"logging.async": True},
+    "columnar_logging": {"logging.output_format": "columnar"},
+    "sampling_deadband": {
+        "logging.sampling": {"default": {"policy": "full"}, "salting_and_mellowing": {"policy": "window", "window": 30}},
+        "logging.deadband.enabled": True,
+    },
+}
+
+
+def without_utc_time(record):
+    if isinstance(record, dict):
+        record.pop("utc_time", None)
+    return record
+
+
+def run_outputs(tmp_path, engine, seed, params):
+    args = apply_params(Main.load_defaults(), params)
+    # Two vat batches reach every machine and keep the suite quick
+    args["global"].update(engine=engine, seed=seed, time_mode=0, verbosity="production", milk_to_process=20000)
+    run = Main.main(args, output_dir=str(tmp_path / engine), index_run=False)
+
+    outputs = {}
+    for path in sorted(glob.glob(os.path.join(run["data_dir"], "*.json"))):
+        name = os.path.basename(path)
+        if name == "args.json":
+            # The run's config differs by engine on purpose
+            continue
+        with open(path) as f:
+            outputs[name] = [without_utc_time(record) for record in json.load(f)]
+    ndjson_path = os.path.join(run["data_dir"], "data.ndjson")
+    if os.path.exists(ndjson_path):
+        with open(ndjson_path) as f:
+            outputs["data.ndjson"] = [without_utc_time(json.loads(line)) for line in f if line.strip()]
+    return outputs
+
+
+@pytest.mark.parametrize("mode", list(MODES))
+@pytest.mark.parametrize("seed", SEEDS)
+def test_fast_engine_matches_simpy(tmp_path, seed, mode):
+    expected = run_outputs(tmp_path, "simpy", seed, MODES[mode])
+    actual = run_outputs(tmp_path, "fast", seed, MODES[mode])
+
+    assert expected["data.json"], "the run logged no events"
+    assert sorted(actual) == sorted(expected)
+    for name in expected:
+        assert actual[name] == expected[name], f"{name} differs between engines"
+
+
+def test_stored_timeout_is_rejected():
+    env = FastEnvironment()
+
+    def machine():
+        later = env.timeout(5)
+        yield env.timeout(1)
+        yield later
+
+    env.process(machine())
+    with pytest.raises(RuntimeError):
+        env.run()
+
+
+def test_timeout_overwritten_before_yield_is_rejected():
+    env = FastEnvironment()
+
+    def machine():
+        first = env.timeout(5)
+        env.timeout(1)
+        yield first
+
+    env.process(machine())
+    with pytest.raises(RuntimeError):
+        env.run()
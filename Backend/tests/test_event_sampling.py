@@ -0,0 +1,115 @@
+from helpers.event_sampling import DeadbandFilter, EventSampler
+from conftest import ListLogger
+
+
+def test_window_keeps_identifiers():
+    sink = ListLogger()
+    sampler = EventSampler(sink, {"salting_and_mellowing": {"policy": "window", "window": 10}})
+    for minute in range(10):
+        sampler.log_event({"machine": "salting_and_mellowing", "sim_time": minute, "curd_id": 100 + minute, "batch_id": 3, "mass": 0.5 + minute * 0.01})
+    sampler.flush()
+
+    (event,) = sink.events
+    assert event["curd_id"] == 109
+    assert event["batch_id"] == 3
+    assert "curd_id_min" not in event and "batch_id_max" not in event
+    assert event["mass"] == 0.55
+    assert event["mass_min"] == 0.5 and event["mass_max"] == 0.59
+    assert event["window_events"] == 10
+
+
+def test_window_aggregates_only_varying_fields():
+    sink = ListLogger()
+    sampler = EventSampler(sink, {"pasteuriser": {"policy": "window", "window": 10}})
+    for minute in range(10):
+        # Schema defaults stay at zero; only the temperature moves
+        sampler.log_event({"machine": "pasteuriser", "sim_time": minute, "temperature_C": 70 + minute, "press_pressure_psi": 0, "salt_kg": 0, "milk_L": 0.573})
+    sampler.flush()
+
+    (event,) = sink.events
+    assert event["temperature_C"] == 74.5
+    assert event["temperature_C_min"] == 70 and event["temperature_C_max"] == 79
+    assert event["milk_L"] == 0.573
+    assert not any(name.startswith(("press_pressure_psi_", "salt_kg_", "milk_L_")) for name in event)
+
+
+def test_window_fields_limit_aggregation():
+    sink = ListLogger()
+    sampler = EventSampler(sink, {"ripener": {"policy": "window", "window": 10, "fields": ["stored_kg"]}})
+    for minute in range(10):
+        sampler.log_event({"machine": "ripener", "sim_time": minute, "stored_kg": 10.0 * minute, "intake_kg": 29.0 + minute})
+    sampler.flush()
+
+    (event,) = sink.events
+    assert event["stored_kg"] == 45.0 and "stored_kg_max" in event
+    assert event["intake_kg"] == 38.0 and "intake_kg_max" not in event
+
+
+def test_full_fidelity_config_needs_no_sampler():
+    assert not EventSampler.active(None)
+    assert not EventSampler.active({"default": {"policy": "full"}})
+    assert EventSampler.active({"default": {"policy": "full"}, "ripener": {"policy": "every_nth", "n": 5}})
+
+
+def salting_events(count):
+    # Two events per curd slice (mellowing start/end), each with its own curd_id
+    for i in range(count):
+        stage = "mellowing_start" if i % 2 == 0 else "mellowing_end"
+        yield {"machine": "salting_and_mellowing", "sim_time": 1000 + i, "batch_id": 1 + i // 400, "curd_id": i // 2, "mass": 0.57, "salt_kg": 0.02, "stage": stage, "anomaly": False}
+
+
+def ripener_events(count):
+    # One event per block taken onto the shelves
+    for i in range(count):
+        yield {
+            "machine": "ripener",
+            "sim_time": 3469 + i * 3,
+            "batch_id": 0,
+            "block_id": i,
+            "temperature_C": 10,
+            "intake_kg": 29.4 + (i % 5) * 0.1,
+            "status": "Adding pressed cheeses to shelves...",
+            "blocks_stored": i + 1,
+            "stored_kg": round((i + 1) * 29.6, 2),
+            "output_weight_kg": round(i * 9.1, 2),
+            "anomaly": False,
+        }
+
+
+def run_deadband(events, **options):
+    sink = ListLogger()
+    deadband = DeadbandFilter(sink, **options)
+    for event in events:
+        deadband.log_event(event)
+    deadband.flush()
+    return sink.events, deadband.stats()["deadband"]
+
+
+def test_deadband_shrinks_salting_output():
+    events = list(salting_events(1000))
+    kept, stats = run_deadband(events)
+
+    # New curd and batch numbers alone no longer keep an event
+    assert len(kept) < len(events) // 100
+    assert stats["salting_and_mellowing"]["suppressed"] == len(events) - len(kept)
+    assert kept[0] is events[0] and kept[-1] is events[-1]
+
+
+def test_deadband_shrinks_ripener_output():
+    events = list(ripener_events(300))
+    kept, _ = run_deadband(
+        events,
+        epsilons={"intake_kg": 1.0},
+        tracked_fields={"ripener": ["temperature_C", "intake_kg"]},
+    )
+
+    assert len(kept) < len(events) // 10
+    assert kept[-1]["blocks_stored"] == 300
+
+
+def test_deadband_keeps_real_changes():
+    events = list(salting_events(10))
+    events[5] = dict(events[5], mass=0.9)
+    kept, _ = run_deadband(events)
+
+    assert events[5] in kept
@@ -0,0 +1,52 @@
+import csv
+
+import Main
+import Sweep
+from helpers.experiments import run_experiment
+
+PARAMS = {"global.milk_to_process": 20000}
+
+
+def test_run_experiment_logs_every_event(tmp_path, monkeypatch):
+    monkeypatch.setattr(Main, "append_run_index", lambda runs_dir, record: None)
+    full = run_experiment(Main.load_defaults(), PARAMS, seed=7, output_dir=str(tmp_path / "full"))
+
+    reduced = Main.load_defaults()
+    reduced["logging"].update(
+        output_format="columnar",
+        sampling={"default": {"policy": "window", "window": 60}},
+        deadband={"enabled": True, "default_epsilon": 5},
+    )
+    row = run_experiment(reduced, PARAMS, seed=7, output_dir=str(tmp_path / "reduced"))
+
+    assert row["events"] == full["events"] > 0
+    for kpi in ("milk_burnt_L", "curd_yield_percent", "pressed_kg", "blocks_ripening"):
+        assert row[kpi] == full[kpi]
+
+
+def test_ephemeral_run_is_not_indexed(tmp_path, monkeypatch):
+    indexed = []
+    monkeypatch.setattr(Main, "append_run_index", lambda runs_dir, record: indexed.append(record))
+    output_dir = tmp_path / "run"
+    row = run_experiment(Main.load_defaults(), PARAMS, seed=7, output_dir=str(output_dir), keep_outputs=False)
+
+    assert row["events"] > 0
+    assert not output_dir.exists()
+    assert indexed == []
+
+
+def test_resume_drops_failed_rows(tmp_path):
+    path = tmp_path / "results.csv"
+    fields = ["run_id", "index", "status", "error"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerow({"run_id": "s-00000", "index": 0, "status": "ok"})
+        writer.writerow({"run_id": "s-00001", "index": 1, "status": "failed", "error": "boom"})
+
+    assert Sweep.completed_runs(str(path)) == {"s-00000"}
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["run_id"] for row in rows] == ["s-00000"]
+    # Nothing left to drop the second time round
+    assert Sweep.completed_runs(str(path)) == {"s-00000"}
@@ -0,0 +1,96 @@
+import json
+import os
+import threading
+
+from helpers.ndjson_logger import AsyncNdjsonLogger, NdjsonLogger
+
+
+def sample_events():
+    machines = ["ripener", "pasteuriser", "mystery_machine", "cheese_vat", "pasteuriser", 'odd "ripener"']
+    for minute in range(60):
+        machine = machines[minute % len(machines)]
+        yield {"machine": machine, "sim_time": minute, "batch_id": minute // 7, "temperature_C": 20 + minute * 0.5}
+    # Records that do not lead with the machine are grouped just the same
+    yield {"sim_time": 60, "machine": "cheese_vat", "temperature_C": 50.0}
+
+
+def finalize(tmp_path, name, **kwargs):
+    out = tmp_path / name
+    logger = NdjsonLogger(str(out / "data.ndjson"), str(out / "data.json"), stream=False, buffered=True, **kwargs)
+    for event in sample_events():
+        logger.log_event(event)
+    logger.finalize_json()
+    with open(out / "data.json") as f:
+        return json.load(f), sorted(os.listdir(out))
+
+
+def test_streaming_finalize_matches_in_memory_finalize(tmp_path):
+    streamed, streamed_files = finalize(tmp_path, "streamed", streaming_finalize=True)
+    in_memory, _ = finalize(tmp_path, "in_memory", streaming_finalize=False)
+    assert streamed == in_memory
+    order = list(dict.fromkeys(e["machine"] for e in streamed))
+    assert order == ["pasteuriser", "cheese_vat", "ripener", "mystery_machine", 'odd "ripener"']
+    assert [e["sim_time"] for e in streamed] == list(range(1, 62))
+    # The per-machine segments are temporary
+    assert streamed_files == ["data.json", "data.ndjson"]
+
+
+def carried_records(tmp_path, name, **kwargs):
+    out = tmp_path / name
+    logger = NdjsonLogger(str(out / "data.ndjson"), str(out / "data.json"), stream=False, **kwargs)
+    logger.log_event({"machine": "pasteuriser", "temperature_C": 72.0})
+    logger.log_event({"machine": "cheese_vat", "pH": 6.5})
+    logger.log_event({"machine": "pasteuriser", "milk_L": 10.0})
+    with open(out / "data.ndjson") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_carry_forward_is_global_unless_per_machine_is_asked_for(tmp_path):
+    # By default every record carries the latest fields of every machine
+    vat, pasteuriser = carried_records(tmp_path, "global")[1:]
+    assert vat["temperature_C"] == 72.0
+    assert pasteuriser["pH"] == 6.5 and pasteuriser["machine"] == "pasteuriser"
+
+    # Per machine, a record only inherits its own machine's fields
+    vat, pasteuriser = carried_records(tmp_path, "machine", carry_forward="machine")[1:]
+    assert "temperature_C" not in vat
+    assert "pH" not in pasteuriser and pasteuriser["temperature_C"] == 72.0
+
+
+class StalledWriter(AsyncNdjsonLogger):
+    """Async logger whose writer waits for `release`, so the queue fills up."""
+
+    def __init__(self, *args, **kwargs):
+        self.release = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _drain(self):
+        self.release.wait()
+        super()._drain()
+
+
+def test_async_queue_is_bounded_by_events_not_batches(tmp_path):
+    logger = StalledWriter(str(tmp_path / "data.ndjson"), str(tmp_path / "data.json"), stream=False, queue_size=5, overflow_policy="drop")
+    logger.log_events([{"machine": "cheese_vat", "step": step} for step in range(4)])
+    logger.log_events([{"machine": "cheese_vat", "step": step} for step in range(4, 8)])
+    logger.log_event({"machine": "cheese_vat", "step": 8})
+    assert logger.queue_depth == 5
+    assert logger.high_water_mark == 5
+    assert logger.dropped_events == 4
+
+    logger.release.set()
+    logger.finalize_json()
+    with open(tmp_path / "data.ndjson") as f:
+        assert [json.loads(line)["step"] for line in f] == [0, 1, 2, 3, 4]
+    assert logger.queue_depth == 0
+
+
+def test_blocking_batch_larger_than_the_queue_is_written_in_order(tmp_path):
+    logger = AsyncNdjsonLogger(str(tmp_path / "data.ndjson"), str(tmp_path / "data.json"), stream=False, queue_size=3)
+    logger.log_events([{"machine": "cheese_vat", "step": step} for step in range(10)])
+    logger.log_event({"machine": "cheese_vat", "step": 10})
+    logger.finalize_json()
+    with open(tmp_path / "data.ndjson") as f:
+        assert [json.loads(line)["step"] for line in f] == list(range(11))
+    assert logger.high_water_mark <= 3
+    assert logger.dropped_events == 0
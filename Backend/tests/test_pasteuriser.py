@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+import simpy
+
+from Machines.step1_pasteuriser import INCREMENT_BLOCK, Pasteuriser
+
+
+class IncrementStream:
+    """Feeds the step loop the same temperature increments fast-forward draws in blocks."""
+
+    def __init__(self, seed):
+        self.generator = np.random.default_rng(seed)
+        self._values = iter(())
+
+    def uniform(self, low, high):
+        value = next(self._values, None)
+        if value is None:
+            self._values = iter(self.generator.uniform(low, high, size=INCREMENT_BLOCK).tolist())
+            value = next(self._values)
+        return value
+
+
+def run_pasteuriser(fast_forward, seed, milk, temp_optimal):
+    env = simpy.Environment()
+    milk_tank = simpy.Store(env)
+    milk_tank.items = [milk]
+    output = simpy.Store(env)
+    machine = Pasteuriser(env, milk_tank, output, temp_optimal, simpy.Store(env), verbose=False, fast_forward=fast_forward, rng=IncrementStream(seed))
+    # Run until the machine has emptied both tanks
+    env.run(env.process(machine.process()))
+    return machine, env.now, output.items
+
+
+@pytest.mark.parametrize("seed", [1, 7, 12345])
+@pytest.mark.parametrize("milk, temp_optimal", [(20000, 72), (50000, 72), (5000, 76)])
+def test_fast_forward_matches_step_loop(seed, milk, temp_optimal):
+    stepped, stepped_end, stepped_packets = run_pasteuriser(False, seed, milk, temp_optimal)
+    fast, fast_end, fast_packets = run_pasteuriser(True, seed, milk, temp_optimal)
+
+    assert stepped.pasteurized_total > 0
+    assert fast_end == stepped_end
+    for attribute in ("temperature", "start_tank", "balance_tank", "pasteurized_total", "burnt_total"):
+        assert getattr(fast, attribute) == getattr(stepped, attribute), attribute
+    # One packet per pasteurize segment instead of per step; only the sum's last bits may differ
+    assert len(fast_packets) <= len(stepped_packets)
+    assert sum(fast_packets) == pytest.approx(sum(stepped_packets), rel=1e-12)
+    # The last event carries the same closing state
+    assert fast.observer.appended < stepped.observer.appended
+    *_, stepped_last = stepped.observer
+    *_, fast_last = fast.observer
+    for field in ("start_tank_L", "balance_tank_L", "pasteurized_total_L", "burnt_total_L", "temperature_C"):
+        assert fast_last[field] == stepped_last[field], field
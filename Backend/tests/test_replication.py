@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+
+import pytest
+
+import Main
+import Replicate
+from helpers.replication import RunningStats, t_quantile
+from helpers.run_registry import load_run_index
+
+# Two-sided critical values from a standard t table
+T_TABLE = {
+    (1, 0.975): 12.7062,
+    (1, 0.995): 63.6567,
+    (2, 0.975): 4.3027,
+    (2, 0.995): 9.9248,
+    (3, 0.975): 3.1824,
+    (3, 0.995): 5.8409,
+    (5, 0.975): 2.5706,
+    (10, 0.975): 2.2281,
+    (30, 0.975): 2.0423,
+}
+
+
+@pytest.mark.parametrize("df, p", list(T_TABLE))
+def test_t_quantile_matches_table(df, p):
+    tolerance = 1e-4 if df <= 2 else 0.01
+    assert t_quantile(p, df) == pytest.approx(T_TABLE[df, p], rel=tolerance)
+
+
+def test_t_quantile_rejects_zero_df():
+    with pytest.raises(ValueError):
+        t_quantile(0.975, 0)
+
+
+def test_half_width_with_two_replications():
+    stats = RunningStats()
+    stats.add(1.0)
+    stats.add(3.0)
+
+    # std and sqrt(n) are both sqrt(2), so the half-width is the t value itself
+    assert stats.half_width(0.95) == pytest.approx(12.7062, rel=1e-4)
+
+
+def test_stopping_early_leaves_only_folded_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(Replicate, "REPLICATIONS_DIR", str(tmp_path / "replications"))
+    monkeypatch.setattr(Replicate, "RUNS_DIR", str(tmp_path / "runs"))
+    spec = {
+        "name": "early",
+        "base": {"global.simulation_time": 600, "global.milk_to_process": 10000},
+        "min_replications": 3,
+        "max_replications": 40,
+        # Met as soon as the interval is finite, so the runner stops at min_replications
+        "targets": {"events": {"absolute": 1e12}},
+    }
+
+    summary = Replicate.replicate(spec, Main.load_defaults(), workers=4)
+
+    assert summary["replications"] == 3
+    assert summary["stopped_by"] == "precision"
+    assert multiprocessing.active_children() == []
+    assert [run["run_id"] for run in load_run_index(str(tmp_path / "runs"))] == ["early-r00000", "early-r00001", "early-r00002"]
+    assert sorted(os.listdir(tmp_path / "replications" / "early" / "runs")) == ["early-r00000", "early-r00001", "early-r00002"]
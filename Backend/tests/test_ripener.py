@@ -0,0 +1,72 @@
+import simpy
+
+from Machines.step8_ripener import Ripener
+from conftest import FixedClock, ListLogger
+
+
+def feed(env, store, arrivals):
+    for step, kg in arrivals:
+        yield env.timeout(step - env.now)
+        yield store.put(kg)
+
+
+def run_ripener(arrivals, until, initial_temp=10, milestones=None):
+    env = simpy.Environment()
+    store = simpy.Store(env)
+    logger = ListLogger()
+    env.process(feed(env, store, arrivals))
+    ripener = Ripener.run(env, store, FixedClock, initial_temp, logger, verbose=False, milestones=milestones)
+    env.run(until=until)
+    ripener.finalize()
+    return ripener, logger.events
+
+
+def step_wise_ripening(arrivals, until):
+    # The old loop: every step after a block is stored adds the stored mass, up to step until - 1
+    stored = ripening = 0
+    for step in range(until):
+        ripening += stored
+        stored += sum(kg for at, kg in arrivals if at == step)
+    return ripening
+
+
+def test_storage_matches_the_step_wise_loop():
+    arrivals = [(3, 29.5), (40, 30.25), (41, 28.0), (199, 31.0)]
+    for until in (4, 41, 42, 200, 1000):
+        stored = [a for a in arrivals if a[0] < until]
+        ripener, events = run_ripener(arrivals, until)
+        assert ripener.ripening == step_wise_ripening(stored, until)
+        assert ripener.blocks == len(stored)
+        assert events[-1]["sim_time"] == (until - 1) // Ripener.STEPS_PER_MIN
+
+
+def test_single_block_counts_until_minus_one_steps():
+    ripener, _ = run_ripener([(10, 30.0)], 110)
+    assert ripener.ripening == 30.0 * (110 - 1 - 10)
+
+
+def test_block_stored_in_the_last_step_does_not_roll_storage_back():
+    # The curd cutter works in 0.1 steps, so blocks reach the ripener at fractional times
+    ripener, events = run_ripener([(0, 100.0), (9.5, 100.0)], 10)
+    assert ripener.ripening == 950.0
+    assert [e["output_weight_kg"] for e in events] == [0, 950.0, 950.0]
+    assert events[-1]["sim_time"] >= events[-2]["sim_time"]
+
+
+def test_milestones_wake_the_ripener_per_block():
+    arrivals = [(0, 30.0), (20, 30.0)]
+    ripener, events = run_ripener(arrivals, 100, milestones={"turned": 5, "waxed": 10})
+
+    # Two intakes, two milestones per block and the closing state
+    assert len(events) == 2 + 4 + 1
+    assert ripener.milestones_reached == 4
+    # Block 2 is stored at step 20 (minute 5), so its milestones land five minutes later
+    reached = [(e["sim_time"], e["status"]) for e in events[:-1] if e["status"].startswith("Block")]
+    assert reached == [(5, "Block 1 turned"), (10, "Block 1 waxed"), (10, "Block 2 turned"), (15, "Block 2 waxed")]
+    assert ripener.ripening == step_wise_ripening(arrivals, 100)
+
+
+def test_default_milestone_follows_the_temperature():
+    assert Ripener(simpy.Environment(), None, FixedClock, 10).milestones == [(12 * Ripener.STEPS_PER_MONTH, "ripe")]
+    assert Ripener(simpy.Environment(), None, FixedClock, 5).milestones == [(18 * Ripener.STEPS_PER_MONTH, "ripe")]
+    assert Ripener(simpy.Environment(), None, FixedClock, 20).milestones == []
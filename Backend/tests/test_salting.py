@@ -0,0 +1,124 @@
+import random
+
+import pytest
+import simpy
+
+from helpers.salting_to_presser import salting_to_presser
+from Machines.step6_salting_and_mellowing import SaltingMachine
+from conftest import FixedClock, ListLogger
+
+
+class PerSliceSaltingMachine(SaltingMachine):
+    """The mellowing stage as it was before the FIFO stage: one process per slice."""
+
+    def salt_dispenser(self):
+        while True:
+            curd_slice = yield self.input_conveyor.get()
+            salt_amount = self.salt_recipe * curd_slice['mass']
+            curd_slice['salt'] += salt_amount
+            self.log(curd_slice, 'salt_dispenser')
+            yield self.mellowing_conveyor.put(curd_slice)
+            self.env.process(self.mellowing_delay(curd_slice))
+
+    def mellowing_delay(self, curd_slice):
+        self.log(curd_slice, 'mellowing_start')
+        yield self.env.timeout(self.mellowing_time)
+        yield self.mellowing_conveyor.get()
+        self.log(curd_slice, 'mellowing_end')
+        yield self.mellowing_output_conveyor.put(curd_slice)
+
+
+def feed_slices(env, conveyor, seed, count, round_gaps=False):
+    rng = random.Random(seed)
+    for curd_id in range(count):
+        # Bursts of slices at the same time as well as gaps longer than the mellowing time;
+        # round gaps make slices arrive exactly when earlier ones finish mellowing
+        if rng.random() < 0.3:
+            gap = 0
+        else:
+            gap = rng.choice([0.5, 1, 3, 12]) if round_gaps else rng.uniform(0, 12)
+        yield env.timeout(gap)
+        yield conveyor.put({'id': curd_id, 'mass': rng.uniform(1, 5), 'salt': rng.uniform(0, 0.1)})
+
+
+def run_salting(per_slice, seed, mellowing_time, round_gaps=False):
+    env = simpy.Environment()
+    slices = simpy.Store(env, capacity=8)
+    output = simpy.Store(env)
+    logger = ListLogger()
+    env.process(feed_slices(env, slices, seed, 300, round_gaps))
+    if per_slice:
+        machine = PerSliceSaltingMachine(env, slices, FixedClock, simpy.Store(env), output, mellowing_time=mellowing_time, salt_recipe=0.033, logger=logger, verbose=False)
+        env.process(machine.salt_dispenser())
+    else:
+        machine = SaltingMachine.run(env, slices, output, FixedClock, mellowing_time=mellowing_time, logger=logger, verbose=False)
+    released = []
+
+    def drain():
+        while True:
+            curd_slice = yield output.get()
+            released.append((env.now, curd_slice['id']))
+
+    env.process(drain())
+    env.run(until=2000)
+    return list(machine.observer), logger.events, released
+
+
+@pytest.mark.parametrize("seed", [1, 7, 12345])
+@pytest.mark.parametrize("mellowing_time", [10, 2.5])
+def test_fifo_mellowing_matches_per_slice_processes(seed, mellowing_time):
+    expected = run_salting(True, seed, mellowing_time)
+    actual = run_salting(False, seed, mellowing_time)
+
+    observations, events, released = expected
+    assert len(released) == 300
+    assert actual[0] == observations
+    assert actual[1] == events
+    assert actual[2] == released
+
+
+def by_stage(records, key):
+    stages = {}
+    for record in records:
+        stages.setdefault(record[key], []).append(record)
+    return stages
+
+
+@pytest.mark.parametrize("seed", [1, 7, 12345])
+def test_fifo_mellowing_keeps_every_stage_on_ties(seed):
+    # When a slice arrives at the very instant another finishes mellowing, the two
+    # designs may write those same-instant lines in a different order; each stage's
+    # records, their times and the released slices stay identical
+    observations, events, released = run_salting(True, seed, 10, round_gaps=True)
+    actual = run_salting(False, seed, 10, round_gaps=True)
+
+    assert by_stage(actual[0], 'machine') == by_stage(observations, 'machine')
+    assert by_stage(actual[1], 'stage') == by_stage(events, 'stage')
+    assert actual[2] == released
+
+
+def run_blocks(seed, retain_slices):
+    env = simpy.Environment()
+    slices = simpy.Store(env)
+    blocks = simpy.Store(env)
+    env.process(feed_slices(env, slices, seed, 400))
+    env.process(salting_to_presser(env, slices, blocks, 27, retain_slices=retain_slices, rng=random.Random(seed)))
+    env.run(until=5000)
+    return blocks.items
+
+
+@pytest.mark.parametrize("seed", [1, 7, 12345])
+def test_running_totals_match_summed_slices(seed):
+    blocks = run_blocks(seed, retain_slices=True)
+    assert len(blocks) > 10
+    for block in blocks:
+        # The sums salting_to_presser used to recompute on every slice
+        slices = block['slices']
+        total_mass = sum(s['mass'] for s in slices)
+        assert block['input_weight_kg'] == total_mass
+        assert block['input_moisture_percent'] == sum(s['mass'] * s['moisture'] for s in slices) / total_mass
+        assert block['salt'] == sum(s['salt'] for s in slices)
+
+    # Keeping the slices is for debugging only and changes nothing else
+    lean = run_blocks(seed, retain_slices=False)
+    assert lean == [{key: value for key, value in block.items() if key != 'slices'} for block in blocks]
@@ -0,0 +1,72 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+import Main
+import Sensitivity
+from helpers.sensitivity import morris_indices, morris_sample, scale_samples, unscale_samples
+
+
+def test_linear_model_effects_are_its_slopes():
+    bounds = [(0.0, 10.0), (-1.0, 1.0)]
+    unit = morris_sample(2, 6, seed=3)
+    design = np.array(scale_samples(unit, bounds))
+    y = 3 * design[:, 0] - 5 * design[:, 1]
+
+    result = morris_indices(unit, y, applied=unscale_samples(design, bounds))
+    # Effects are per unit of the normalized range: slope x range width
+    assert result["mu"] == pytest.approx([30.0, -10.0])
+    assert result["mu_star"] == pytest.approx([30.0, 10.0])
+    assert result["sigma"] == pytest.approx([0.0, 0.0], abs=1e-9)
+    assert result["skipped"].tolist() == [0, 0]
+
+
+def test_effects_use_the_rounded_values():
+    # Six levels on [0, 2]: unit steps of 0.6 round to moves of 1 or 2
+    bounds = [(0, 2)]
+    unit = morris_sample(1, 8, levels=6, seed=1)
+    design = scale_samples(unit, bounds)
+    y = np.array([row[0] for row in design], dtype=float)
+
+    result = morris_indices(unit, y, applied=unscale_samples(design, bounds))
+    assert result["mu_star"][0] == pytest.approx(2.0)
+    assert result["sigma"][0] == pytest.approx(0.0)
+    # In unit space the same runs give uneven effects
+    assert morris_indices(unit, y)["sigma"][0] > 0
+
+
+def test_steps_cancelled_by_rounding_are_skipped():
+    bounds = [(0.0, 1.0), (5, 5)]
+    unit = morris_sample(2, 4, seed=2)
+    design = np.array(scale_samples(unit, bounds), dtype=float)
+    y = 2 * design[:, 0] + design[:, 1]
+
+    result = morris_indices(unit, y, applied=unscale_samples(design, bounds))
+    assert result["skipped"].tolist() == [0, 4]
+    assert result["mu"][0] == pytest.approx(2.0)
+    assert all(math.isnan(result[index][1]) for index in ("mu", "mu_star", "sigma"))
+
+
+def test_run_analysis_writes_morris_indices(tmp_path, monkeypatch):
+    monkeypatch.setattr(Sensitivity, "SENSITIVITY_DIR", str(tmp_path))
+    spec = {
+        "name": "presser",
+        "method": "morris",
+        "seed": 4,
+        "trajectories": 2,
+        "parameters": {"machines.cheese_presser.block_weight": [20, 35]},
+        "metrics": ["blocks_pressed"],
+        "base": {"global.milk_to_process": 20000},
+    }
+    report = Sensitivity.run_analysis(spec, Main.load_defaults(), workers=2)
+
+    assert report["points"] == 4
+    indices = report["indices"]["blocks_pressed"]["machines.cheese_presser.block_weight"]
+    assert set(indices) == {"mu", "mu_star", "sigma", "skipped"}
+    assert indices["skipped"] == 0
+    with open(tmp_path / "presser" / "indices.json") as f:
+        assert json.load(f) == report
+    # Every run's directory is removed once its KPIs are read
+    assert not any((tmp_path / "presser" / "runs").iterdir())
@@ -0,0 +1,50 @@
+import io
+import json
+import logging
+import os
+import threading
+
+import pytest
+
+import Main
+import SimWorker
+
+
+def open_paths():
+    paths = []
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            paths.append(os.readlink(os.path.join("/proc/self/fd", fd)))
+        except OSError:
+            pass
+    return paths
+
+
+def job_args():
+    args = Main.load_defaults()
+    args["global"].update(milk_to_process=20000, seed=3, verbosity="production", time_mode=0)
+    args["logging"].update({"async": True, "observer": {"retention": "spill", "chunk_size": 50}})
+    return args
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc to list open files")
+def test_failed_job_releases_its_resources(tmp_path, monkeypatch):
+    monkeypatch.setattr(Main, "append_run_index", lambda runs_dir, record: None)
+    broken = job_args()
+    # Fails once every machine but the ripener is built and the logger is open
+    del broken["machines"]["ripener"]["initial_temp"]
+    jobs = [
+        {"job_id": "broken", "args": broken, "output_dir": str(tmp_path / "broken")},
+        {"job_id": "good", "args": job_args(), "output_dir": str(tmp_path / "good")},
+    ]
+    out = io.StringIO()
+    SimWorker.handle_lines([json.dumps(job) + "\n" for job in jobs], out)
+
+    messages = [json.loads(line) for line in out.getvalue().splitlines() if '"type": "job_' in line]
+    assert [m["type"] for m in messages] == ["job_failed", "job_complete"]
+    assert messages[1]["events_written"] > 0
+
+    assert not [path for path in open_paths() if path.startswith(str(tmp_path))]
+    assert not [t for t in threading.enumerate() if t.name == "ndjson-writer"]
+    assert not logging.getLogger().handlers
+    assert not os.path.exists(tmp_path / "broken" / "observer_spill")